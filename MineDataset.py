@@ -0,0 +1,205 @@
+"""
+煤矿数据集内存索引 - MineDataset
+包装convert_mine的输出，按Schema的主键（primary_key）、外键（MineSchema.references，
+即字段的foreign_key标记）和指定的分类字段建立哈希索引：按ID取记录、取采空区的关联记录、
+按字段值筛选都是O(1)查找，供关系推理等训练样本生成在循环中反复查询
+
+版本: 1.0.0
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from MineSchema import MineSchema
+from MineTableSource import MineTableSource
+from MineJson import open_decompressed, get_json_backend
+
+
+class MineDataset:
+    """煤矿数据集的内存索引"""
+
+    # 默认建立索引的分类字段（多个表共有，常用于筛选）
+    INDEX_FIELDS = ("coal_seam", "gas_type")
+
+    def __init__(self, data: Dict, schema: Optional[MineSchema] = None,
+                 index_fields: Iterable[str] = INDEX_FIELDS):
+        """
+        建立索引
+
+        Args:
+            data: convert_mine的返回值或读取的JSON（{"mine_info", "statistics", "data"}），
+                  记录数组和列式布局均可
+            schema: Schema，默认使用工具目录下的Schema
+            index_fields: 预先建立索引的字段；其他字段在首次按其查询时建立索引
+        """
+        self.schema = schema or MineSchema()
+        self.mine_info: Dict = data.get("mine_info", {})
+        # 英文表名 → 记录列表
+        self.tables: Dict[str, List[Dict]] = {
+            table_en: self._to_records(table) for table_en, table in data.get("data", {}).items()
+        }
+        self._table_cn = {table_en: table_cn for table_cn, table_en in MineTableSource.TABLE_MAPPING.items()}
+
+        # 外键关系（英文表名）：[(子表, 外键字段, 被引用表)]
+        self.references: List[Tuple[str, str, str]] = [
+            (MineTableSource.TABLE_MAPPING[child_cn], field, MineTableSource.TABLE_MAPPING[parent_cn])
+            for child_cn, field, parent_cn in self.schema.references()
+            if child_cn in MineTableSource.TABLE_MAPPING and parent_cn in MineTableSource.TABLE_MAPPING
+        ]
+        # 外键字段的值可能引用多个ID（如"HX001-G001,HX001-G002"），按每个ID分别索引
+        self._reference_fields = {(child_en, field) for child_en, field, _ in self.references}
+
+        # 主键索引：英文表名 → {主键值: 记录}，主键重复时保留第一条
+        self._keys: Dict[str, Dict] = {}
+        # 字段索引：(英文表名, 字段) → {值: [记录]}
+        self._indexes: Dict[Tuple[str, str], Dict] = {}
+
+        for table_en, records in self.tables.items():
+            key_field = self.primary_key(table_en)
+            if key_field:
+                keys = {}
+                for record in records:
+                    keys.setdefault(record.get(key_field), record)
+                keys.pop(None, None)
+                self._keys[table_en] = keys
+        for child_en, field, _ in self.references:
+            if child_en in self.tables:
+                self.index(child_en, field)
+        for field in index_fields:
+            for table_en in self.tables:
+                if field in self.schema.field_types(self._table_cn.get(table_en, "")):
+                    self.index(table_en, field)
+
+    @classmethod
+    def from_json(cls, json_path: Union[str, Path], **kwargs) -> "MineDataset":
+        """
+        从转换输出的JSON文件建立索引（自动识别gzip/zstd压缩）
+
+        Args:
+            json_path: JSON文件路径
+            **kwargs: 同__init__
+        """
+        with open(json_path, 'rb') as f, open_decompressed(f) as binary:
+            data = get_json_backend().loads(binary.read())
+        return cls(data, **kwargs)
+
+    def primary_key(self, table: str) -> Optional[str]:
+        """表的主键字段（表名可以是英文或中文）"""
+        return self.schema.primary_key(self._table_cn.get(self._table_en(table), ""))
+
+    def records(self, table: str) -> List[Dict]:
+        """表的全部记录；表不存在时为空列表"""
+        return self.tables.get(self._table_en(table), [])
+
+    def get(self, table: str, key) -> Optional[Dict]:
+        """
+        按主键取记录
+
+        Args:
+            table: 英文或中文表名
+            key: 主键值（如"HX001-G003"）
+
+        Returns:
+            记录，不存在时返回None
+        """
+        return self._keys.get(self._table_en(table), {}).get(key)
+
+    def index(self, table: str, field: str) -> Dict:
+        """
+        字段的哈希索引（首次使用时建立）
+
+        多值字段（如normalize后的coal_seam列表）和引用多个ID的外键
+        （按MineSchema.REFERENCE_SEPARATOR拆分）按每个值分别索引，空值不索引。
+
+        Returns:
+            {值: [记录]}，按记录在表中的顺序
+        """
+        index_key = (self._table_en(table), field)
+        index = self._indexes.get(index_key)
+        if index is None:
+            index = {}
+            for record in self.tables.get(index_key[0], []):
+                for item in self._values(index_key[0], field, record.get(field)):
+                    index.setdefault(item, []).append(record)
+            self._indexes[index_key] = index
+        return index
+
+    def lookup(self, table: str, field: str, value) -> List[Dict]:
+        """
+        按字段值取记录
+
+        Returns:
+            匹配的记录列表（索引中的列表，不要修改）；没有匹配时为空列表
+        """
+        return self.index(table, field).get(value, [])
+
+    def filter(self, table: str, **conditions) -> List[Dict]:
+        """
+        按多个字段值筛选记录（各条件均为等值匹配，多值字段和多ID外键包含该值即匹配）
+
+        先取候选最少的条件的索引，再逐条检查其余条件。
+
+        Example:
+            dataset.filter("goaf_gas_info", goaf_id="HX001-G003", gas_type="CO")
+        """
+        if not conditions:
+            return list(self.records(table))
+        buckets = sorted(((self.lookup(table, field, value), field) for field, value in conditions.items()),
+                         key=lambda bucket: len(bucket[0]))
+        candidates, _ = buckets[0]
+        rest = [(field, conditions[field]) for _, field in buckets[1:]]
+        table_en = self._table_en(table)
+        return [record for record in candidates
+                if all(v in self._values(table_en, f, record.get(f)) for f, v in rest)]
+
+    def related(self, table: str, key) -> Dict[str, List[Dict]]:
+        """
+        按外键取引用某条记录的各子表记录（如一个采空区的积水、积气、自燃发火等记录），
+        外键引用多个ID的记录出现在其中每个ID的结果中
+
+        Args:
+            table: 被引用表（如"goaf_basic_info"）
+            key: 被引用记录的主键值
+
+        Returns:
+            {子表英文名: [记录]}，包含所有引用该表的子表（没有记录时为空列表）
+        """
+        parent_en = self._table_en(table)
+        return {child_en: self.lookup(child_en, field, key)
+                for child_en, field, referenced_en in self.references if referenced_en == parent_en}
+
+    def parents(self, table: str, record: Dict) -> Dict[str, List[Dict]]:
+        """
+        取一条记录按外键引用的父表记录
+
+        Returns:
+            {被引用表英文名: [父记录]}，按外键中ID的顺序（如顶板悬顶记录引用的多个采空区）；
+            外键为空或引用的记录都不存在时为空列表
+        """
+        child_en = self._table_en(table)
+        parents = {}
+        for referencing_en, field, parent_en in self.references:
+            if referencing_en == child_en:
+                found = (self.get(parent_en, key) for key in self._values(child_en, field, record.get(field)))
+                parents[parent_en] = [parent for parent in found if parent is not None]
+        return parents
+
+    def _table_en(self, table: str) -> str:
+        """中文表名转为英文表名，英文表名原样返回"""
+        return MineTableSource.TABLE_MAPPING.get(table, table)
+
+    @staticmethod
+    def _to_records(table: Union[List, Dict]) -> List[Dict]:
+        """列式布局的表还原为记录列表"""
+        if isinstance(table, dict):
+            columns = table.get("columns", [])
+            return [dict(zip(columns, row)) for row in table.get("rows", [])]
+        return table
+
+    def _values(self, table_en: str, field: str, value) -> List:
+        """字段值对应的索引键：多值字段的每一项、外键引用的每个ID，空值没有索引键"""
+        if (table_en, field) in self._reference_fields:
+            return self.schema.split_references(value)
+        if isinstance(value, list):
+            return [item for item in value if item is not None]
+        return [] if value is None else [value]
@@ -0,0 +1,697 @@
+"""
+煤矿数据集JSON流式写出 - MineJson
+逐表、逐批写出mine_info / statistics / data，内存只占用当前一批记录，
+输出与 json.dump(result, ensure_ascii=False, indent=2) 逐字节一致；
+支持紧凑格式、列式布局和gzip/zstd压缩；安装了orjson时用orjson编码（JsonBackend）；
+读取时可逐条增量解析记录（MineJsonReader）；
+另提供训练语料用的JSONL分片写出和按偏移随机读取
+
+版本: 1.0.0
+"""
+
+import gzip
+import json
+import shutil
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，只有zstd压缩需要
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时用标准库json
+    orjson = None
+
+
+# 支持的压缩格式 → 文件后缀
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# 压缩格式的文件头，读取时据此自动识别
+COMPRESSION_MAGIC = {"gzip": b"\x1f\x8b", "zstd": b"\x28\xb5\x2f\xfd"}
+
+
+def check_compression(compression: Optional[str]):
+    """检查压缩格式是否支持、所需的库是否已安装"""
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"不支持的压缩格式: {compression}（可选: {', '.join(COMPRESSION_SUFFIXES)}）")
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("zstd压缩需要安装zstandard: pip install zstandard")
+
+
+def open_compressed(binary: BinaryIO, compression: str) -> BinaryIO:
+    """
+    在二进制输出上包装压缩流，边写边压缩；关闭压缩流时写出结尾，不关闭binary
+
+    gzip头中不写文件名和修改时间，相同内容的压缩结果逐字节一致。
+    """
+    check_compression(compression)
+    if compression == "gzip":
+        return gzip.GzipFile(filename="", mode='wb', fileobj=binary, mtime=0)
+    return zstandard.ZstdCompressor().stream_writer(binary, closefd=False)
+
+
+def open_decompressed(binary: BinaryIO) -> BinaryIO:
+    """
+    按文件头识别gzip/zstd并包装解压流；未压缩时原样返回
+
+    Args:
+        binary: 二进制输入，需支持peek或seek
+    """
+    if hasattr(binary, 'peek'):
+        head = binary.peek(4)[:4]
+    else:
+        position = binary.tell()
+        head = binary.read(4)
+        binary.seek(position)
+    if head.startswith(COMPRESSION_MAGIC["gzip"]):
+        return gzip.GzipFile(mode='rb', fileobj=binary)
+    if head.startswith(COMPRESSION_MAGIC["zstd"]):
+        check_compression("zstd")
+        return zstandard.ZstdDecompressor().stream_reader(binary, closefd=False)
+    return binary
+
+
+class JsonBackend:
+    """
+    JSON编解码后端：标准库json
+
+    dumps与json.dumps(ensure_ascii=False)一致，indent为None时为紧凑格式（separators=(',', ':')）
+    """
+
+    name = "json"
+
+    def dumps(self, value, indent: Optional[int] = 2) -> str:
+        """编码一个值"""
+        if indent is None:
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        return json.dumps(value, ensure_ascii=False, indent=indent)
+
+    def loads(self, data: Union[str, bytes]):
+        """解析JSON文本"""
+        return json.loads(data)
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    JSON编解码后端：orjson
+
+    缩进格式（indent=2）与标准库逐字节一致：orjson与标准库的浮点数写法只在科学计数法
+    （1e16与1e+16、0.00001与1e-05）和NaN/Infinity上不同，值中有这类浮点数，
+    或有orjson不支持的值（超过64位的整数、非字符串键、numpy标量等）时，整个值改用标准库编码。
+
+    紧凑格式直接使用orjson的输出：科学计数法的写法可能与标准库不同（数值相同），
+    NaN/Infinity写为null。
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson后端需要安装orjson: pip install orjson")
+
+    def dumps(self, value, indent: Optional[int] = 2) -> str:
+        try:
+            if indent is None:
+                return orjson.dumps(value).decode('utf-8')
+            if indent == 2 and self._plain_floats(value):
+                return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:  # orjson.JSONEncodeError
+            pass
+        return super().dumps(value, indent)
+
+    def loads(self, data: Union[str, bytes]):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson不接受NaN/Infinity，交给标准库；格式确实有误时由标准库报告
+            return super().loads(data)
+
+    @classmethod
+    def _plain_floats(cls, value) -> bool:
+        """值中的浮点数是否都是有限值，且标准库不会写为科学计数法（0或1e-4 <= |x| < 1e16）"""
+        value_type = type(value)
+        if value_type is float:
+            return value == 0.0 or 1e-4 <= abs(value) < 1e16
+        if value_type is dict:
+            items = value.values()
+        elif value_type is list or value_type is tuple:
+            items = value
+        else:
+            return True
+        for item in items:
+            item_type = type(item)
+            if item_type is float:
+                if not (item == 0.0 or 1e-4 <= abs(item) < 1e16):
+                    return False
+            elif item_type is dict:
+                # 记录数组中的记录在此展开一层，避免逐条递归调用；大部分字段是字符串或null
+                for field in item.values():
+                    field_type = type(field)
+                    if field_type is str or field is None:
+                        continue
+                    if field_type is float:
+                        if not (field == 0.0 or 1e-4 <= abs(field) < 1e16):
+                            return False
+                    elif field_type is dict or field_type is list or field_type is tuple:
+                        if not cls._plain_floats(field):
+                            return False
+            elif item_type is list or item_type is tuple:
+                if not cls._plain_floats(item):
+                    return False
+        return True
+
+
+# 可选的编解码后端
+JSON_BACKENDS = {"json": JsonBackend, "orjson": OrjsonBackend}
+
+
+def get_json_backend(name: Optional[str] = "auto") -> JsonBackend:
+    """
+    按名称获取编解码后端
+
+    Args:
+        name: "json"、"orjson"；"auto"或None时安装了orjson则用orjson，否则用标准库
+    """
+    if name in (None, "auto"):
+        name = "orjson" if orjson is not None else "json"
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"不支持的JSON后端: {name}（可选: auto, {', '.join(JSON_BACKENDS)}）")
+    return JSON_BACKENDS[name]()
+
+
+class MineJsonWriter:
+    """煤矿数据集JSON流式写出器"""
+
+    # 缩进空格数（与json.dump的indent=2一致）
+    INDENT = 2
+
+    # data部分先写入临时缓冲，超过该大小后落盘
+    SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, fp: IO[str], indent: Optional[int] = INDENT, backend: Optional[JsonBackend] = None):
+        """
+        初始化写出器
+
+        statistics位于data之前，但只有读完所有表才能得到，
+        因此data部分先写入临时缓冲，finish时再按顺序拼接到fp。
+
+        Args:
+            fp: 文本模式的输出文件对象
+            indent: 缩进空格数；为None时输出紧凑格式，与json.dump(separators=(',', ':'))一致
+            backend: 编码后端，默认按get_json_backend自动选择
+        """
+        self.fp = fp
+        self.indent = indent
+        self.backend = backend or get_json_backend()
+        self._colon = ": " if indent is not None else ":"
+        self._spool = tempfile.SpooledTemporaryFile(
+            max_size=self.SPOOL_MAX_SIZE, mode='w+', encoding='utf-8', newline=''
+        )
+        self._table_count = 0
+        self._record_count = 0
+        self._in_table = False
+        # 当前表的记录层级：记录数组为3，列式布局的rows为4
+        self._record_level = 3
+
+    def begin_table(self, table_name: str, columns: Optional[List[str]] = None):
+        """
+        开始写一个表（data下的一个数组）
+
+        Args:
+            table_name: 表名
+            columns: 列式布局的列名；指定时表写为{"columns": 列名, "rows": 值数组}，
+                     write_records写入的是与列名对应的值列表
+        """
+        if self._in_table:
+            raise RuntimeError("上一个表尚未结束")
+        prefix = "," if self._table_count else "{"
+        self._spool.write(f"{prefix}{self._newline(2)}{self._encode(table_name, 0)}{self._colon}")
+        if columns is None:
+            self._spool.write("[")
+            self._record_level = 3
+        else:
+            self._spool.write(f'{{{self._newline(3)}"columns"{self._colon}{self._encode(columns, 3)},'
+                              f'{self._newline(3)}"rows"{self._colon}[')
+            self._record_level = 4
+        self._table_count += 1
+        self._record_count = 0
+        self._in_table = True
+
+    def write_records(self, records: List[Union[Dict, List]]):
+        """写入当前表的一批记录（列式布局时为值列表）"""
+        if not self._in_table:
+            raise RuntimeError("需要先调用begin_table")
+        if not records:
+            return
+        # 整批编码为外层数组，去掉首尾的括号后各条记录已按层级缩进并以逗号分隔
+        text = self._encode(records, self._record_level - 1)
+        closing = len(self._newline(self._record_level - 1)) + 1
+        if self._record_count:
+            self._spool.write(",")
+        self._spool.write(text[1:-closing])
+        self._record_count += len(records)
+
+    def end_table(self):
+        """结束当前表"""
+        if not self._in_table:
+            raise RuntimeError("没有正在写入的表")
+        level = self._record_level - 1
+        if self._record_count:
+            self._spool.write(f"{self._newline(level)}]")
+        else:
+            self._spool.write("]")
+        if self._record_level == 4:
+            self._spool.write(f"{self._newline(2)}}}")
+        self._in_table = False
+
+    def finish(self, mine_info: Dict, statistics: Dict):
+        """
+        写出完整文档：mine_info、statistics，再拼接缓冲中的data
+
+        Args:
+            mine_info: 煤矿信息
+            statistics: 各表记录数
+        """
+        if self._in_table:
+            raise RuntimeError("最后一个表尚未结束")
+        indent = self._newline(1)
+        self.fp.write("{")
+        self.fp.write(f'{indent}"mine_info"{self._colon}{self._encode(mine_info, 1)},')
+        self.fp.write(f'{indent}"statistics"{self._colon}{self._encode(statistics, 1)},')
+        self.fp.write(f'{indent}"data"{self._colon}')
+        if self._table_count:
+            self._spool.write(f"{indent}}}")
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, self.fp)
+        else:
+            self.fp.write("{}")
+        self.fp.write(f"{self._newline(0)}}}")
+        self._spool.close()
+
+    def close(self):
+        """释放临时缓冲（异常退出时使用）"""
+        self._spool.close()
+
+    def _newline(self, level: int) -> str:
+        """换行并缩进到指定层级；紧凑格式不换行"""
+        if self.indent is None:
+            return ""
+        return "\n" + " " * (self.indent * level)
+
+    def _encode(self, value, level: int) -> str:
+        """
+        按json.dump的格式编码一个值，并缩进到指定层级
+
+        字符串中的换行会被转义为\\n，编码结果中的换行只出现在结构之间，
+        因此直接在每个换行后补齐外层缩进即可。
+        """
+        text = self.backend.dumps(value, self.indent)
+        if self.indent is not None and level:
+            text = text.replace("\n", "\n" + " " * (self.indent * level))
+        return text
+
+
+class MineJsonReader:
+    """
+    数据集JSON增量解析器
+
+    按固定大小的块读取，data中的记录逐条解析，内存只占用读缓冲和当前一条记录；
+    其余顶层字段（mine_info、statistics）体积很小，整体解析。
+    """
+
+    # 每次读取的字符数
+    CHUNK_SIZE = 1024 * 1024
+
+    # JSON空白字符
+    WHITESPACE = " \t\n\r"
+
+    def __init__(self, fp: IO[str], parse_constant: Optional[Callable[[str], object]] = None):
+        """
+        初始化解析器
+
+        Args:
+            fp: 文本模式的输入文件对象
+            parse_constant: 遇到NaN、Infinity、-Infinity时调用，参数为原文，返回值作为解析结果
+        """
+        self.fp = fp
+        self.decoder = json.JSONDecoder(parse_constant=parse_constant) if parse_constant else json.JSONDecoder()
+        # 已解析的顶层键（按出现顺序）
+        self.keys: List[str] = []
+        self._buffer = ""
+        self._position = 0
+        self._consumed = 0
+        self._eof = False
+
+    def events(self) -> Iterator[Tuple[str, str, object]]:
+        """
+        按文件顺序产生解析事件
+
+        Yields:
+            ("value", 顶层键, 值)：data以外的顶层字段
+            ("table", 表名, None)：data中一个表开始
+            ("columns", 表名, 列名)：列式布局的表的列名
+            ("record", 表名, 记录)：表中的一条记录（列式布局时为值列表）
+            ("end", "data", None)：data结束，之后的顶层字段不属于任何表
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+        else:
+            while True:
+                key = self._decode_key()
+                self.keys.append(key)
+                if key == "data":
+                    yield from self._data_events()
+                    yield ("end", key, None)
+                else:
+                    yield ("value", key, self._decode())
+                if self._separator("}"):
+                    break
+        if self._peek() is not None:
+            self._fail("文档结束后还有多余内容")
+
+    def _data_events(self) -> Iterator[Tuple[str, str, object]]:
+        """逐表逐条解析data"""
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+        while True:
+            table_name = self._decode_key()
+            yield ("table", table_name, None)
+            if self._peek() == "{":
+                yield from self._columnar_events(table_name)
+            else:
+                self._expect("[")
+                yield from self._array_events(table_name)
+            if self._separator("}"):
+                return
+
+    def _columnar_events(self, table_name: str) -> Iterator[Tuple[str, str, object]]:
+        """解析列式布局的表：{"columns": 列名, "rows": 值数组}"""
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+        while True:
+            key = self._decode_key()
+            if key == "rows":
+                self._expect("[")
+                yield from self._array_events(table_name)
+            else:
+                value = self._decode()
+                if key == "columns":
+                    yield ("columns", table_name, value)
+            if self._separator("}"):
+                return
+
+    def _array_events(self, table_name: str) -> Iterator[Tuple[str, str, object]]:
+        """逐条解析数组元素（开头的"["已读取）"""
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield ("record", table_name, self._decode())
+            if self._separator("]"):
+                return
+
+    def _decode_key(self) -> str:
+        """解析对象的键和冒号"""
+        if self._peek() != '"':
+            self._fail("期望字符串键")
+        key = self._decode()
+        self._expect(":")
+        return key
+
+    def _decode(self):
+        """
+        解析一个值；缓冲中的内容不完整时继续读取
+
+        值之后必须还有字符（或已到文件末尾），避免把被块边界截断的数字当作完整的值。
+        """
+        self._peek()
+        size = self.CHUNK_SIZE
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self._buffer, self._position)
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    self._fail(e.msg)
+            # 单个值跨越多个块时，每次多读一倍，避免反复从头解析
+            self._fill(size)
+            size *= 2
+
+    def _expect(self, char: str):
+        """跳过空白后读取指定的结构字符"""
+        if self._next() != char:
+            self._position -= 1
+            self._fail(f"期望'{char}'")
+
+    def _separator(self, close: str) -> bool:
+        """读取值之间的逗号或结束符，遇到结束符时返回True"""
+        char = self._next()
+        if char == close:
+            return True
+        if char != ",":
+            self._position -= 1
+            self._fail(f"期望','或'{close}'")
+        return False
+
+    def _next(self) -> Optional[str]:
+        """跳过空白后读取一个字符"""
+        char = self._peek()
+        if char is None:
+            self._fail("文档不完整")
+        self._position += 1
+        return char
+
+    def _peek(self) -> Optional[str]:
+        """跳过空白，返回下一个字符（不消费）；文件结束时返回None"""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in self.WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._eof:
+                return None
+            self._fill(self.CHUNK_SIZE)
+
+    def _fill(self, size: int):
+        """丢弃已解析的内容并读取下一块"""
+        chunk = self.fp.read(size)
+        self._consumed += self._position
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        if not chunk:
+            self._eof = True
+
+    def _fail(self, message: str):
+        raise ValueError(f"JSON格式错误: {message}（字符位置 {self._consumed + self._position}）")
+
+
+class JsonlShardWriter:
+    """
+    训练语料JSONL分片写出器
+
+    每行一个紧凑JSON对象：每个煤矿先写一行煤矿信息
+    {"type": "mine", "mine_info": ..., "statistics": ...}，
+    再按表顺序每条记录一行 {"type": "record", "mine_id": ..., "table": ..., "record": ...}。
+    每个分片附带一个.idx偏移文件（小端uint64，第i个值为第i行的起始字节），
+    index.json记录每个煤矿、每个表所在的分片和起始行号，
+    加载时可直接定位到任一煤矿或任一条记录，无需解析整个语料。
+    """
+
+    # 索引文件名
+    INDEX_FILE = "index.json"
+
+    # 索引格式版本
+    FORMAT_VERSION = "1.0.0"
+
+    def __init__(self, output_dir: Union[str, Path], shard_size: int = 100000):
+        """
+        初始化写出器
+
+        Args:
+            output_dir: 输出目录
+            shard_size: 每个分片的最大行数；同一煤矿的行总在同一分片中，
+                        单个煤矿超过该行数时独占一个分片
+        """
+        if shard_size < 1:
+            raise ValueError("shard_size必须大于0")
+        self.output_dir = Path(output_dir)
+        self.shard_size = shard_size
+        self.shards: List[Dict] = []
+        self.mines: List[Dict] = []
+        self._fp = None
+        self._offsets = array('Q')
+        self._position = 0
+        self._mine = None
+        self._mine_start = 0
+        self._table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def begin_mine(self, mine_name: str, mine_info: Dict, statistics: Dict):
+        """开始写一个煤矿，写出煤矿信息行"""
+        if self._mine is not None:
+            raise RuntimeError("上一个煤矿尚未结束")
+        # 当前分片放不下该煤矿时切换到新分片
+        lines = 1 + sum(statistics.values())
+        if self._fp is None or (self._offsets and len(self._offsets) + lines > self.shard_size):
+            self._open_shard()
+        self._mine = {
+            "mine_name": mine_name,
+            "mine_id": mine_info.get("mine_id"),
+            "shard": len(self.shards) - 1,
+            "line": len(self._offsets),
+            "statistics": statistics,
+            "tables": {}
+        }
+        self._mine_start = self._position
+        self._write_line({"type": "mine", "mine_info": mine_info, "statistics": statistics})
+
+    def begin_table(self, table_name: str):
+        """开始写当前煤矿的一个表"""
+        self._table = table_name
+        self._mine["tables"][table_name] = {"line": len(self._offsets), "count": 0}
+
+    def write_records(self, records: List[Dict]):
+        """写入当前表的一批记录"""
+        mine_id = self._mine["mine_id"]
+        for record in records:
+            self._write_line({"type": "record", "mine_id": mine_id,
+                              "table": self._table, "record": record})
+        self._mine["tables"][self._table]["count"] += len(records)
+
+    def end_mine(self):
+        """结束当前煤矿"""
+        self.mines.append(self._mine)
+        self._mine = None
+
+    def abort_mine(self):
+        """放弃当前煤矿：截断已写出的行，分片恢复到该煤矿开始前的状态"""
+        if self._mine is None:
+            return
+        del self._offsets[self._mine["line"]:]
+        self._fp.seek(self._mine_start)
+        self._fp.truncate()
+        self._position = self._mine_start
+        self._mine = None
+
+    def close(self):
+        """关闭当前分片并写出index.json"""
+        self.abort_mine()
+        self._close_shard()
+        index = {
+            "format": "mine-jsonl-shards",
+            "version": self.FORMAT_VERSION,
+            "shard_size": self.shard_size,
+            "shards": self.shards,
+            "mines": self.mines
+        }
+        with open(self.output_dir / self.INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+
+    def _open_shard(self):
+        """关闭当前分片，开始一个新分片"""
+        self._close_shard()
+        name = f"shard-{len(self.shards):05d}"
+        self.shards.append({"file": f"{name}.jsonl", "offsets": f"{name}.idx", "lines": 0, "bytes": 0})
+        self._fp = open(self.output_dir / f"{name}.jsonl", 'wb')
+        self._offsets = array('Q')
+        self._position = 0
+
+    def _close_shard(self):
+        """写出当前分片的行偏移文件"""
+        if self._fp is None:
+            return
+        self._fp.close()
+        self._fp = None
+        shard = self.shards[-1]
+        shard["lines"] = len(self._offsets)
+        shard["bytes"] = self._position
+        offsets = array('Q', self._offsets)
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        with open(self.output_dir / shard["offsets"], 'wb') as f:
+            offsets.tofile(f)
+
+    def _write_line(self, obj: Dict):
+        """写出一行，并记录行起始偏移"""
+        line = (json.dumps(obj, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        self._offsets.append(self._position)
+        self._fp.write(line)
+        self._position += len(line)
+
+
+class JsonlShardReader:
+    """JSONL分片随机读取器：按index.json和.idx偏移文件直接定位行"""
+
+    def __init__(self, shard_dir: Union[str, Path]):
+        """
+        初始化读取器
+
+        Args:
+            shard_dir: JsonlShardWriter的输出目录
+        """
+        self.shard_dir = Path(shard_dir)
+        with open(self.shard_dir / JsonlShardWriter.INDEX_FILE, 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.mines = {mine["mine_name"]: mine for mine in self.index["mines"]}
+        self._offsets: Dict[int, array] = {}
+
+    def mine(self, mine_name: str) -> Dict:
+        """读取煤矿信息行"""
+        entry = self.mines[mine_name]
+        return self._read_line(entry["shard"], entry["line"])
+
+    def record(self, mine_name: str, table_name: str, position: int) -> Dict:
+        """读取煤矿某个表的第position条记录"""
+        entry = self.mines[mine_name]
+        table = entry["tables"][table_name]
+        if not 0 <= position < table["count"]:
+            raise IndexError(f"{table_name}只有{table['count']}条记录")
+        return self._read_line(entry["shard"], table["line"] + position)["record"]
+
+    def records(self, mine_name: str, table_name: str) -> Iterator[Dict]:
+        """按顺序读取煤矿某个表的全部记录"""
+        entry = self.mines[mine_name]
+        table = entry["tables"][table_name]
+        if not table["count"]:
+            return
+        shard = self.index["shards"][entry["shard"]]
+        with open(self.shard_dir / shard["file"], 'rb') as f:
+            f.seek(self._shard_offsets(entry["shard"])[table["line"]])
+            for _ in range(table["count"]):
+                yield json.loads(f.readline())["record"]
+
+    def _read_line(self, shard_no: int, line_no: int) -> Dict:
+        """读取分片中的某一行"""
+        shard = self.index["shards"][shard_no]
+        with open(self.shard_dir / shard["file"], 'rb') as f:
+            f.seek(self._shard_offsets(shard_no)[line_no])
+            return json.loads(f.readline())
+
+    def _shard_offsets(self, shard_no: int) -> array:
+        """加载（并缓存）分片的行偏移"""
+        if shard_no not in self._offsets:
+            offsets = array('Q')
+            with open(self.shard_dir / self.index["shards"][shard_no]["offsets"], 'rb') as f:
+                offsets.frombytes(f.read())
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+            self._offsets[shard_no] = offsets
+        return self._offsets[shard_no]
@@ -0,0 +1,208 @@
+"""
+转换与验证性能指标 - MineMetrics
+按煤矿、按表记录耗时、行/秒、读取字节、峰值内存，以及CSV读取时
+命中的编码/解析方式和失败的尝试次数；可输出到文本报告和JSON指标文件
+
+版本: 1.0.0
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+
+class MineMetrics:
+    """性能指标收集器（ToJson和Validator开启instrument时使用）"""
+
+    # 指标文件格式版本
+    FORMAT_VERSION = "1.0.0"
+
+    def __init__(self, trace_memory: bool = True):
+        """
+        初始化收集器
+
+        Args:
+            trace_memory: 用tracemalloc统计峰值内存（Python和numpy分配），会带来一定开销
+        """
+        self.trace_memory = trace_memory
+        # 煤矿名称 → 指标
+        self.mines: Dict[str, Dict] = {}
+        self._peaks: Dict[str, int] = {}
+
+    @contextmanager
+    def track_mine(self, mine_name: str, stage: Optional[str] = None, reset: bool = True) -> Iterator[Dict]:
+        """
+        统计一个煤矿的总耗时和峰值内存
+
+        Args:
+            mine_name: 煤矿名称
+            stage: 同时把耗时计入该阶段（如Validator的各验证方法）
+            reset: 清除该煤矿之前的指标；为False时累加（同一煤矿的多个验证方法）
+
+        Yields:
+            该煤矿的指标字典
+        """
+        if reset:
+            self.mines.pop(mine_name, None)
+        entry = self.mine(mine_name)
+        started_tracing = self._start_memory()
+        self._peaks[mine_name] = 0
+        self._reset_peak(mine_name)
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            seconds = time.perf_counter() - start
+            entry["seconds"] += seconds
+            if stage:
+                entry["stages"][stage] = entry["stages"].get(stage, 0.0) + seconds
+            self._reset_peak(mine_name)
+            peak = self._peaks.pop(mine_name)
+            if self.trace_memory:
+                entry["peak_memory_mb"] = max(entry["peak_memory_mb"] or 0, self._mb(peak))
+            if started_tracing:
+                tracemalloc.stop()
+            self._finish(entry)
+            for table in entry["tables"].values():
+                self._finish(table)
+
+    @contextmanager
+    def stage(self, mine_name: str, stage: str, table_cn: Optional[str] = None):
+        """
+        统计一个阶段（如read、records、write）的耗时，累加到煤矿和表的stages中；
+        指定表时同时统计该表的峰值内存
+        """
+        entry = self.mine(mine_name)
+        table = self.table(mine_name, table_cn) if table_cn else None
+        if table is not None:
+            self._reset_peak(mine_name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            entry["stages"][stage] = entry["stages"].get(stage, 0.0) + seconds
+            if table is not None:
+                table["seconds"] += seconds
+                table["stages"][stage] = table["stages"].get(stage, 0.0) + seconds
+                peak = self._reset_peak(mine_name)
+                if peak is not None:
+                    table["peak_memory_mb"] = max(table["peak_memory_mb"] or 0, self._mb(peak))
+
+    def record_table(self, mine_name: str, table_cn: str, rows: int, read_info: Optional[Dict] = None):
+        """
+        记录一个表的行数和读取情况
+
+        Args:
+            mine_name: 煤矿名称
+            table_cn: 中文表名
+            rows: 记录数
+            read_info: MineTableSource.read_info中该表的读取情况
+        """
+        table = self.table(mine_name, table_cn)
+        table["rows"] = rows
+        # 命中缓存时保留首次读取的编码和尝试次数
+        if read_info and not (read_info.get("cached") and table["read"]):
+            table["bytes"] = read_info.get("bytes", 0)
+            table["read"] = {k: read_info[k] for k in ("encoding", "quoting", "sniffed", "failed_attempts", "cached")
+                             if k in read_info}
+        entry = self.mine(mine_name)
+        entry["rows"] = sum(t["rows"] for t in entry["tables"].values())
+        entry["bytes"] = sum(t["bytes"] for t in entry["tables"].values())
+
+    def merge(self, mine_name: str, entry: Dict):
+        """合并其他进程收集的煤矿指标（并行批量转换时使用）"""
+        self.mines[mine_name] = entry
+
+    def mine(self, mine_name: str) -> Dict:
+        """煤矿的指标字典（不存在时创建）"""
+        if mine_name not in self.mines:
+            self.mines[mine_name] = {
+                "seconds": 0.0, "rows": 0, "bytes": 0, "rows_per_s": None,
+                "peak_memory_mb": None, "stages": {}, "tables": {}
+            }
+        return self.mines[mine_name]
+
+    def table(self, mine_name: str, table_cn: str) -> Dict:
+        """表的指标字典（不存在时创建）"""
+        tables = self.mine(mine_name)["tables"]
+        if table_cn not in tables:
+            tables[table_cn] = {
+                "seconds": 0.0, "rows": 0, "bytes": 0, "rows_per_s": None,
+                "peak_memory_mb": None, "stages": {}, "read": {}
+            }
+        return tables[table_cn]
+
+    def report_lines(self, mine_name: str) -> List[str]:
+        """煤矿指标的文本报告行"""
+        entry = self.mines.get(mine_name)
+        if entry is None:
+            return []
+        size = f"读取 {entry['bytes'] / 1024:.1f}KB, " if entry["bytes"] else ""
+        lines = [f"   ⏱️ 耗时: {entry['seconds']:.3f}s, {self._rate(entry)}, {size}峰值内存 {self._memory(entry)}"]
+        if entry["stages"]:
+            lines.append("      阶段: " + ", ".join(f"{k} {v:.3f}s" for k, v in entry["stages"].items()))
+        for table_cn, table in entry["tables"].items():
+            read = table["read"]
+            if not read:
+                how = ""
+            elif read.get("cached"):
+                how = " (缓存)"
+            else:
+                failed = f", 失败尝试{read['failed_attempts']}次" if read["failed_attempts"] else ""
+                how = f" ({read['encoding']}/{read['quoting']}{failed})"
+            lines.append(f"      {table_cn}: {table['rows']}行, {table['seconds']:.3f}s, "
+                         f"{self._rate(table)}, 峰值内存 {self._memory(table)}{how}")
+        return lines
+
+    def to_dict(self) -> Dict:
+        """结构化指标"""
+        return {
+            "format": "mine-metrics",
+            "version": self.FORMAT_VERSION,
+            "mines": self.mines
+        }
+
+    def save(self, path: Union[str, Path]):
+        """写出JSON指标文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def _start_memory(self) -> bool:
+        """需要时开启tracemalloc，返回是否由本次开启"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            return True
+        return False
+
+    def _reset_peak(self, mine_name: str) -> Optional[int]:
+        """读取并重置峰值内存，同时更新煤矿的峰值；未统计内存时返回None"""
+        if not (self.trace_memory and tracemalloc.is_tracing()):
+            return None
+        peak = tracemalloc.get_traced_memory()[1]
+        if mine_name in self._peaks:
+            self._peaks[mine_name] = max(self._peaks[mine_name], peak)
+        tracemalloc.reset_peak()
+        return peak
+
+    @staticmethod
+    def _finish(entry: Dict):
+        """计算行/秒，耗时保留到毫秒以下"""
+        entry["rows_per_s"] = round(entry["rows"] / entry["seconds"], 1) if entry["rows"] and entry["seconds"] else None
+        entry["seconds"] = round(entry["seconds"], 4)
+        entry["stages"] = {k: round(v, 4) for k, v in entry["stages"].items()}
+
+    @staticmethod
+    def _mb(size: int) -> float:
+        return round(size / 1024 / 1024, 2)
+
+    @staticmethod
+    def _rate(entry: Dict) -> str:
+        return f"{entry['rows_per_s']:,.0f} 行/s" if entry["rows_per_s"] else "- 行/s"
+
+    @staticmethod
+    def _memory(entry: Dict) -> str:
+        return f"{entry['peak_memory_mb']:.1f}MB" if entry["peak_memory_mb"] is not None else "-"
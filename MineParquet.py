@@ -0,0 +1,255 @@
+"""
+煤矿数据集列式输出 - MineParquet
+每个表写为一个按mine_id分区的Parquet数据集（<英文表名>/mine_id=<ID>/part-0.parquet），
+列类型取自Schema；跨煤矿分析时只读需要的列，也可读回mine_info/statistics/data嵌套结构
+
+需要pyarrow（可选依赖）: pip install pyarrow
+
+版本: 1.0.0
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖，只有列式输出需要
+    pa = ds = pq = None
+
+from MineSchema import MineSchema
+from MineTableSource import MineTableSource
+
+
+def require_pyarrow():
+    """未安装pyarrow时给出安装提示"""
+    if pa is None:
+        raise ImportError("Parquet输出需要安装pyarrow: pip install pyarrow")
+
+
+class ParquetDatasetWriter:
+    """按mine_id分区写出各表的Parquet数据集"""
+
+    # 煤矿信息数据集的目录名
+    MINE_INFO_TABLE = "mine_info"
+
+    # 分区字段
+    PARTITION = "mine_id"
+
+    # 每个分区的文件名
+    PART_FILE = "part-0.parquet"
+
+    # decimal/boolean字段中无法按类型表示的原文（如"面宽￥124￥m"）写入"<字段>_text"列
+    TEXT_SUFFIX = "_text"
+
+    # 文件元数据中记录原始列顺序等信息的键
+    METADATA_KEY = b"mine_dataset"
+
+    def __init__(self, output_dir: Union[str, Path], schema: MineSchema):
+        """
+        初始化写出器
+
+        Args:
+            output_dir: 输出目录，每个表一个子目录
+            schema: Schema，决定各列的Parquet类型
+        """
+        require_pyarrow()
+        self.output_dir = Path(output_dir)
+        self.schema = schema
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def partition_path(cls, dataset_dir: Path, table_en: str, mine_id: str) -> Path:
+        """某个表中一个煤矿的分区文件（分区值按URI编码，与pyarrow的hive分区一致）"""
+        return Path(dataset_dir) / table_en / f"{cls.PARTITION}={quote(mine_id, safe='')}" / cls.PART_FILE
+
+    def write_mine(self, mine_info: Dict, tables: Dict[str, pd.DataFrame]):
+        """
+        写出一个煤矿：先删除该煤矿已有的分区，再逐表写出
+
+        Args:
+            mine_info: 煤矿信息（mine_id作为分区值）
+            tables: {中文表名: 按Schema规范化和转换类型后的DataFrame}；没有列的表不写出
+
+        Raises:
+            ValueError: 该mine_id的分区已属于另一个煤矿（名称不同），不覆盖
+        """
+        mine_id = str(mine_info["mine_id"])
+        info_file = self.partition_path(self.output_dir, self.MINE_INFO_TABLE, mine_id)
+        if info_file.exists():
+            existing = pq.ParquetFile(info_file).read(columns=["mine_name"]).column("mine_name")[0].as_py()
+            if existing != str(mine_info.get("mine_name")):
+                raise ValueError(f"mine_id {mine_id}已属于煤矿{existing}，不覆盖其数据")
+        self.remove_mine(mine_id)
+        for table_cn, df in tables.items():
+            if len(df.columns) == 0:
+                continue
+            self._write(MineTableSource.TABLE_MAPPING[table_cn], mine_id, self.to_arrow(table_cn, df))
+        info = pa.table({key: pa.array([str(value)], type=pa.string()) for key, value in mine_info.items()})
+        self._write(self.MINE_INFO_TABLE, mine_id, info)
+
+    def remove_mine(self, mine_id: str):
+        """删除煤矿在各表中的分区（重新导出时覆盖）"""
+        for table_en in [self.MINE_INFO_TABLE, *MineTableSource.TABLE_MAPPING.values()]:
+            shutil.rmtree(self.partition_path(self.output_dir, table_en, mine_id).parent, ignore_errors=True)
+
+    def to_arrow(self, table_cn: str, df: pd.DataFrame) -> "pa.Table":
+        """
+        按Schema类型把DataFrame转换为Arrow表
+
+        - string字段和Schema外的列: string
+        - decimal: float64，"<字段>_masked": bool
+        - boolean: bool
+        - 多值字段: list<string>
+        decimal和boolean字段中不符合类型的原文写入"<字段>_text"列（string），
+        保证各煤矿同一个表的列类型一致，跨煤矿扫描时不需要合并类型。
+
+        Args:
+            table_cn: 中文表名
+            df: 按Schema规范化和转换类型后的DataFrame
+
+        Returns:
+            Arrow表，元数据中记录原始列顺序
+        """
+        field_types = self.schema.field_types(table_cn)
+        names, arrays = [], []
+        for name in df.columns:
+            column = df[name]
+            field_type = field_types.get(name)
+            base = name[:-len(MineSchema.MASKED_SUFFIX)] if name.endswith(MineSchema.MASKED_SUFFIX) else None
+            if field_type in ("decimal", "boolean"):
+                value, text = self._split_typed(column, field_type)
+                names += [name, name + self.TEXT_SUFFIX]
+                arrays += [value, text]
+            elif base is not None and field_types.get(base) == "decimal":
+                names.append(name)
+                arrays.append(pa.array(column.astype(object).where(column.notna(), None), type=pa.bool_()))
+            elif name in self.schema.multi_value_fields:
+                names.append(name)
+                arrays.append(pa.array(column.astype(object).where(column.notna(), None).tolist(),
+                                       type=pa.list_(pa.string())))
+            else:
+                names.append(name)
+                arrays.append(self._strings(column))
+        metadata = {self.METADATA_KEY: json.dumps({"table": table_cn, "columns": [str(c) for c in df.columns]},
+                                                  ensure_ascii=False).encode('utf-8')}
+        return pa.Table.from_arrays(arrays, names=[str(n) for n in names]).replace_schema_metadata(metadata)
+
+    @staticmethod
+    def _strings(column: pd.Series) -> "pa.Array":
+        """非空值转为字符串"""
+        present = column.notna()
+        values = column.astype(object).where(present, None)
+        if not values[present].map(type).eq(str).all():
+            values = values.where(~present, values.astype(str))
+        return pa.array(values.tolist(), type=pa.string())
+
+    @classmethod
+    def _split_typed(cls, column: pd.Series, field_type: str):
+        """把decimal/boolean列拆为类型列和不符合类型的原文列"""
+        arrow_type = pa.float64() if field_type == "decimal" else pa.bool_()
+        if field_type == "decimal" and pd.api.types.is_numeric_dtype(column.dtype) \
+                and not pd.api.types.is_bool_dtype(column.dtype):
+            return pa.array(column.to_numpy(dtype=float, na_value=np.nan), type=arrow_type, from_pandas=True), \
+                pa.nulls(len(column), type=pa.string())
+        if field_type == "boolean" and str(column.dtype) == "boolean":
+            return pa.array(column, type=arrow_type), pa.nulls(len(column), type=pa.string())
+
+        values = column.astype(object).where(column.notna(), None)
+        if field_type == "decimal":
+            fits = values.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)))
+        else:
+            fits = values.map(lambda v: isinstance(v, (bool, np.bool_)))
+        typed = values.where(fits, None)
+        text = values.where(~fits & values.notna(), None)
+        return pa.array(typed.tolist(), type=arrow_type), cls._strings(text)
+
+    def _write(self, table_en: str, mine_id: str, table: "pa.Table"):
+        """写出一个分区文件"""
+        path = self.partition_path(self.output_dir, table_en, mine_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, path)
+
+
+class ParquetDatasetReader:
+    """读取ParquetDatasetWriter写出的数据集"""
+
+    def __init__(self, dataset_dir: Union[str, Path]):
+        """
+        初始化读取器
+
+        Args:
+            dataset_dir: 数据集目录（export_parquet的输出目录）
+        """
+        require_pyarrow()
+        self.dataset_dir = Path(dataset_dir)
+
+    def mines(self) -> Dict[str, str]:
+        """数据集中的煤矿：{mine_id: 煤矿名称}"""
+        info = self.scan(ParquetDatasetWriter.MINE_INFO_TABLE, columns=["mine_id", "mine_name"]).to_pydict()
+        return dict(zip(info["mine_id"], info["mine_name"]))
+
+    def scan(self, table_en: str, columns: Optional[List[str]] = None, filter=None) -> "pa.Table":
+        """
+        跨煤矿读取一个表（只读取需要的列和分区）
+
+        Args:
+            table_en: 英文表名（如"goaf_gas_info"）
+            columns: 需要的列，为None时读取全部列
+            filter: pyarrow.dataset表达式，如ds.field("mine_id") == "HX001"
+
+        Returns:
+            Arrow表；mine_id取自分区目录，始终为字符串
+        """
+        # 显式声明分区类型，全数字的mine_id（如"140100"）不会被推断为整数而与文件中的列冲突
+        partitioning = ds.partitioning(pa.schema([(ParquetDatasetWriter.PARTITION, pa.string())]), flavor="hive")
+        dataset = ds.dataset(self.dataset_dir / table_en, format="parquet", partitioning=partitioning)
+        return dataset.to_table(columns=columns, filter=filter)
+
+    def read_mine(self, mine_id: str) -> Dict:
+        """
+        读回一个煤矿的嵌套结构，与ToJson(typed=True, normalize=True)的转换结果一致
+
+        Schema外的列按字符串读回。
+
+        Args:
+            mine_id: 煤矿ID
+
+        Returns:
+            {"mine_info": ..., "statistics": ..., "data": ...}
+        """
+        info_file = ParquetDatasetWriter.partition_path(self.dataset_dir, ParquetDatasetWriter.MINE_INFO_TABLE,
+                                                        mine_id)
+        if not info_file.exists():
+            raise KeyError(f"数据集中没有煤矿: {mine_id}")
+        mine_info = pq.ParquetFile(info_file).read().to_pylist()[0]
+
+        result = {"mine_info": mine_info, "statistics": {}, "data": {}}
+        for table_en in MineTableSource.TABLE_MAPPING.values():
+            path = ParquetDatasetWriter.partition_path(self.dataset_dir, table_en, mine_id)
+            records = self._read_records(path) if path.exists() else []
+            result["data"][table_en] = records
+            result["statistics"][table_en] = len(records)
+        return result
+
+    @staticmethod
+    def _read_records(path: Path) -> List[Dict]:
+        """读取一个分区文件，按原始列顺序还原记录，"<字段>_text"中的原文放回原字段"""
+        table = pq.ParquetFile(path).read()
+        columns = json.loads(table.schema.metadata[ParquetDatasetWriter.METADATA_KEY])["columns"]
+        text_fields = [c for c in columns if c + ParquetDatasetWriter.TEXT_SUFFIX in table.column_names]
+        records = []
+        for row in table.to_pylist():
+            for field in text_fields:
+                text = row[field + ParquetDatasetWriter.TEXT_SUFFIX]
+                if text is not None:
+                    row[field] = text
+            records.append({c: row[c] for c in columns})
+        return records
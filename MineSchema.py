@@ -0,0 +1,343 @@
+"""
+数据集Schema访问层 - MineSchema
+读取 煤矿采空区普查数据集Schema.json，按表提供字段类型、主键、外键等定义，
+并据此生成CSV读取用的dtype映射和类型转换
+
+版本: 1.0.0
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+class MineSchema:
+    """煤矿采空区普查数据集Schema"""
+
+    # 默认Schema文件
+    DEFAULT_PATH = Path(__file__).parent / "煤矿采空区普查数据集Schema.json"
+
+    # 布尔字段的取值（比较前统一去空格、转小写）
+    TRUE_VALUES = {"是", "true", "1", "yes", "y"}
+    FALSE_VALUES = {"否", "false", "0", "no", "n"}
+
+    # 低基数字段：读取为category，节省内存
+    CATEGORICAL_FIELDS = {
+        "gas_type", "concentration_unit", "area_unit", "water_volume_unit", "volume_unit",
+        "mining_method", "water_type", "reliability", "verification_status",
+        "detection_method", "monitoring_method", "fire_status", "seal_status",
+        "shaft_type", "collapse_status", "status", "acceptance_status", "treatment_status"
+    }
+
+    # 多值分隔符：Schema约定的+号，样例数据中也有用逗号分隔的情况
+    MULTI_VALUE_SEPARATOR = r"(?:\s*[+,，]\s*)+"
+
+    # 外键单元格中多个ID的分隔符（Schema约定的+号，以及样例数据中的逗号）
+    REFERENCE_SEPARATOR = r"\s*[+,，]\s*"
+
+    # 脱敏符号
+    MASK_MARK = "￥"
+
+    # 脱敏数值：整个单元格为"￥数字￥"
+    MASKED_NUMBER = r"^\s*￥\s*([-+]?(?:\d+\.?\d*|\.\d+))\s*￥\s*$"
+
+    # 脱敏标记列的后缀
+    MASKED_SUFFIX = "_masked"
+
+    # 单位换算表：标准单位 → {写法: 换算到标准单位的系数}（写法比较前去空格、转小写）
+    UNIT_FACTORS = {
+        "m²": {"m²": 1, "m2": 1, "平方米": 1, "km²": 1e6, "km2": 1e6, "平方公里": 1e6,
+               "万m²": 1e4, "万m2": 1e4, "万平方米": 1e4, "公顷": 1e4, "ha": 1e4, "hm²": 1e4, "hm2": 1e4},
+        "m³": {"m³": 1, "m3": 1, "立方米": 1, "万m³": 1e4, "万m3": 1e4, "万立方米": 1e4},
+        "%": {"%": 1, "ppm": 1e-4},
+        "m": {"m": 1, "米": 1, "km": 1e3, "cm": 1e-2, "mm": 1e-3}
+    }
+
+    def __init__(self, schema_path: Optional[str] = None):
+        """
+        初始化Schema
+
+        Args:
+            schema_path: Schema文件路径，默认使用工具目录下的Schema
+        """
+        self.path = Path(schema_path) if schema_path else self.DEFAULT_PATH
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.schema = json.load(f)
+
+        # 构建表定义字典
+        self.tables = {table['table_id']: table for table in self.schema['tables']}
+        self.table_name_map = {table['table_name']: table for table in self.schema['tables']}
+
+        # usage_notes中列出的多值字段（如"coal_seam: 3-1+5-2"）
+        self.multi_value_fields = self._parse_multi_value_fields()
+
+        # 各表的数值/单位字段对
+        self.unit_pairs = {table['table_name']: self._find_unit_pairs(table) for table in self.schema['tables']}
+
+    def table(self, table_cn: str) -> Optional[Dict]:
+        """按中文表名返回表定义"""
+        return self.table_name_map.get(table_cn)
+
+    def fields(self, table_cn: str) -> List[Dict]:
+        """按中文表名返回字段定义列表，未知表返回空列表"""
+        table = self.table(table_cn)
+        return table['fields'] if table else []
+
+    def primary_key(self, table_cn: str) -> Optional[str]:
+        """表的主键字段，未定义时返回None"""
+        table = self.table(table_cn)
+        return table.get('primary_key') if table else None
+
+    def references(self) -> List[Tuple[str, str, str]]:
+        """
+        外键关系：字段标记了foreign_key，或父表的relationships中声明了外键，
+        引用以该字段为主键的表
+
+        Returns:
+            [(子表, 外键字段, 被引用表)]，均为中文表名，按Schema中子表的顺序
+        """
+        owners = {}
+        for table in self.schema['tables']:
+            if table.get('primary_key'):
+                owners.setdefault(table['primary_key'], table['table_name'])
+        declared = {}
+        for table in self.schema['tables']:
+            for relation in table.get('relationships', []):
+                child = self.tables.get(relation.get('target_table'))
+                if child and relation.get('foreign_key'):
+                    declared.setdefault(child['table_name'], []).append((relation['foreign_key'], table['table_name']))
+
+        references = []
+        for table in self.schema['tables']:
+            child_cn = table['table_name']
+            candidates = [(field['name'], owners.get(field['name'])) for field in table['fields']
+                          if field.get('foreign_key')]
+            for field, parent_cn in candidates + declared.get(child_cn, []):
+                reference = (child_cn, field, parent_cn)
+                if parent_cn and parent_cn != child_cn and reference not in references:
+                    references.append(reference)
+        return references
+
+    @classmethod
+    def split_references(cls, value) -> List[str]:
+        """
+        外键单元格中引用的ID（如"HX001-G001,HX001-G002"拆为两个ID）
+
+        Args:
+            value: 单元格的值；已拆分的列表按每一项处理，空值返回空列表
+        """
+        if value is None:
+            return []
+        items = value if isinstance(value, list) else re.split(cls.REFERENCE_SEPARATOR, str(value))
+        return [item for item in (str(item).strip() for item in items if item is not None) if item]
+
+    def field_types(self, table_cn: str) -> Dict[str, str]:
+        """字段名 → Schema类型（string / decimal / boolean）"""
+        return {field['name']: field['type'] for field in self.fields(table_cn)}
+
+    def read_dtypes(self, table_cn: str) -> Dict[str, str]:
+        """
+        生成read_csv的dtype映射，跳过pandas的类型推断
+
+        所有Schema字段先按字符串读取（低基数字段用category），
+        decimal和boolean再由apply_types统一转换，避免"￥298￥"、"3-1"等值被误推断。
+
+        Args:
+            table_cn: 中文表名
+
+        Returns:
+            {字段名: dtype}
+        """
+        return {
+            name: "category" if name in self.CATEGORICAL_FIELDS else "str"
+            for name in self.field_types(table_cn)
+        }
+
+    def apply_types(self, table_cn: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        按Schema类型转换decimal和boolean字段（按列向量化，返回新的DataFrame）
+
+        - decimal: 能解析为数字的值转为float，不能解析的值（如脱敏值"￥298￥"）保留原文
+        - boolean: 是/否、true/false、1/0等转为True/False，其他值保留原文
+
+        Args:
+            table_cn: 中文表名
+            df: 按read_dtypes读取的DataFrame
+
+        Returns:
+            转换后的DataFrame
+        """
+        converted = {}
+        for name, field_type in self.field_types(table_cn).items():
+            if name not in df.columns:
+                continue
+            column = df[name]
+            if field_type == "decimal":
+                converted[name] = self._to_decimal(column)
+            elif field_type == "boolean":
+                converted[name] = self._to_boolean(column)
+        if not converted:
+            return df
+        return df.assign(**converted)
+
+    @staticmethod
+    def _to_decimal(column: pd.Series) -> pd.Series:
+        """数字转为float，其余非空值保留原文"""
+        # 整列都是整数时to_numeric得到int64，统一为float，输出类型不随有无空值变化
+        numbers = pd.to_numeric(column, errors='coerce').astype(float)
+        if numbers.notna().sum() == column.notna().sum():
+            return numbers
+        return numbers.astype(object).where(numbers.notna(), column.astype(object))
+
+    @classmethod
+    def _to_boolean(cls, column: pd.Series) -> pd.Series:
+        """布尔取值转为True/False，其余非空值保留原文"""
+        normalized = column.astype(object).where(column.isna(), column.astype(str).str.strip().str.lower())
+        mapping = {value: True for value in cls.TRUE_VALUES}
+        mapping.update({value: False for value in cls.FALSE_VALUES})
+        flags = normalized.map(mapping)
+        if flags.notna().sum() == column.notna().sum():
+            return flags.astype("boolean")
+        return flags.astype(object).where(flags.notna(), column.astype(object))
+
+    def normalize(self, table_cn: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        规范化脱敏值和多值字段（按列向量化，返回新的DataFrame）
+
+        - decimal: "￥298￥"拆为数值298和脱敏标记，标记写入紧随其后的"<字段>_masked"列
+          （含￥为True、不含为False、空值为None）；普通数字转为float，
+          "面宽￥124￥m"等无法解析的值保留原文（标记仍为True）
+        - 多值字段: "3-1+5-2"展开为["3-1", "5-2"]，单个值也输出为列表
+
+        Args:
+            table_cn: 中文表名
+            df: 按read_dtypes读取的DataFrame
+
+        Returns:
+            规范化后的DataFrame
+        """
+        field_types = self.field_types(table_cn)
+        columns = {}
+        for name in df.columns:
+            column = df[name]
+            if field_types.get(name) == "decimal":
+                value, masked = self._split_masked(column)
+                columns[name] = value
+                columns[name + self.MASKED_SUFFIX] = masked
+            elif name in self.multi_value_fields:
+                columns[name] = self._split_multi_value(column)
+            else:
+                columns[name] = column
+        return pd.DataFrame(columns, index=df.index)
+
+    def _parse_multi_value_fields(self) -> set:
+        """从usage_notes.multi_value_separator的示例中提取多值字段名"""
+        note = self.schema.get('usage_notes', {}).get('multi_value_separator', '')
+        known = {field['name'] for table in self.schema['tables'] for field in table['fields']}
+        return {name for name in re.findall(r"([A-Za-z_][A-Za-z0-9_]*)\s*:", note) if name in known}
+
+    @classmethod
+    def _split_masked(cls, column: pd.Series):
+        """拆分脱敏标记和数值（数值为float）"""
+        present = column.notna()
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            masked = pd.Series(False, index=column.index, dtype="boolean").where(present)
+            return column.astype(float), masked
+
+        text = column.astype(object).where(present).astype(str)
+        masked_number = text.str.extract(cls.MASKED_NUMBER, expand=False)
+        # 与_to_decimal相同，数值统一为float（不随列中有无空值在int/float之间变化）
+        numbers = pd.to_numeric(
+            masked_number.where(masked_number.notna(), text.str.strip()).where(present), errors='coerce'
+        ).astype(float)
+        masked = text.str.contains(cls.MASK_MARK, regex=False)
+
+        if numbers.notna().sum() == present.sum():
+            value = numbers
+        else:
+            value = numbers.astype(object).where(numbers.notna(), column.astype(object))
+        return value, masked.astype("boolean").where(present)
+
+    @classmethod
+    def _split_multi_value(cls, column: pd.Series) -> pd.Series:
+        """多值字段展开为列表，空值保持为空"""
+        present = column.notna()
+        text = column[present].astype(str).str.replace(
+            f"^{cls.MULTI_VALUE_SEPARATOR}|{cls.MULTI_VALUE_SEPARATOR}$|^\\s+|\\s+$", "", regex=True
+        )
+        parts = text.str.split(cls.MULTI_VALUE_SEPARATOR, regex=True)
+        return parts.reindex(column.index).astype(object).where(present, None)
+
+    def convert_units(self, table_cn: str, df: pd.DataFrame
+                      ) -> Tuple[pd.DataFrame, Dict[str, List[str]], Dict[str, int]]:
+        """
+        按数值/单位字段对把数值换算到Schema的默认单位（按列向量化）
+
+        单位为空或已知的数值行乘以换算系数，单位列改写为标准单位；
+        单位未知或数值无法解析（如未经normalize的脱敏原文"￥298￥"）的行保持原值和原单位。
+        单位需要换算而数值无法解析的行按字段计数返回，供报告列出。
+
+        Args:
+            table_cn: 中文表名
+            df: 表数据
+
+        Returns:
+            (换算后的DataFrame, {数值字段: [未知单位]}, {数值字段: 无法解析而未换算的行数})
+        """
+        converted = {}
+        unknown = {}
+        unparsed = {}
+        for value_name, unit_name, canonical in self.unit_pairs.get(table_cn, []):
+            if value_name not in df.columns or unit_name not in df.columns:
+                continue
+            factors = {alias.lower(): factor for alias, factor in self.UNIT_FACTORS[canonical].items()}
+            values, units = df[value_name], df[unit_name]
+
+            unit_key = units.astype(object).where(units.notna(), "").astype(str).str.strip().str.lower()
+            factor = unit_key.map(factors).where(unit_key != "", 1.0).astype(float)
+            numbers = pd.to_numeric(values, errors='coerce')
+
+            unknown_units = units[values.notna() & (unit_key != "") & factor.isna()]
+            if len(unknown_units):
+                unknown[value_name] = sorted(unknown_units.astype(str).str.strip().unique().tolist())
+            skipped = int((values.notna() & numbers.isna() & factor.notna() & (factor != 1)).sum())
+            if skipped:
+                unparsed[value_name] = skipped
+
+            # 小于1的系数改为除法（ppm → %），避免594 * 1e-4这类浮点误差
+            scaled = numbers.where(factor >= 1, numbers / (1 / factor)).where(factor < 1, numbers * factor)
+            done = numbers.notna() & factor.notna()
+            if not done.any():
+                continue
+            if done.sum() == values.notna().sum():
+                converted[value_name] = scaled.where(done)
+            else:
+                converted[value_name] = values.astype(object).where(~done, scaled.astype(object))
+            converted[unit_name] = units.astype(object).where(~done, canonical)
+        if not converted:
+            return df, unknown, unparsed
+        return df.assign(**converted), unknown, unparsed
+
+    def _find_unit_pairs(self, table: Dict) -> List[Tuple[str, str, str]]:
+        """
+        找出表中的数值/单位字段对：单位字段以_unit结尾并有default_value，
+        对应默认单位相同的decimal字段（有多个时取名称前缀匹配的）
+
+        Returns:
+            [(数值字段, 单位字段, 标准单位)]
+        """
+        pairs = []
+        for unit_field in table['fields']:
+            canonical = unit_field.get('default_value')
+            if not unit_field['name'].endswith('_unit') or canonical not in self.UNIT_FACTORS:
+                continue
+            candidates = [field['name'] for field in table['fields']
+                          if field['type'] == "decimal" and field.get('default_unit') == canonical]
+            prefix = unit_field['name'][:-len('_unit')]
+            preferred = [name for name in candidates if name.startswith(prefix) or name.endswith(prefix)]
+            if preferred or len(candidates) == 1:
+                pairs.append(((preferred or candidates)[0], unit_field['name'], canonical))
+        return pairs
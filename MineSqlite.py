@@ -0,0 +1,240 @@
+"""
+煤矿数据集SQLite输出 - MineSqlite
+把多个煤矿的十个表批量写入同一个SQLite数据库，跨煤矿直接用SQL查询；
+表结构和列类型取自Schema，每个表以mine_id列区分煤矿，主键和外键字段建立索引；
+按煤矿覆盖写入：在一个事务中先删除该煤矿已有的数据，再分批executemany插入
+
+版本: 1.0.0
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import pandas as pd
+
+from MineSchema import MineSchema
+from MineTableSource import MineTableSource
+
+
+class SqliteDatasetWriter:
+    """按煤矿写入SQLite数据库"""
+
+    # 煤矿信息表
+    MINE_INFO_TABLE = "mine_info"
+
+    # 区分煤矿的列（各表的第一列）
+    MINE_COLUMN = "mine_id"
+
+    # 每次executemany插入的行数
+    BATCH_ROWS = 50000
+
+    # Schema类型 → SQLite列类型
+    COLUMN_TYPES = {"string": "TEXT", "decimal": "REAL", "boolean": "INTEGER"}
+
+    # decimal/boolean字段中无法按类型表示的原文（如"面宽￥124￥m"）写入"<字段>_text"列
+    TEXT_SUFFIX = "_text"
+
+    # 多值字段（normalize后为列表）写回时的分隔符
+    MULTI_VALUE_JOINER = "+"
+
+    def __init__(self, db_path: Union[str, Path], schema: MineSchema):
+        """
+        打开（或创建）数据库，按Schema建表和索引
+
+        Args:
+            db_path: 数据库文件路径，已存在时在原有数据上按煤矿覆盖写入
+            schema: Schema，决定各表的列和类型
+        """
+        self.db_path = Path(db_path)
+        self.schema = schema
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        # 英文表名 → 已有的列
+        self._columns: Dict[str, List[str]] = {}
+        self._create_tables()
+
+    def __enter__(self) -> "SqliteDatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def table_columns(self, table_cn: str) -> List[Tuple[str, str]]:
+        """
+        表的列定义：mine_id列在前，其后按Schema字段顺序
+
+        - string: TEXT
+        - decimal: REAL，另有"<字段>_masked"（INTEGER，0/1）和"<字段>_text"（TEXT）
+        - boolean: INTEGER（0/1），另有"<字段>_text"（TEXT）
+
+        Returns:
+            [(列名, SQLite类型)]
+        """
+        columns = [(self.MINE_COLUMN, "TEXT NOT NULL")]
+        for name, field_type in self.schema.field_types(table_cn).items():
+            if name == self.MINE_COLUMN:
+                continue
+            columns.append((name, self.COLUMN_TYPES.get(field_type, "TEXT")))
+            if field_type == "decimal":
+                columns.append((name + MineSchema.MASKED_SUFFIX, "INTEGER"))
+            if field_type in ("decimal", "boolean"):
+                columns.append((name + self.TEXT_SUFFIX, "TEXT"))
+        return columns
+
+    def write_mine(self, mine_info: Dict, tables: Dict[str, pd.DataFrame]):
+        """
+        写入一个煤矿：删除该煤矿已有的数据后插入，整个煤矿在一个事务中完成，
+        中途失败时数据库保持写入前的状态
+
+        Args:
+            mine_info: 煤矿信息（mine_id作为各表mine_id列的值）
+            tables: {中文表名: 按Schema规范化和转换类型后的DataFrame}
+
+        Raises:
+            ValueError: 该mine_id已属于另一个煤矿（名称不同），不覆盖
+        """
+        mine_id = str(mine_info[self.MINE_COLUMN])
+        existing = self.mines().get(mine_id)
+        if existing is not None and existing != str(mine_info.get("mine_name")):
+            raise ValueError(f"mine_id {mine_id}已属于煤矿{existing}，不覆盖其数据")
+        try:
+            with self.conn:
+                self._delete(mine_id)
+                for table_cn, df in tables.items():
+                    if len(df) and len(df.columns):
+                        self._insert_table(MineTableSource.TABLE_MAPPING[table_cn], table_cn, mine_id, df)
+                info = {key: str(value) for key, value in mine_info.items()}
+                info[self.MINE_COLUMN] = mine_id
+                self._insert(self.MINE_INFO_TABLE, list(info), [tuple(info.values())])
+        except BaseException:
+            # 回滚后新增的列也被撤销，重新读取列信息
+            self._load_columns()
+            raise
+
+    def remove_mine(self, mine_id: str):
+        """删除一个煤矿的全部数据"""
+        with self.conn:
+            self._delete(str(mine_id))
+
+    def mines(self) -> Dict[str, str]:
+        """数据库中的煤矿：{mine_id: 煤矿名称}"""
+        rows = self.conn.execute(
+            f'SELECT {self._quote(self.MINE_COLUMN)}, mine_name FROM {self.MINE_INFO_TABLE} ORDER BY 1'
+        ).fetchall()
+        return dict(rows)
+
+    def _create_tables(self):
+        """建表，并为mine_id、主键和外键字段建立索引（已存在时跳过）"""
+        keys = {table_cn: [field] for table_cn, field, _ in self.schema.references()}
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.MINE_INFO_TABLE} "
+                              f"({self._quote(self.MINE_COLUMN)} TEXT PRIMARY KEY, mine_name TEXT)")
+            for table_cn, table_en in MineTableSource.TABLE_MAPPING.items():
+                definition = ", ".join(f"{self._quote(name)} {column_type}"
+                                       for name, column_type in self.table_columns(table_cn))
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self._quote(table_en)} ({definition})")
+                self._create_index(table_en, [self.MINE_COLUMN])
+                # 主键和外键在各煤矿内唯一/有效，索引带上mine_id，按ID查询和关联时都可使用
+                primary_key = self.schema.primary_key(table_cn)
+                for field in ([primary_key] if primary_key else []) + keys.get(table_cn, []):
+                    self._create_index(table_en, [field, self.MINE_COLUMN])
+        self._load_columns()
+
+    def _create_index(self, table_en: str, fields: List[str]):
+        name = self._quote(f"idx_{table_en}_{fields[0]}")
+        columns = ", ".join(self._quote(field) for field in fields)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {self._quote(table_en)} ({columns})")
+
+    def _load_columns(self):
+        """读取各表已有的列"""
+        for table_en in [self.MINE_INFO_TABLE, *MineTableSource.TABLE_MAPPING.values()]:
+            self._columns[table_en] = [row[1] for row in
+                                       self.conn.execute(f"PRAGMA table_info({self._quote(table_en)})")]
+
+    def _ensure_columns(self, table_en: str, names: List[str]):
+        """Schema外的列按TEXT添加到表中"""
+        existing = self._columns[table_en]
+        for name in names:
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE {self._quote(table_en)} ADD COLUMN {self._quote(name)} TEXT")
+                existing.append(name)
+
+    def _delete(self, mine_id: str):
+        for table_en in [self.MINE_INFO_TABLE, *MineTableSource.TABLE_MAPPING.values()]:
+            self.conn.execute(f"DELETE FROM {self._quote(table_en)} WHERE {self._quote(self.MINE_COLUMN)} = ?",
+                              (mine_id,))
+
+    def _insert_table(self, table_en: str, table_cn: str, mine_id: str, df: pd.DataFrame):
+        """分批把DataFrame转换为行并插入"""
+        for start in range(0, len(df), self.BATCH_ROWS):
+            batch = df.iloc[start:start + self.BATCH_ROWS]
+            names, columns = self._to_columns(table_cn, batch)
+            # 只有mine_id列的表没有其他列，行数取自DataFrame
+            rows = zip([mine_id] * len(batch), *columns)
+            self._insert(table_en, [self.MINE_COLUMN, *names], rows)
+
+    def _insert(self, table_en: str, names: List[str], rows):
+        self._ensure_columns(table_en, names)
+        columns = ", ".join(self._quote(name) for name in names)
+        placeholders = ", ".join("?" * len(names))
+        self.conn.executemany(f"INSERT INTO {self._quote(table_en)} ({columns}) VALUES ({placeholders})", rows)
+
+    def _to_columns(self, table_cn: str, df: pd.DataFrame) -> Tuple[List[str], List[List]]:
+        """
+        按Schema类型把DataFrame的列转换为SQLite值列表
+
+        Returns:
+            (列名, 各列的值列表)；全部为空的"<字段>_text"列不写入
+        """
+        field_types = self.schema.field_types(table_cn)
+        names, columns = [], []
+        for name in df.columns:
+            if name == self.MINE_COLUMN:
+                continue
+            values = self._python_values(df[name])
+            field_type = field_types.get(name)
+            if field_type in ("decimal", "boolean"):
+                typed, text = self._split_typed(values, field_type)
+                names.append(name)
+                columns.append(typed)
+                if any(value is not None for value in text):
+                    names.append(name + self.TEXT_SUFFIX)
+                    columns.append(text)
+                continue
+            if name in self.schema.multi_value_fields:
+                values = [self.MULTI_VALUE_JOINER.join(map(str, value)) if isinstance(value, list) else value
+                          for value in values]
+            names.append(str(name))
+            columns.append(values)
+        return names, columns
+
+    @staticmethod
+    def _python_values(column: pd.Series) -> List:
+        """列转为Python原生值列表，空值为None"""
+        values = column.to_numpy(dtype=object)
+        mask = column.isna().to_numpy()
+        if mask.any():
+            values = values.copy()
+            values[mask] = None
+        return values.tolist()
+
+    @staticmethod
+    def _split_typed(values: List, field_type: str) -> Tuple[List, List]:
+        """把decimal/boolean列拆为类型值和不符合类型的原文"""
+        if field_type == "decimal":
+            fits = [type(value) in (int, float) for value in values]
+        else:
+            fits = [type(value) is bool for value in values]
+        typed = [value if fit else None for value, fit in zip(values, fits)]
+        text = [None if fit or value is None else str(value) for value, fit in zip(values, fits)]
+        return typed, text
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        """SQL标识符加引号"""
+        return '"' + str(name).replace('"', '""') + '"'
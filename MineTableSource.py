@@ -0,0 +1,414 @@
+"""
+煤矿CSV表读取层 - MineTableSource
+ToJson和Validator共用的CSV读取组件：统一编码探测和解析方式，
+并在一次运行中按文件缓存解析结果，保证每个文件只解析一次
+
+版本: 1.0.0
+"""
+
+import pandas as pd
+import codecs
+import csv
+import io
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Mapping, Optional, Tuple, Union
+
+
+class MineTableSource:
+    """煤矿CSV表读取器（带解析结果缓存）"""
+
+    # 表名映射（中文 → 英文）
+    TABLE_MAPPING = {
+        "采空区基本信息": "goaf_basic_info",
+        "采空区积水信息": "goaf_water_info",
+        "采空区积气信息": "goaf_gas_info",
+        "自燃发火信息": "fire_info",
+        "采空区悬顶信息": "suspended_roof_info",
+        "采空区塌陷信息": "collapse_info",
+        "地裂缝信息": "crack_info",
+        "废弃井筒信息": "abandoned_shaft_info",
+        "密闭墙信息": "seal_wall_info",
+        "采空区治理信息": "treatment_info"
+    }
+
+    # 候选编码（按优先级）
+    ENCODINGS = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030']
+
+    # 编码/格式探测时读取的文件前缀字节数
+    SNIFF_BYTES = 64 * 1024
+
+    # 两种解析方式：QUOTE_ALL处理字段中的逗号；失败时不使用quoting
+    QUOTED_OPTIONS = {"quoting": csv.QUOTE_ALL, "skipinitialspace": True}
+    PLAIN_OPTIONS = {}
+
+    # 探测结果缓存（进程内共享）：(路径, mtime, 大小) → (编码, 解析参数)
+    _format_cache: Dict[Tuple[str, int, int], Tuple[str, Dict]] = {}
+
+    def __init__(self, data_dir: str = "."):
+        """
+        初始化读取器
+
+        Args:
+            data_dir: CSV文件所在目录
+        """
+        self.data_dir = Path(data_dir)
+        # 解析结果缓存：(煤矿名称, 表名) → (文件标识, dtype标识, DataFrame)
+        self._frames: Dict[Tuple[str, str], Tuple[Tuple[str, int, int], Optional[Tuple], pd.DataFrame]] = {}
+        # 目录索引：煤矿名称 → {中文表名: 文件路径}，首次使用时扫描
+        self._index: Optional[Dict[str, Dict[str, Path]]] = None
+        self._index_mtime: Optional[int] = None
+        # 扫描时无法匹配到已知表的CSV文件名
+        self.unmatched_files: List[str] = []
+        # 最近一次读取各表的情况：(煤矿名称, 表名) → {编码、解析方式、尝试次数、字节数、是否命中缓存}
+        self.read_info: Dict[Tuple[str, str], Dict] = {}
+        self._last_attempts: Dict = {}
+
+    @classmethod
+    def parse_file_name(cls, file_name: str) -> Optional[Tuple[str, str]]:
+        """
+        按"{煤矿名称}-{表名}.csv"规则解析文件名
+
+        Args:
+            file_name: 文件名
+
+        Returns:
+            (煤矿名称, 中文表名)；不符合规则或表名未知时返回None
+        """
+        if not file_name.endswith('.csv'):
+            return None
+        # 表名中不含"-"，从最后一个"-"拆分，煤矿名称中可以包含"-"
+        mine_name, sep, table_cn = file_name[:-len('.csv')].rpartition('-')
+        if not sep or not mine_name or table_cn not in cls.TABLE_MAPPING:
+            return None
+        return mine_name, table_cn
+
+    def refresh(self):
+        """重新扫描目录（一次列目录），按煤矿和表分组CSV文件"""
+        index: Dict[str, Dict[str, Path]] = {}
+        unmatched = []
+        try:
+            self._index_mtime = self.data_dir.stat().st_mtime_ns
+            with os.scandir(self.data_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.csv') or not entry.is_file():
+                        continue
+                    parsed = self.parse_file_name(entry.name)
+                    if parsed is None:
+                        unmatched.append(entry.name)
+                        continue
+                    mine_name, table_cn = parsed
+                    index.setdefault(mine_name, {})[table_cn] = Path(entry.path)
+        except FileNotFoundError:
+            self._index_mtime = None
+        self._index = index
+        self.unmatched_files = sorted(unmatched)
+
+    def ensure_fresh(self):
+        """目录内容有增删时（目录mtime变化）重新扫描，否则只需一次stat"""
+        if self._index is None:
+            self.refresh()
+            return
+        try:
+            mtime = self.data_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._index_mtime:
+            self.refresh()
+
+    def mines(self) -> List[str]:
+        """目录中至少有一个已知表的煤矿（已排序）"""
+        if self._index is None:
+            self.refresh()
+        return sorted(self._index)
+
+    def mine_tables(self, mine_name: str) -> Dict[str, Path]:
+        """煤矿已有的表：{中文表名: 文件路径}"""
+        if self._index is None:
+            self.refresh()
+        return self._index.get(mine_name, {})
+
+    def table_path(self, mine_name: str, table_cn: str) -> Path:
+        """返回煤矿某个表的CSV文件路径"""
+        return self.data_dir / f"{mine_name}-{table_cn}.csv"
+
+    def has_table(self, mine_name: str, table_cn: str) -> bool:
+        """煤矿的某个表是否存在（查目录索引，不逐个stat）"""
+        return table_cn in self.mine_tables(mine_name)
+
+    def load(self, mine_name: str, table_cn: str,
+             dtype: Optional[Union[str, Dict[str, str]]] = None) -> pd.DataFrame:
+        """
+        读取煤矿的某个表，同一文件未变化时直接返回缓存的DataFrame
+
+        返回的DataFrame可能被多个调用方共享，调用方不应原地修改。
+
+        Args:
+            mine_name: 煤矿名称
+            table_cn: 中文表名
+            dtype: 按列指定的dtype（如MineSchema.read_dtypes），或所有列统一的dtype（如"str"），
+                   为None时由pandas推断
+
+        Returns:
+            DataFrame
+        """
+        file_path = self.table_path(mine_name, table_cn)
+        key = self._file_key(file_path)
+        dtype_key = tuple(sorted(dtype.items())) if isinstance(dtype, dict) else dtype
+
+        cached = self._frames.get((mine_name, table_cn))
+        if cached is not None and cached[0] == key and cached[1] == dtype_key:
+            self.read_info[(mine_name, table_cn)] = dict(self.read_info.get((mine_name, table_cn), {}), cached=True)
+            return cached[2]
+
+        df = self._read_csv(file_path, key, dtype)
+        self._frames[(mine_name, table_cn)] = (key, dtype_key, df)
+        self.read_info[(mine_name, table_cn)] = dict(self._last_attempts, bytes=key[2], cached=False)
+        return df
+
+    def evict(self, mine_name: Optional[str] = None, table_cn: Optional[str] = None):
+        """
+        释放缓存的DataFrame
+
+        Args:
+            mine_name: 煤矿名称，为None时释放全部
+            table_cn: 中文表名，为None时释放该煤矿的所有表
+        """
+        if mine_name is None:
+            self._frames.clear()
+            self.read_info.clear()
+            return
+        for cache_key in [k for k in self._frames if k[0] == mine_name and table_cn in (None, k[1])]:
+            del self._frames[cache_key]
+        for cache_key in [k for k in self.read_info if k[0] == mine_name and table_cn in (None, k[1])]:
+            del self.read_info[cache_key]
+
+    def _file_key(self, file_path: Path) -> Tuple[str, int, int]:
+        """文件标识：(绝对路径, mtime, 大小)"""
+        stat = file_path.stat()
+        return (str(file_path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+    def _read_csv(self, file_path: Path, key: Tuple[str, int, int],
+                  dtype: Optional[Union[str, Dict[str, str]]] = None) -> pd.DataFrame:
+        """
+        读取CSV：先探测编码和解析方式，再只解析一次
+
+        Args:
+            file_path: CSV文件路径
+            key: 文件标识
+            dtype: 按列指定的dtype
+
+        Returns:
+            DataFrame
+        """
+        decision = self._format_cache.get(key)
+        sniffed = decision is None
+        if sniffed:
+            decision = self._sniff_format(file_path)
+
+        # 探测只看前缀，前缀之后才出现的编码错误等情况按候选顺序兜底；
+        # 只有read_csv按QUOTE_ALL解析确实失败时才不使用quoting，先尝试探测到的编码
+        encodings = [decision[0]] + [e for e in self.ENCODINGS if e != decision[0]]
+        candidates = [decision] + [
+            (encoding, options)
+            for encoding in encodings
+            for options in (self.QUOTED_OPTIONS, self.PLAIN_OPTIONS)
+            if (encoding, options) != decision
+        ]
+        for failed, (encoding, options) in enumerate(candidates):
+            try:
+                df = pd.read_csv(self._csv_input(file_path), encoding=encoding, on_bad_lines='skip',
+                                 dtype=dtype, **options)
+            except (UnicodeDecodeError, pd.errors.ParserError):
+                continue
+            self._format_cache[key] = (encoding, options)
+            self._last_attempts = {
+                "encoding": encoding,
+                "quoting": "QUOTE_ALL" if options == self.QUOTED_OPTIONS else "plain",
+                "sniffed": sniffed,
+                "failed_attempts": failed
+            }
+            return df
+
+        raise Exception("无法读取文件，尝试了多种编码和解析方式")
+
+    def _csv_input(self, file_path: Path):
+        """传给read_csv的输入（磁盘文件直接传路径）"""
+        return file_path
+
+    def _open_binary(self, file_path: Path) -> BinaryIO:
+        """以二进制方式打开表数据"""
+        return open(file_path, 'rb')
+
+    def _sniff_format(self, file_path: Path) -> Tuple[str, Dict]:
+        """
+        根据文件前缀探测编码，解析方式总是先用QUOTE_ALL
+
+        不按前缀预判是否需要不使用quoting：pandas按QUOTE_ALL解析时能容忍
+        "ab"c这类不严格的字段，预判会让这类文件丢掉skipinitialspace，
+        字段开头保留空格；只有read_csv实际失败时才由_read_csv换用PLAIN_OPTIONS。
+
+        Args:
+            file_path: CSV文件路径
+
+        Returns:
+            (编码, read_csv解析参数)
+        """
+        with self._open_binary(file_path) as f:
+            prefix = f.read(self.SNIFF_BYTES)
+            truncated = bool(f.read(1))
+
+        encoding, _ = self._sniff_encoding(prefix, truncated)
+        return encoding, self.QUOTED_OPTIONS
+
+    def _sniff_encoding(self, prefix: bytes, truncated: bool) -> Tuple[str, Optional[str]]:
+        """
+        依次尝试候选编码解码文件前缀
+
+        Args:
+            prefix: 文件前缀字节
+            truncated: 前缀之后是否还有内容
+
+        Returns:
+            (编码, 解码后的文本)；均无法解码时文本为None
+        """
+        if prefix.startswith(codecs.BOM_UTF8):
+            encodings = ['utf-8-sig']
+        else:
+            encodings = [e for e in self.ENCODINGS if e != 'utf-8-sig']
+
+        for encoding in encodings:
+            # 增量解码：前缀末尾被截断的多字节字符不视为错误
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                return encoding, decoder.decode(prefix, final=not truncated)
+            except UnicodeDecodeError:
+                continue
+        return self.ENCODINGS[0], None
+
+
+# 内存中的表数据：bytes、memoryview，或带getbuffer()/read()的文件对象（如Streamlit的UploadedFile）
+BufferLike = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class _MemoryReader(io.RawIOBase):
+    """只读的内存视图读取器：readinto直接从memoryview复制到调用方缓冲，不复制整个文件"""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self._view) - self._position)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+class MineBufferSource(MineTableSource):
+    """
+    内存CSV表读取器：直接解析上传的文件内容，不落盘
+
+    与MineTableSource接口一致，可直接交给ToJson和Validator使用；
+    每个实例只持有自己的数据和探测结果，多个会话同时转换互不影响。
+    """
+
+    def __init__(self, buffers: Mapping[str, Mapping[str, BufferLike]]):
+        """
+        初始化读取器
+
+        Args:
+            buffers: {煤矿名称: {中文表名: 表数据}}；表数据可以是bytes、memoryview，
+                     或带getbuffer()/read()的文件对象
+        """
+        super().__init__(".")
+        # 探测结果只缓存在实例内，不写入进程共享的缓存
+        self._format_cache = {}
+        self._views: Dict[str, memoryview] = {}
+        for mine_name, tables in buffers.items():
+            for table_cn, data in tables.items():
+                if table_cn not in self.TABLE_MAPPING:
+                    raise ValueError(f"未知的表名: {table_cn}")
+                self._views[self.table_path(mine_name, table_cn).name] = self.as_view(data)
+
+    @classmethod
+    def from_files(cls, files: List[BinaryIO]) -> "MineBufferSource":
+        """
+        按"{煤矿名称}-{表名}.csv"文件名分组上传的文件对象
+
+        Args:
+            files: 带name属性的文件对象列表
+
+        Returns:
+            读取器；无法匹配到已知表的文件名记录在unmatched_files中
+        """
+        buffers: Dict[str, Dict[str, BinaryIO]] = {}
+        unmatched = []
+        for file in files:
+            parsed = cls.parse_file_name(Path(file.name).name)
+            if parsed is None:
+                unmatched.append(file.name)
+                continue
+            mine_name, table_cn = parsed
+            buffers.setdefault(mine_name, {})[table_cn] = file
+        source = cls(buffers)
+        source.unmatched_files = sorted(unmatched)
+        return source
+
+    def refresh(self):
+        """按内存中的表建立索引"""
+        index: Dict[str, Dict[str, Path]] = {}
+        for file_name in self._views:
+            mine_name, table_cn = self.parse_file_name(file_name)
+            index.setdefault(mine_name, {})[table_cn] = Path(file_name)
+        self._index = index
+
+    def ensure_fresh(self):
+        """内存数据不会变化，只在首次使用时建立索引"""
+        if self._index is None:
+            self.refresh()
+
+    def table_path(self, mine_name: str, table_cn: str) -> Path:
+        """表的虚拟文件名（用于索引和缓存）"""
+        return Path(f"{mine_name}-{table_cn}.csv")
+
+    @staticmethod
+    def as_view(data: BufferLike) -> memoryview:
+        """取得表数据的只读字节视图，能取到底层缓冲时不复制"""
+        if hasattr(data, 'getbuffer'):
+            data = data.getbuffer()
+        elif hasattr(data, 'read'):
+            data = data.read()
+        return memoryview(data).cast('B').toreadonly()
+
+    @classmethod
+    def open_view(cls, data: BufferLike) -> BinaryIO:
+        """把内存数据包装为二进制文件对象（按视图读取，不复制）"""
+        return io.BufferedReader(_MemoryReader(cls.as_view(data)))
+
+    def _file_key(self, file_path: Path) -> Tuple[str, int, int]:
+        """内存数据的标识：(虚拟文件名, 视图id, 字节数)"""
+        view = self._views[file_path.name]
+        return (file_path.name, id(view), view.nbytes)
+
+    def _csv_input(self, file_path: Path):
+        return io.BufferedReader(_MemoryReader(self._views[file_path.name]))
+
+    def _open_binary(self, file_path: Path) -> BinaryIO:
+        return io.BufferedReader(_MemoryReader(self._views[file_path.name]))
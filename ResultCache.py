@@ -0,0 +1,127 @@
+"""
+转换结果缓存 - ResultCache
+Web应用中按上传内容缓存转换结果：键为煤矿名称、转换选项和各表字节的哈希，
+按输出字节数限制总大小，超出时淘汰最久未使用的结果
+
+版本: 1.0.0
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from MineTableSource import MineBufferSource, BufferLike
+
+
+class ResultCache:
+    """按字节数限制大小的LRU转换结果缓存（线程安全，可在多个会话间共享）"""
+
+    # 默认容量：256MB
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存的输出总字节数上限；单个结果超过上限时不缓存
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Dict, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(mine_name: str, tables: Mapping[str, BufferLike], options: Optional[Dict] = None) -> str:
+        """
+        计算缓存键：煤矿名称、转换选项和各表内容的SHA-256
+
+        表内容按内存视图参与哈希，不复制；文件对象会被读取，
+        调用方应先用MineBufferSource.as_view取得视图，再用同一视图转换。
+
+        Args:
+            mine_name: 煤矿名称
+            tables: {中文表名: 表数据}
+            options: 影响输出的转换选项
+
+        Returns:
+            十六进制哈希字符串
+        """
+        digest = hashlib.sha256()
+        digest.update(mine_name.encode('utf-8'))
+        digest.update(repr(sorted((options or {}).items())).encode('utf-8'))
+        for table_cn in sorted(tables):
+            view = MineBufferSource.as_view(tables[table_cn])
+            digest.update(b"\0" + table_cn.encode('utf-8') + b"\0")
+            digest.update(len(view).to_bytes(8, 'little'))
+            digest.update(view)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        """
+        取出缓存的结果并标记为最近使用
+
+        Returns:
+            (结果字典, 输出字节)；未命中时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, result: Dict, data: bytes):
+        """
+        缓存一个结果，超出容量时淘汰最久未使用的结果
+
+        Args:
+            key: 缓存键
+            result: 结果字典（如convert_mine流式模式返回的mine_info和statistics）
+            data: 输出字节（如JSON文件内容）
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self._entries[key] = (result, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def get_or_create(self, key: str, create: Callable[[], Tuple[Dict, bytes]]) -> Tuple[Dict, bytes]:
+        """
+        命中时返回缓存结果，否则调用create生成并缓存
+
+        create在锁外执行，不同键的转换可以并发；同一键并发未命中时会各自转换一次。
+
+        Args:
+            key: 缓存键
+            create: 生成(结果字典, 输出字节)的函数
+
+        Returns:
+            (结果字典, 输出字节)
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        result, data = create()
+        self.put(key, result, data)
+        return result, data
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
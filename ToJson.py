@@ -8,201 +8,1110 @@
 
 import pandas as pd
 import json
+import io
+import os
+import hashlib
+import zipfile
+import multiprocessing
+from contextlib import ExitStack, contextmanager, nullcontext
 from pathlib import Path
-from typing import Dict, List, Optional
-import glob
+from typing import Dict, IO, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from MineTableSource import MineTableSource, MineBufferSource, BufferLike
+from MineSchema import MineSchema
+from MineJson import (MineJsonWriter, JsonlShardWriter, COMPRESSION_SUFFIXES, check_compression,
+                      open_compressed, get_json_backend)
+from MineMetrics import MineMetrics
+from MineParquet import ParquetDatasetWriter, ParquetDatasetReader
+from MineSqlite import SqliteDatasetWriter
 
 class ToJson:
     """煤矿数据集转换器：CSV → JSON"""
     
     # 表名映射（中文 → 英文）
-    TABLE_MAPPING = {
-        "采空区基本信息": "goaf_basic_info",
-        "采空区积水信息": "goaf_water_info",
-        "采空区积气信息": "goaf_gas_info",
-        "自燃发火信息": "fire_info",
-        "采空区悬顶信息": "suspended_roof_info",
-        "采空区塌陷信息": "collapse_info",
-        "地裂缝信息": "crack_info",
-        "废弃井筒信息": "abandoned_shaft_info",
-        "密闭墙信息": "seal_wall_info",
-        "采空区治理信息": "treatment_info"
-    }
-    
-    def __init__(self, data_dir: str = "."):
+    TABLE_MAPPING = MineTableSource.TABLE_MAPPING
+    
+    # 转换器版本（写入增量转换清单，版本变化时全部重新转换）
+    VERSION = "1.0.0"
+    
+    # 增量转换清单文件名
+    MANIFEST_FILE = "转换清单.json"
+    
+    # 性能指标文件名（开启instrument时批量转换写入输出目录）
+    METRICS_FILE = "转换指标.json"
+    
+    # 批量转换进度文件名（每转换完一个煤矿追加一行，供断点续转）
+    CHECKPOINT_FILE = "转换进度.jsonl"
+    
+    # SQLite导出的数据库文件名（export_sqlite写入输出目录）
+    SQLITE_FILE = "采空区数据集.db"
+    
+    # 流式输出时每批转换的记录数
+    CHUNK_ROWS = 5000
+    
+    # ZIP转换的读取上限：压缩包内的CSV先按解压后大小检查再读入内存，防止上传的压缩炸弹占满内存
+    ZIP_MAX_FILES = 1000
+    ZIP_MAX_FILE_BYTES = 512 * 1024 * 1024
+    ZIP_MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024
+    
+    # 输出布局：records为每表一个记录数组，columnar为每表一个列名列表加值数组
+    LAYOUTS = ("records", "columnar")
+    
+    def __init__(self, data_dir: str = ".", table_source: Optional[MineTableSource] = None,
+                 schema_path: Optional[str] = None, typed: bool = False, normalize: bool = False,
+                 convert_units: bool = False, instrument: bool = False, compact: bool = False,
+                 layout: str = "records", compression: Optional[str] = None, json_backend: str = "auto"):
         """
         初始化转换器
         
         Args:
             data_dir: CSV文件所在目录
+            table_source: CSV表读取器，可与Validator共用以避免重复解析
+            schema_path: Schema文件路径，默认使用工具目录下的Schema
+            typed: 按Schema字段类型读取和输出：跳过pandas类型推断，string字段
+                   始终输出字符串，decimal输出数字，boolean输出true/false
+            normalize: 规范化脱敏值和多值字段："￥298￥"输出为298并增加
+                       "<字段>_masked"标记，"3-1+5-2"输出为["3-1", "5-2"]
+            convert_units: 按数值/单位字段对（如goaf_area/area_unit）把数值换算到
+                           Schema的默认单位，未知单位记入转换报告
+            instrument: 记录每个煤矿和每个表的耗时、行/秒、读取字节、峰值内存，
+                        以及CSV命中的编码/解析方式和失败的尝试次数（见self.metrics）；
+                        峰值内存用tracemalloc统计，会使转换变慢
+            compact: 输出不带缩进和空格的紧凑JSON
+            layout: "records"（默认）或"columnar"：每个表写为
+                    {"columns": [列名...], "rows": [[值...], ...]}，字段名不在每条记录中重复
+            compression: 输出压缩格式，None、"gzip"或"zstd"（需要zstandard），
+                         写出时边写边压缩，文件名追加.gz/.zst
+            json_backend: JSON编码后端，"auto"（默认，安装了orjson时使用orjson）、"json"或"orjson"；
+                          默认缩进格式下各后端的输出逐字节一致，紧凑格式的差异见MineJson.OrjsonBackend
         """
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"不支持的输出布局: {layout}（可选: {', '.join(self.LAYOUTS)}）")
+        check_compression(compression)
         self.data_dir = Path(data_dir)
+        self.table_source = table_source or MineTableSource(data_dir)
+        self.schema_path = Path(schema_path) if schema_path else MineSchema.DEFAULT_PATH
+        self.typed = typed
+        self.normalize = normalize
+        self.convert_units = convert_units
+        self.compact = compact
+        self.layout = layout
+        self.compression = compression
+        self.json_backend = get_json_backend(json_backend)
+        self._schema: Optional[MineSchema] = None
+        # 单位换算中遇到的未知单位：煤矿名称 → {中文表名: {数值字段: [单位]}}
+        self.unknown_units: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        # 单位需要换算但数值无法解析（如未规范化的脱敏原文）而未换算的行数：
+        # 煤矿名称 → {中文表名: {数值字段: 行数}}
+        self.unconverted_values: Dict[str, Dict[str, Dict[str, int]]] = {}
+        # 性能指标，未开启instrument时为None
+        self.metrics: Optional[MineMetrics] = MineMetrics() if instrument else None
+        # Schema外的列也按字符串读取（列式导出时各煤矿的列类型需要一致）
+        self._read_all_text = False
+    
+    @property
+    def options(self) -> Dict[str, object]:
+        """影响输出内容的转换选项（用于增量清单和结果缓存的键）"""
+        return {"typed": self.typed, "normalize": self.normalize, "convert_units": self.convert_units,
+                "compact": self.compact, "layout": self.layout, "compression": self.compression}
+    
+    @property
+    def file_suffix(self) -> str:
+        """输出文件后缀：.json，压缩时追加.gz/.zst"""
+        return ".json" + COMPRESSION_SUFFIXES.get(self.compression, "")
+    
+    def output_name(self, mine_name: str) -> str:
+        """煤矿的输出文件名"""
+        return f"{mine_name}-采空区数据集{self.file_suffix}"
+    
+    @property
+    def schema(self) -> MineSchema:
+        """Schema定义（首次使用时加载）"""
+        if self._schema is None:
+            self._schema = MineSchema(self.schema_path)
+        return self._schema
     
     def auto_detect_mines(self) -> List[str]:
         """
         自动检测目录中的煤矿
         
+        只列一次目录，按TABLE_MAPPING中的表名把"{煤矿名称}-{表名}.csv"分组，
+        有任一已知表的煤矿都会被检测到。
+        
         Returns:
             煤矿名称列表
         """
-        mines = set()
-        for csv_file in self.data_dir.glob("*-采空区*.csv"):
-            # 提取煤矿名称（文件名中第一个"-"之前的部分）
-            mine_name = csv_file.stem.split('-')[0]
-            mines.add(mine_name)
-        
-        return sorted(list(mines))
+        self.table_source.refresh()
+        unmatched = self.table_source.unmatched_files
+        if unmatched:
+            print(f"⚠️ {len(unmatched)} 个CSV文件无法匹配到已知表: {', '.join(unmatched)}")
+        return self.table_source.mines()
     
-    def convert_mine(self, mine_name: str, output_path: Optional[str] = None) -> Dict:
+    def convert_mine(self, mine_name: str, output_path: Optional[Union[str, IO]] = None,
+                     stream: bool = False) -> Dict:
         """
         转换单个煤矿的数据
         
         Args:
             mine_name: 煤矿名称（如"河西联办煤矿"、"盛博煤矿"）
-            output_path: 输出JSON文件路径，如果为None则只返回字典
+            output_path: 输出JSON文件路径（或二进制文件对象），如果为None则只返回字典
+            stream: 流式输出模式，逐表逐批写出记录，每个表写完即从读取器缓存中释放；
+                    输出与非流式模式逐字节一致，返回值不含data部分
+            
+        Returns:
+            完整的JSON数据字典（流式模式下只含mine_info和statistics）
+        """
+        if stream and output_path is None:
+            raise ValueError("流式输出模式需要指定output_path")
+        with self._track_mine(mine_name):
+            if not stream:
+                result = self._collect_mine(mine_name)
+                # 保存到文件
+                if output_path:
+                    with self._stage(mine_name, "write"), self._open_output(output_path) as f:
+                        f.write(self.json_backend.dumps(result, None if self.compact else MineJsonWriter.INDENT))
+                    self._print_saved(output_path)
+                return result
+            
+            with self._open_output(output_path) as f:
+                writer = MineJsonWriter(f, indent=None if self.compact else MineJsonWriter.INDENT,
+                                        backend=self.json_backend)
+                try:
+                    result = self._collect_mine(mine_name, writer)
+                except BaseException:
+                    writer.close()
+                    raise
+            self._print_saved(output_path)
+            return result
+    
+    def convert_mine_from_buffers(self, mine_name: str, tables: Dict[str, BufferLike],
+                                  output_path: Optional[Union[str, IO]] = None,
+                                  stream: bool = False) -> Dict:
+        """
+        从内存中的CSV内容转换单个煤矿（如Web上传的文件），不写临时文件
+        
+        转换在使用内存读取器的临时转换器上进行，不改动当前转换器的unknown_units等状态，
+        同一个转换器可在多个会话或线程间共用。
+        
+        Args:
+            mine_name: 煤矿名称
+            tables: {中文表名: 表数据}；表数据可以是bytes、memoryview，
+                    或带getbuffer()/read()的文件对象（如UploadedFile，按视图读取不复制）
+            output_path: 同convert_mine
+            stream: 同convert_mine
+            
+        Returns:
+            同convert_mine
+        """
+        return self._with_source(MineBufferSource({mine_name: tables})).convert_mine(
+            mine_name, output_path, stream=stream)
+    
+    def _with_source(self, table_source: MineTableSource, **options) -> "ToJson":
+        """使用另一个读取器的转换器，选项默认与当前相同（共享已加载的Schema）"""
+        converter = ToJson(table_source=table_source, schema_path=str(self.schema_path),
+                           **dict(self.options, json_backend=self.json_backend.name, **options))
+        converter._schema = self._schema
+        converter.metrics = self.metrics
+        return converter
+    
+    def _track_mine(self, mine_name: str):
+        """开启instrument时统计整个煤矿的指标，否则不做任何事"""
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.track_mine(mine_name)
+    
+    def _stage(self, mine_name: str, stage: str, table_cn: Optional[str] = None):
+        """开启instrument时统计一个阶段的耗时，否则不做任何事"""
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.stage(mine_name, stage, table_cn)
+    
+    def _collect_mine(self, mine_name: str, writer: Optional[MineJsonWriter] = None) -> Dict:
+        """
+        逐表读取并转换煤矿数据
+        
+        Args:
+            mine_name: 煤矿名称
+            writer: 流式写出器；为None时记录保存在返回的data中
             
         Returns:
-            完整的JSON数据字典
+            JSON数据字典（有writer时不含data部分）
         """
         # 初始化结果结构
         result = {
-            "mine_info": {
-                "mine_name": mine_name,
-                "survey_date": "",
-                "standard": "KAT 22.2-2024",
-                "data_version": "1.0.0"
-            },
-            "statistics": {},
-            "data": {}
+            "mine_info": self._new_mine_info(mine_name),
+            "statistics": {}
         }
+        if writer is None:
+            result["data"] = {}
         
         # 读取所有表
         mine_id = None
-        for table_cn, table_en in self.TABLE_MAPPING.items():
-            file_pattern = f"{mine_name}-{table_cn}.csv"
-            file_path = self.data_dir / file_pattern
+        self.unknown_units.pop(mine_name, None)
+        self.unconverted_values.pop(mine_name, None)
+        for table_cn, table_en, df in self._iter_tables(mine_name):
+            # 从第一个表获取mine_id
+            if mine_id is None:
+                mine_id = self._find_mine_id(df)
+                if mine_id is not None:
+                    result["mine_info"]["mine_id"] = mine_id
             
-            if file_path.exists():
-                try:
-                    # 尝试多种编码和解析方式
-                    df = None
-                    for encoding in ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'gb18030']:
-                        try:
-                            # 使用quoting参数处理字段中的逗号
-                            df = pd.read_csv(
-                                file_path,
-                                encoding=encoding,
-                                on_bad_lines='skip',
-                                quoting=1,  # QUOTE_ALL
-                                skipinitialspace=True
-                            )
-                            break
-                        except:
-                            try:
-                                # 如果失败，尝试不使用quoting
-                                df = pd.read_csv(
-                                    file_path,
-                                    encoding=encoding,
-                                    on_bad_lines='skip'
-                                )
-                                break
-                            except:
-                                continue
-
-                    if df is None:
-                        raise Exception("无法读取文件，尝试了多种编码和解析方式")
-
-                    # 从第一个表获取mine_id
-                    if mine_id is None and 'mine_id' in df.columns and len(df) > 0:
-                        mine_id = df['mine_id'].iloc[0]
-                        result["mine_info"]["mine_id"] = mine_id
-
-                    # 转换为字典列表，处理NaN值
-                    # 将NaN、NaT等转换为None（JSON中的null）
-                    records = df.replace({pd.NA: None, pd.NaT: None}).to_dict('records')
-                    # 再次确保NaN转为None
-                    records = [{k: (None if pd.isna(v) else v) for k, v in record.items()}
-                              for record in records]
-
-                    result["data"][table_en] = records
-                    result["statistics"][table_en] = len(records)
-
-                    print(f"  ✅ {table_cn}: {len(records)}条记录")
-
-                except Exception as e:
-                    print(f"  ⚠️ {table_cn}: 读取失败 - {e}")
-                    result["data"][table_en] = []
-                    result["statistics"][table_en] = 0
+            # 转换为字典列表，NaN、NaT等转换为None（JSON中的null）
+            columnar = self.layout == "columnar"
+            if writer is None:
+                with self._stage(mine_name, "records", table_cn):
+                    if columnar:
+                        result["data"][table_en] = {"columns": [str(c) for c in df.columns],
+                                                    "rows": self._frame_to_rows(df)}
+                    else:
+                        result["data"][table_en] = self._frame_to_records(df)
             else:
-                # 表不存在，记录为空
-                result["data"][table_en] = []
-                result["statistics"][table_en] = 0
+                # 流式模式下记录构建和写出交替进行，一并计入write
+                with self._stage(mine_name, "write", table_cn):
+                    writer.begin_table(table_en, [str(c) for c in df.columns] if columnar else None)
+                    for records in self._iter_record_chunks(df, rows=columnar):
+                        writer.write_records(records)
+                    writer.end_table()
+                # 流式模式下写完即释放该表的DataFrame，内存中不保留已写出的表
+                self.table_source.evict(mine_name, table_cn)
+            result["statistics"][table_en] = len(df)
         
         # 如果没有找到mine_id，使用煤矿名称生成
         if mine_id is None:
             result["mine_info"]["mine_id"] = self._generate_mine_id(mine_name)
         
-        # 保存到文件
-        if output_path:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-            print(f"✅ 已生成: {output_path}")
+        if writer is not None:
+            writer.finish(result["mine_info"], result["statistics"])
         
         return result
     
+    def _new_mine_info(self, mine_name: str) -> Dict:
+        """初始化mine_info（mine_id在读取表后补充）"""
+        return {
+            "mine_name": mine_name,
+            "survey_date": "",
+            "standard": "KAT 22.2-2024",
+            "data_version": "1.0.0"
+        }
+    
+    def _mine_info_from_tables(self, mine_name: str, tables: List[Tuple[str, str, pd.DataFrame]],
+                               generate_id: bool = True) -> Dict:
+        """
+        由已读取的各表构建mine_info（mine_id取第一个有mine_id的表）
+        
+        Args:
+            mine_name: 煤矿名称
+            tables: _iter_tables的结果
+            generate_id: 各表都没有mine_id时是否由煤矿名称生成；为False时抛出ValueError
+                         （按mine_id覆盖写入的导出不能使用生成的ID：名称前缀相同的煤矿会得到相同的ID）
+        """
+        mine_info = self._new_mine_info(mine_name)
+        mine_id = next((m for m in (self._find_mine_id(df) for _, _, df in tables) if m is not None), None)
+        if mine_id is None:
+            if not generate_id:
+                raise ValueError(f"{mine_name}的各表中都没有mine_id，无法按煤矿导出")
+            mine_id = self._generate_mine_id(mine_name)
+        mine_info["mine_id"] = mine_id
+        return mine_info
+    
+    def _find_mine_id(self, df: pd.DataFrame):
+        """从表中取mine_id，没有时返回None"""
+        if 'mine_id' in df.columns and len(df) > 0:
+            return df['mine_id'].iloc[0]
+        return None
+    
+    def _iter_tables(self, mine_name: str) -> Iterator[Tuple[str, str, pd.DataFrame]]:
+        """
+        按TABLE_MAPPING顺序逐表读取煤矿数据
+        
+        Args:
+            mine_name: 煤矿名称
+            
+        Yields:
+            (中文表名, 英文表名, DataFrame)；表不存在或读取失败时为空DataFrame
+        """
+        self.table_source.ensure_fresh()
+        for table_cn, table_en in self.TABLE_MAPPING.items():
+            df = None
+            if self.table_source.has_table(mine_name, table_cn):
+                try:
+                    with self._stage(mine_name, "read", table_cn):
+                        df = self._load_table(mine_name, table_cn)
+                    if self.metrics is not None:
+                        self.metrics.record_table(mine_name, table_cn, len(df),
+                                                  self.table_source.read_info.get((mine_name, table_cn)))
+                    print(f"  ✅ {table_cn}: {len(df)}条记录")
+                    for field, units in self.unknown_units.get(mine_name, {}).get(table_cn, {}).items():
+                        print(f"  ⚠️ {table_cn}.{field}: 未知单位 {', '.join(units)}，未换算")
+                    for field, count in self.unconverted_values.get(mine_name, {}).get(table_cn, {}).items():
+                        print(f"  ⚠️ {table_cn}.{field}: {count}行数值无法解析（如脱敏原文），未换算")
+                except Exception as e:
+                    print(f"  ⚠️ {table_cn}: 读取失败 - {e}")
+            yield table_cn, table_en, (df if df is not None else pd.DataFrame())
+    
+    def _load_table(self, mine_name: str, table_cn: str) -> pd.DataFrame:
+        """读取一个表；按开启的选项依次规范化、换算单位和转换字段类型"""
+        if self._read_all_text:
+            df = self.table_source.load(mine_name, table_cn, dtype="str")
+        elif self.typed or self.normalize:
+            df = self.table_source.load(mine_name, table_cn, dtype=self.schema.read_dtypes(table_cn))
+        else:
+            df = self.table_source.load(mine_name, table_cn)
+        if self.normalize:
+            df = self.schema.normalize(table_cn, df)
+        if self.convert_units:
+            df, unknown, unparsed = self.schema.convert_units(table_cn, df)
+            if unknown:
+                self.unknown_units.setdefault(mine_name, {})[table_cn] = unknown
+            if unparsed:
+                self.unconverted_values.setdefault(mine_name, {})[table_cn] = unparsed
+        if self.typed:
+            df = self.schema.apply_types(table_cn, df)
+        return df
+    
+    def _iter_record_chunks(self, df: pd.DataFrame, rows: bool = False) -> Iterator[List]:
+        """按CHUNK_ROWS分批把DataFrame转换为记录列表（rows为True时转换为值列表）"""
+        convert = self._frame_to_rows if rows else self._frame_to_records
+        for start in range(0, len(df), self.CHUNK_ROWS):
+            yield convert(df.iloc[start:start + self.CHUNK_ROWS])
+    
+    @contextmanager
+    def _open_output(self, output_path: Union[str, IO]):
+        """
+        以文本模式打开输出：路径直接打开，二进制文件对象按UTF-8包装；开启压缩时边写边压缩
+        
+        输出到路径时先写同目录下的临时文件，写完并落盘后再替换为目标文件，
+        转换中断、失败或断电时不会留下不完整的JSON，已有的输出文件保持不变。
+        """
+        if hasattr(output_path, 'write'):
+            with self._text_output(output_path) as f:
+                yield f
+            return
+        temp_file = Path(f"{output_path}.tmp")
+        try:
+            if self.compression is None:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    yield f
+                    self._fsync(f)
+            else:
+                with open(temp_file, 'wb') as binary:
+                    with self._text_output(binary) as f:
+                        yield f
+                    self._fsync(binary)
+            self._replace(temp_file, output_path)
+        except BaseException:
+            temp_file.unlink(missing_ok=True)
+            raise
+    
+    @contextmanager
+    def _text_output(self, binary: IO):
+        """二进制输出按UTF-8包装为文本，开启压缩时边写边压缩（不关闭传入的文件对象）"""
+        with ExitStack() as stack:
+            if self.compression is not None:
+                binary = stack.enter_context(open_compressed(binary, self.compression))
+            f = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+            try:
+                yield f
+            finally:
+                f.flush()
+                f.detach()
+    
+    @staticmethod
+    def _fsync(f: IO):
+        """把已写入文件对象的内容落盘"""
+        f.flush()
+        os.fsync(f.fileno())
+    
+    @staticmethod
+    def _replace(temp_file: Path, target: Union[str, Path]):
+        """用已落盘的临时文件替换目标文件，并同步所在目录使替换本身落盘（Windows不支持打开目录，跳过）"""
+        os.replace(temp_file, target)
+        if os.name != 'nt':
+            fd = os.open(Path(target).parent, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def _print_saved(self, output_path: Union[str, IO]):
+        """打印生成的文件路径"""
+        if not hasattr(output_path, 'write'):
+            print(f"✅ 已生成: {output_path}")
+    
     def batch_convert(self, mine_names: Optional[List[str]] = None, 
-                     output_dir: str = "./json_output") -> List[Dict]:
+                     output_dir: str = "./json_output",
+                     workers: int = 1,
+                     incremental: bool = False,
+                     resume: bool = False) -> List[Dict]:
         """
         批量转换多个煤矿
         
+        每个煤矿转换完成时向输出目录的转换进度（CHECKPOINT_FILE）追加一行报告条目，
+        运行中断后可用resume继续。
+        
         Args:
             mine_names: 煤矿名称列表，如果为None则自动检测
             output_dir: 输出目录
+            workers: 并行进程数，1为串行转换；大于1时按煤矿分发到进程池，
+                     结果仍按mine_names顺序收集，报告与串行模式一致
+            incremental: 增量模式，在输出目录维护转换清单，
+                         输入CSV、Schema和转换器版本均未变化的煤矿直接跳过
+            resume: 断点续转，转换进度中已成功、输出文件存在且输入CSV未变化的煤矿直接跳过，
+                    只转换上次未完成、失败或输入已变化的煤矿；转换器版本、Schema或转换选项变化时全部重新转换
             
         Returns:
             转换结果列表
         """
-        # 自动检测煤矿
-        if mine_names is None:
-            mine_names = self.auto_detect_mines()
-            print(f"🔍 自动检测到 {len(mine_names)} 个煤矿: {', '.join(mine_names)}")
+        mine_names, output_path = self._prepare_batch(mine_names, output_dir)
+        if not mine_names:
+            return []
+        
+        output_files = [str(output_path / self.output_name(mine_name)) for mine_name in mine_names]
+        results: List[Optional[Dict]] = [None] * len(mine_names)
+        
+        completed, checkpoint = self._open_checkpoint(output_path, resume)
+        manifest = self._load_manifest(output_path) if incremental else None
+        snapshots = {}
+        with checkpoint:
+            for i, (mine_name, output_file) in enumerate(zip(mine_names, output_files)):
+                snapshots[mine_name] = self._input_snapshot(mine_name)
+                
+                # 断点续转：跳过上次运行中已成功且输入未变化的煤矿
+                entry = completed.get(mine_name)
+                if (entry and entry.get("file") == output_file and Path(output_file).exists()
+                        and self._inputs_unchanged(entry.get("inputs", {}), snapshots[mine_name], mine_name)):
+                    print(f"\n⏭️ 已完成，跳过: {mine_name}")
+                    snapshots[mine_name] = entry.get("inputs", {})
+                    results[i] = dict({key: value for key, value in entry.items() if key != "inputs"},
+                                      status="resumed")
+                    continue
+                
+                # 增量模式：跳过输入未变化的煤矿
+                entry = manifest["mines"].get(mine_name) if manifest is not None else None
+                if (entry and Path(output_file).exists()
+                        and self._inputs_unchanged(entry["inputs"], snapshots[mine_name], mine_name)):
+                    print(f"\n⏭️ 未变化，跳过: {mine_name}")
+                    snapshots[mine_name] = entry["inputs"]
+                    results[i] = {
+                        "mine_name": mine_name,
+                        "success": True,
+                        "file": output_file,
+                        "record_count": entry["record_count"],
+                        "tables": entry["tables"],
+                        "status": "skipped"
+                    }
+                    for key in ("unknown_units", "unconverted_values"):
+                        if entry.get(key):
+                            results[i][key] = entry[key]
+                    self._write_checkpoint(checkpoint, results[i], snapshots[mine_name])
+                    continue
+                
+                # 转换前记录内容哈希，转换期间文件被修改时下次仍会重新转换
+                for table_cn, info in snapshots[mine_name].items():
+                    info["sha256"] = self._file_sha256(self.table_source.table_path(mine_name, table_cn))
+            
+            pending = [i for i, result in enumerate(results) if result is None]
+            if workers > 1 and len(pending) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                    futures = {executor.submit(self._convert_entry, mine_names[i], output_files[i]): i
+                               for i in pending}
+                    # 按完成顺序记录进度，结果仍按mine_names顺序放入报告
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        results[i] = self._finish_entry(future.result(), checkpoint, snapshots[mine_names[i]])
+            else:
+                for i in pending:
+                    results[i] = self._finish_entry(self._convert_entry(mine_names[i], output_files[i]),
+                                                    checkpoint, snapshots[mine_names[i]])
+        
+        if manifest is not None:
+            # 上次中断前已完成、本次续转跳过的煤矿也记入清单，下次增量转换时不再重复转换
+            for i, result in enumerate(results):
+                if result.get("status") == "skipped":
+                    continue
+                if result.get("status") != "resumed":
+                    result["status"] = "rebuilt"
+                self._update_manifest(manifest, result, snapshots[mine_names[i]])
+            self._save_manifest(manifest, output_path)
+        
+        # 生成批量转换报告
+        self._generate_report(results, output_path)
+        if self.metrics is not None:
+            self.metrics.save(output_path / self.METRICS_FILE)
+            print(f"⏱️ 性能指标已保存: {output_path / self.METRICS_FILE}")
+        
+        return results
+    
+    def _finish_entry(self, entry: Dict, checkpoint: IO, inputs: Dict) -> Dict:
+        """记录一个煤矿的转换结果：合并进程池中收集的指标，并连同输入快照追加到转换进度"""
+        if self.metrics is not None and "metrics" in entry:
+            self.metrics.merge(entry["mine_name"], entry["metrics"])
+        self._write_checkpoint(checkpoint, entry, inputs)
+        return entry
+    
+    def export_jsonl(self, mine_names: Optional[List[str]] = None,
+                     output_dir: str = "./jsonl_output",
+                     shard_size: int = 100000) -> List[Dict]:
+        """
+        导出训练语料：换行分隔的JSON分片 + 偏移索引
+        
+        每个煤矿先写一行煤矿信息（mine_info、statistics），再每条记录一行；
+        分片旁的.idx文件和index.json记录行偏移，加载时可直接定位到
+        任一煤矿或任一条记录（见MineJson.JsonlShardReader）。
+        
+        Args:
+            mine_names: 煤矿名称列表，如果为None则自动检测
+            output_dir: 输出目录
+            shard_size: 每个分片的最大行数（分片只在煤矿之间切换）
+            
+        Returns:
+            转换结果列表
+        """
+        mine_names, output_path = self._prepare_batch(mine_names, output_dir)
+        if not mine_names:
+            return []
         
+        results = []
+        with JsonlShardWriter(output_path, shard_size) as writer:
+            for mine_name in mine_names:
+                print(f"\n📋 正在导出: {mine_name}")
+                try:
+                    # 先读取该煤矿的全部表，煤矿信息行需要各表记录数
+                    tables = list(self._iter_tables(mine_name))
+                    mine_info = self._mine_info_from_tables(mine_name, tables)
+                    statistics = {table_en: len(df) for _, table_en, df in tables}
+                    
+                    writer.begin_mine(mine_name, mine_info, statistics)
+                    for _, table_en, df in tables:
+                        writer.begin_table(table_en)
+                        for records in self._iter_record_chunks(df):
+                            writer.write_records(records)
+                    writer.end_mine()
+                    
+                    results.append({
+                        "mine_name": mine_name,
+                        "success": True,
+                        "file": str(output_path / writer.shards[-1]["file"]),
+                        "record_count": sum(statistics.values()),
+                        "tables": len([v for v in statistics.values() if v > 0])
+                    })
+                except Exception as e:
+                    writer.abort_mine()
+                    print(f"  ❌ 导出失败: {e}")
+                    results.append({
+                        "mine_name": mine_name,
+                        "success": False,
+                        "error": str(e)
+                    })
+                finally:
+                    self.table_source.evict(mine_name)
+        
+        print(f"✅ 已生成 {len(writer.shards)} 个分片: {output_path / JsonlShardWriter.INDEX_FILE}")
+        self._generate_report(results, output_path)
+        
+        return results
+    
+    def export_parquet(self, mine_names: Optional[List[str]] = None,
+                       output_dir: str = "./parquet_output") -> List[Dict]:
+        """
+        导出列式数据集：每个表一个按mine_id分区的Parquet数据集（需要pyarrow）
+        
+        列类型取自Schema：始终按typed和normalize读取（脱敏值拆为数值和"<字段>_masked"，
+        多值字段为列表），convert_units沿用当前设置；Schema外的列为字符串。
+        已导出过的煤矿再次导出时覆盖其分区；各表都没有mine_id的煤矿不导出（记为失败），
+        mine_id分区已属于另一个煤矿时也不覆盖。用read_parquet读回嵌套结构，
+        用MineParquet.ParquetDatasetReader.scan跨煤矿只读需要的列。
+        
+        Args:
+            mine_names: 煤矿名称列表，如果为None则自动检测
+            output_dir: 输出目录
+            
+        Returns:
+            转换结果列表
+        """
+        mine_names, output_path = self._prepare_batch(mine_names, output_dir)
         if not mine_names:
-            print("❌ 未找到任何煤矿数据")
             return []
+        writer = ParquetDatasetWriter(output_path, self.schema)
+        results = self._export_mines(writer, mine_names, output_path)
         
-        # 创建输出目录
-        output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
+        print(f"✅ 已生成Parquet数据集: {output_path}")
+        self._generate_report(results, output_path)
+        
+        return results
+    
+    def export_sqlite(self, mine_names: Optional[List[str]] = None,
+                      output_dir: str = "./sqlite_output") -> List[Dict]:
+        """
+        导出SQLite数据库：多个煤矿的十个表写入同一个数据库文件（输出目录下的采空区数据集.db），
+        不需要数据库服务，可跨煤矿直接用SQL查询
+        
+        表结构取自Schema，每个表以mine_id列区分煤矿，mine_id、主键和外键字段建有索引；
+        读取方式与export_parquet相同（typed+normalize，多值字段按"+"连接）。
+        数据库已存在时按煤矿覆盖：只替换本次导出的煤矿，其他煤矿的数据保留；
+        各表都没有mine_id的煤矿不导出，mine_id已属于另一个煤矿时也不覆盖。
+        
+        Args:
+            mine_names: 煤矿名称列表，如果为None则自动检测
+            output_dir: 输出目录
+            
+        Returns:
+            转换结果列表
+        """
+        mine_names, output_path = self._prepare_batch(mine_names, output_dir)
+        if not mine_names:
+            return []
+        db_path = output_path / self.SQLITE_FILE
+        with SqliteDatasetWriter(db_path, self.schema) as writer:
+            results = self._export_mines(writer, mine_names, db_path)
+        
+        print(f"✅ 已生成SQLite数据库: {db_path}")
+        self._generate_report(results, output_path)
+        
+        return results
+    
+    def _export_mines(self, writer, mine_names: List[str], output_file: Path) -> List[Dict]:
+        """
+        按Schema类型逐煤矿读取各表并交给写出器（Parquet/SQLite共用）
+        
+        Args:
+            writer: 有write_mine(mine_info, {中文表名: DataFrame})方法的写出器
+            mine_names: 煤矿名称列表
+            output_file: 报告中记录的输出位置
+            
+        Returns:
+            转换结果列表
+        """
+        converter = self._with_source(self.table_source, typed=True, normalize=True)
+        converter._schema = self.schema
+        converter._read_all_text = True
         
         results = []
         for mine_name in mine_names:
-            print(f"\n📋 正在转换: {mine_name}")
+            print(f"\n📋 正在导出: {mine_name}")
             try:
-                output_file = output_path / f"{mine_name}-采空区数据集.json"
-                result = self.convert_mine(mine_name, str(output_file))
-                
-                total_records = sum(result["statistics"].values())
+                tables = list(converter._iter_tables(mine_name))
+                mine_info = self._mine_info_from_tables(mine_name, tables, generate_id=False)
+                writer.write_mine(mine_info, {table_cn: df for table_cn, _, df in tables})
+                record_count = sum(len(df) for _, _, df in tables)
                 results.append({
                     "mine_name": mine_name,
                     "success": True,
                     "file": str(output_file),
-                    "record_count": total_records,
-                    "tables": len([v for v in result["statistics"].values() if v > 0])
+                    "record_count": record_count,
+                    "tables": len([df for _, _, df in tables if len(df) > 0])
                 })
-                
+                if mine_name in converter.unknown_units:
+                    results[-1]["unknown_units"] = converter.unknown_units[mine_name]
+                if mine_name in converter.unconverted_values:
+                    results[-1]["unconverted_values"] = converter.unconverted_values[mine_name]
             except Exception as e:
-                print(f"  ❌ 转换失败: {e}")
-                results.append({
-                    "mine_name": mine_name,
-                    "success": False,
-                    "error": str(e)
-                })
+                print(f"  ❌ 导出失败: {e}")
+                results.append(self._failure_entry(mine_name, e))
+            finally:
+                self.table_source.evict(mine_name)
+        return results
+    
+    @staticmethod
+    def read_parquet(dataset_dir: str, mine_id: str) -> Dict:
+        """
+        从export_parquet的输出读回一个煤矿的嵌套结构（需要pyarrow）
         
-        # 生成批量转换报告
-        self._generate_report(results, output_path)
+        Args:
+            dataset_dir: 数据集目录
+            mine_id: 煤矿ID（可用MineParquet.ParquetDatasetReader.mines列出）
+            
+        Returns:
+            与ToJson(typed=True, normalize=True).convert_mine一致的字典（Schema外的列为字符串）
+        """
+        return ParquetDatasetReader(dataset_dir).read_mine(mine_id)
+    
+    def convert_zip(self, archive: Union[str, BufferLike], output: IO[bytes],
+                    workers: int = 1) -> Tuple[List[Dict], str]:
+        """
+        转换ZIP压缩包中的多个煤矿：直接从压缩包读取CSV，不解压到磁盘，
+        按"{煤矿名称}-{表名}.csv"分组后逐煤矿转换，输出ZIP包含每个煤矿的JSON和转换报告.txt
         
-        return results
+        CSV文件数或解压后大小超过ZIP_MAX_FILES、ZIP_MAX_FILE_BYTES、ZIP_MAX_TOTAL_BYTES时
+        不读取任何文件，抛出ValueError；不同子目录中的同名CSV只转换第一个，其余写入报告。
+        
+        Args:
+            archive: ZIP文件路径、bytes，或可seek的二进制文件对象（如UploadedFile）
+            output: 输出ZIP的二进制文件对象；每个煤矿转换完即写入
+            workers: 并行进程数，1为串行转换；结果按煤矿名称顺序写入。
+                     进程池以spawn方式启动，可在多线程的Web服务中使用
+            
+        Returns:
+            (转换结果列表, 转换报告文本)
+        """
+        if isinstance(archive, (bytes, bytearray, memoryview)):
+            archive = io.BytesIO(archive)
+        with zipfile.ZipFile(archive) as zf:
+            buffers, unmatched, duplicates = self._read_zip_tables(zf)
+        if unmatched:
+            print(f"⚠️ {len(unmatched)} 个CSV文件无法匹配到已知表: {', '.join(unmatched)}")
+        if duplicates:
+            print(f"⚠️ {len(duplicates)} 个CSV文件与其他目录中的文件同名，已忽略: {', '.join(duplicates)}")
+        
+        mine_names = sorted(buffers)
+        print(f"\n🔍 压缩包中检测到 {len(mine_names)} 个煤矿: {', '.join(mine_names)}")
+        file_names = [self.output_name(mine_name) for mine_name in mine_names]
+        tables = [buffers.pop(mine_name) for mine_name in mine_names]
+        
+        results = []
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as out:
+            if workers > 1 and len(mine_names) > 1:
+                # fork出的子进程会继承调用线程以外各线程持有的锁，在Web服务中可能死锁，改用spawn
+                with ProcessPoolExecutor(max_workers=min(workers, len(mine_names)),
+                                         mp_context=multiprocessing.get_context("spawn")) as executor:
+                    for entry, data in executor.map(self._convert_buffers_entry, mine_names, tables, file_names):
+                        self._write_zip_entry(out, entry, data, results)
+            else:
+                for mine_name, mine_tables, file_name in zip(mine_names, tables, file_names):
+                    self._write_zip_entry(out, *self._convert_buffers_entry(mine_name, mine_tables, file_name),
+                                          results)
+            
+            report_text = self._report_text(results, unmatched, duplicates)
+            print("\n" + report_text)
+            out.writestr("转换报告.txt", report_text)
+            if self.metrics is not None:
+                out.writestr(self.METRICS_FILE, json.dumps(self.metrics.to_dict(), ensure_ascii=False, indent=2))
+        return results, report_text
+    
+    def _write_zip_entry(self, out: zipfile.ZipFile, entry: Dict, data: Optional[bytes], results: List[Dict]):
+        """把一个煤矿的JSON写入输出ZIP并记录报告条目"""
+        if data is not None:
+            out.writestr(entry["file"], data)
+        if self.metrics is not None and "metrics" in entry:
+            self.metrics.merge(entry["mine_name"], entry["metrics"])
+        results.append(entry)
+    
+    def _read_zip_tables(self, zf: zipfile.ZipFile) -> Tuple[Dict[str, Dict[str, bytes]], List[str], List[str]]:
+        """
+        按文件名规则读取压缩包中的CSV（忽略目录层级）
+        
+        先按ZIP目录中记录的解压后大小检查读取上限，全部通过后才读取
+        （zipfile读取的字节数不会超过记录的大小，记录不实时读取会因CRC校验失败而报错）。
+        
+        Returns:
+            ({煤矿名称: {中文表名: CSV字节}}, 无法匹配到已知表的CSV文件名,
+             与前面的文件同名而被忽略的CSV路径)
+        """
+        members = {}
+        unmatched = []
+        duplicates = []
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            # 未设置UTF-8标志的文件名按cp437解码，Windows压缩的中文文件名实际是GBK
+            if not info.flag_bits & 0x800:
+                try:
+                    name = name.encode('cp437').decode('gbk')
+                except (UnicodeEncodeError, UnicodeDecodeError):
+                    pass
+            file_name = name.rsplit('/', 1)[-1]
+            if not file_name.endswith('.csv'):
+                continue
+            parsed = MineTableSource.parse_file_name(file_name)
+            if parsed is None:
+                unmatched.append(file_name)
+            elif parsed in members:
+                duplicates.append(name)
+            else:
+                members[parsed] = info
+        
+        if len(members) > self.ZIP_MAX_FILES:
+            raise ValueError(f"压缩包中的CSV文件过多: {len(members)}个（上限{self.ZIP_MAX_FILES}个）")
+        for info in members.values():
+            if info.file_size > self.ZIP_MAX_FILE_BYTES:
+                raise ValueError(f"压缩包中的文件解压后过大: {info.filename} {info.file_size}字节"
+                                 f"（上限{self.ZIP_MAX_FILE_BYTES}字节）")
+        total_size = sum(info.file_size for info in members.values())
+        if total_size > self.ZIP_MAX_TOTAL_BYTES:
+            raise ValueError(f"压缩包中的CSV解压后共{total_size}字节，超过上限{self.ZIP_MAX_TOTAL_BYTES}字节")
+        
+        buffers: Dict[str, Dict[str, bytes]] = {}
+        for (mine_name, table_cn), info in members.items():
+            buffers.setdefault(mine_name, {})[table_cn] = zf.read(info)
+        return buffers, sorted(unmatched), sorted(duplicates)
+    
+    def _prepare_batch(self, mine_names: Optional[List[str]], output_dir: str) -> Tuple[List[str], Path]:
+        """
+        批量处理的准备工作：自动检测煤矿并创建输出目录
+        
+        Args:
+            mine_names: 煤矿名称列表，如果为None则自动检测
+            output_dir: 输出目录
+            
+        Returns:
+            (煤矿名称列表, 输出目录)
+        """
+        # 只列一次目录，后续检测和转换都使用该索引
+        if mine_names is None:
+            # 自动检测煤矿
+            mine_names = self.auto_detect_mines()
+            print(f"🔍 自动检测到 {len(mine_names)} 个煤矿: {', '.join(mine_names)}")
+        else:
+            self.table_source.refresh()
+        
+        output_path = Path(output_dir)
+        if not mine_names:
+            print("❌ 未找到任何煤矿数据")
+            return [], output_path
+        
+        # 创建输出目录
+        output_path.mkdir(exist_ok=True)
+        return mine_names, output_path
+    
+    def _fingerprint(self) -> Dict:
+        """转换器指纹：版本或Schema变化时，增量模式需要重新转换所有煤矿"""
+        schema_hash = None
+        if self.schema_path.exists():
+            schema_hash = self._file_sha256(self.schema_path)
+        return {
+            "converter_version": self.VERSION,
+            "schema_hash": schema_hash,
+            "options": self.options
+        }
+    
+    def _load_manifest(self, output_path: Path) -> Dict:
+        """读取转换清单；不存在、损坏或转换器指纹变化时返回空清单"""
+        fingerprint = self._fingerprint()
+        manifest_file = output_path / self.MANIFEST_FILE
+        if manifest_file.exists():
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get("fingerprint") == fingerprint:
+                    return manifest
+                print("🔄 转换器版本或Schema已变化，全部重新转换")
+            except (ValueError, OSError) as e:
+                print(f"⚠️ 转换清单无法读取，全部重新转换: {e}")
+        return {"fingerprint": fingerprint, "mines": {}}
+    
+    def _save_manifest(self, manifest: Dict, output_path: Path):
+        """保存转换清单（先写临时文件并落盘再替换，避免中断时留下损坏的清单）"""
+        manifest_file = output_path / self.MANIFEST_FILE
+        temp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            self._fsync(f)
+        self._replace(temp_file, manifest_file)
+    
+    def _update_manifest(self, manifest: Dict, entry: Dict, snapshot: Dict):
+        """记录转换成功的煤矿及其输入文件；失败的煤矿从清单中移除，下次重新转换"""
+        mine_name = entry["mine_name"]
+        if not entry.get("success"):
+            manifest["mines"].pop(mine_name, None)
+            return
+        manifest["mines"][mine_name] = {
+            "inputs": snapshot,
+            "record_count": entry["record_count"],
+            "tables": entry["tables"]
+        }
+        for key in ("unknown_units", "unconverted_values"):
+            if entry.get(key):
+                manifest["mines"][mine_name][key] = entry[key]
+    
+    def _open_checkpoint(self, output_path: Path, resume: bool) -> Tuple[Dict[str, Dict], IO]:
+        """
+        打开转换进度：首行为转换器指纹，其后每行一个煤矿的报告条目
+        
+        续转时读取已有记录，同一煤矿以最后一行为准；文件先按有效记录重写
+        （去掉中断时只写了一半的行），再以追加方式打开。
+        
+        Args:
+            output_path: 输出目录
+            resume: 是否读取已有进度；为False时重新开始
+            
+        Returns:
+            (上次已成功的煤矿 {煤矿名称: 报告条目}, 追加写入的进度文件)
+        """
+        fingerprint = self._fingerprint()
+        checkpoint_file = output_path / self.CHECKPOINT_FILE
+        completed = {}
+        if resume and checkpoint_file.exists():
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+            if records and records[0].get("fingerprint") == fingerprint:
+                for entry in records[1:]:
+                    if entry.get("success"):
+                        completed[entry["mine_name"]] = entry
+                    else:
+                        completed.pop(entry.get("mine_name"), None)
+            else:
+                print("🔄 转换进度无效或转换器版本、Schema、转换选项已变化，全部重新转换")
+        
+        temp_file = checkpoint_file.with_name(checkpoint_file.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"fingerprint": fingerprint}, ensure_ascii=False) + "\n")
+            for entry in completed.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._fsync(f)
+        self._replace(temp_file, checkpoint_file)
+        return completed, open(checkpoint_file, 'a', encoding='utf-8')
+    
+    @classmethod
+    def _write_checkpoint(cls, checkpoint: IO, entry: Dict, inputs: Dict):
+        """
+        追加一个煤矿的报告条目并落盘（不含性能指标和本次运行的状态）
+        
+        条目带有转换前的输入快照（同转换清单），续转时输入已变化的煤矿重新转换。
+        """
+        record = {key: value for key, value in entry.items() if key not in ("metrics", "status")}
+        if entry.get("success"):
+            record["inputs"] = inputs
+        checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+        cls._fsync(checkpoint)
+    
+    def _input_snapshot(self, mine_name: str) -> Dict:
+        """记录煤矿各输入CSV的大小和修改时间"""
+        snapshot = {}
+        for table_cn, file_path in self.table_source.mine_tables(mine_name).items():
+            stat = file_path.stat()
+            snapshot[table_cn] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return snapshot
+    
+    def _inputs_unchanged(self, recorded: Dict, snapshot: Dict, mine_name: str) -> bool:
+        """
+        判断煤矿的输入是否与清单一致
+        
+        大小和修改时间都相同视为未变化；只有修改时间不同时（如复制、touch）
+        再比较内容哈希。
+        """
+        if recorded.keys() != snapshot.keys():
+            return False
+        for table_cn, info in snapshot.items():
+            old = recorded[table_cn]
+            if old["size"] != info["size"]:
+                return False
+            if old["mtime_ns"] != info["mtime_ns"]:
+                file_path = self.table_source.table_path(mine_name, table_cn)
+                if old.get("sha256") != self._file_sha256(file_path):
+                    return False
+        return True
+    
+    @staticmethod
+    def _file_sha256(file_path: Path) -> str:
+        """分块计算文件的SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _convert_entry(self, mine_name: str, output_file: str) -> Dict:
+        """
+        转换单个煤矿并生成报告条目（供串行和进程池共用）
+        
+        Args:
+            mine_name: 煤矿名称
+            output_file: 输出JSON文件路径
+            
+        Returns:
+            报告条目
+        """
+        print(f"\n📋 正在转换: {mine_name}")
+        try:
+            # 报告只需统计信息，使用流式输出避免在内存中保留整个数据集
+            result = self.convert_mine(mine_name, output_file, stream=True)
+            return self._success_entry(mine_name, output_file, result)
+            
+        except Exception as e:
+            print(f"  ❌ 转换失败: {e}")
+            return self._failure_entry(mine_name, e)
+        finally:
+            # 批量转换时转换完即释放该煤矿的DataFrame，控制内存
+            self.table_source.evict(mine_name)
+    
+    def _convert_buffers_entry(self, mine_name: str, tables: Dict[str, bytes],
+                               output_file: str) -> Tuple[Dict, Optional[bytes]]:
+        """
+        从内存转换单个煤矿（供ZIP转换的串行和进程池共用）
+        
+        Returns:
+            (报告条目, JSON字节)；转换失败时JSON字节为None
+        """
+        print(f"\n📋 正在转换: {mine_name}")
+        try:
+            json_buffer = io.BytesIO()
+            # 未知单位等记录在临时转换器上，报告条目由它生成
+            converter = self._with_source(MineBufferSource({mine_name: tables}))
+            result = converter.convert_mine(mine_name, json_buffer, stream=True)
+            return converter._success_entry(mine_name, output_file, result), json_buffer.getvalue()
+        except Exception as e:
+            print(f"  ❌ 转换失败: {e}")
+            return self._failure_entry(mine_name, e), None
+    
+    def _success_entry(self, mine_name: str, output_file: str, result: Dict) -> Dict:
+        """转换成功的报告条目"""
+        entry = {
+            "mine_name": mine_name,
+            "success": True,
+            "file": output_file,
+            "record_count": sum(result["statistics"].values()),
+            "tables": len([v for v in result["statistics"].values() if v > 0])
+        }
+        if mine_name in self.unknown_units:
+            entry["unknown_units"] = self.unknown_units[mine_name]
+        if mine_name in self.unconverted_values:
+            entry["unconverted_values"] = self.unconverted_values[mine_name]
+        if self.metrics is not None and mine_name in self.metrics.mines:
+            entry["metrics"] = self.metrics.mines[mine_name]
+        return entry
+    
+    @staticmethod
+    def _failure_entry(mine_name: str, error: Exception) -> Dict:
+        """转换失败的报告条目"""
+        return {
+            "mine_name": mine_name,
+            "success": False,
+            "error": str(error)
+        }
+    
+    @staticmethod
+    def _frame_to_records(df: pd.DataFrame) -> List[Dict]:
+        """
+        按列处理空值后构建记录列表
+        
+        每列只做一次向量化的isna判断，NaN/NaT/NA统一替换为None，
+        数值按to_dict('records')的方式转为Python原生类型。
+        
+        Args:
+            df: 表数据
+            
+        Returns:
+            记录字典列表
+        """
+        keys = list(df.columns)
+        return [dict(zip(keys, row)) for row in zip(*ToJson._frame_columns(df))]
+    
+    @staticmethod
+    def _frame_to_rows(df: pd.DataFrame) -> List[List]:
+        """按列处理空值后构建值列表（列式布局），空值处理同_frame_to_records"""
+        return [list(row) for row in zip(*ToJson._frame_columns(df))]
+    
+    @staticmethod
+    def _frame_columns(df: pd.DataFrame) -> List[List]:
+        """各列转为Python原生值列表，空值为None"""
+        columns = []
+        for name in df.columns:
+            series = df[name]
+            values = series.to_numpy(dtype=object)
+            mask = series.isna().to_numpy()
+            if mask.any():
+                # object列的to_numpy可能返回视图，复制后再替换，避免改动缓存的DataFrame
+                values = values.copy()
+                values[mask] = None
+            columns.append(values.tolist())
+        return columns
     
     def _generate_mine_id(self, mine_name: str) -> str:
         """
@@ -222,8 +1131,29 @@ class ToJson:
         # 取前几个字符作为ID
         return clean_name[:6].upper() + "001"
     
-    def _generate_report(self, results: List[Dict], output_path: Path):
-        """生成转换报告"""
+    def _generate_report(self, results: List[Dict], output_path: Path) -> str:
+        """生成转换报告，打印并保存到输出目录的转换报告.txt"""
+        report_text = self._report_text(results)
+        print("\n" + report_text)
+        
+        # 保存报告
+        with open(output_path / "转换报告.txt", 'w', encoding='utf-8') as f:
+            f.write(report_text)
+        return report_text
+    
+    def _report_text(self, results: List[Dict], unmatched: Optional[List[str]] = None,
+                     duplicates: Optional[List[str]] = None) -> str:
+        """
+        转换报告文本
+        
+        Args:
+            results: 转换结果列表
+            unmatched: 无法匹配到已知表的CSV文件名，为None时取读取器扫描目录的结果
+            duplicates: 因同名而被忽略的CSV路径（ZIP转换）
+            
+        Returns:
+            报告文本
+        """
         report = []
         report.append("=" * 80)
         report.append("煤矿采空区数据集批量转换报告")
@@ -238,10 +1168,30 @@ class ToJson:
         report.append(f"成功: {success_count}")
         report.append(f"失败: {total_count - success_count}")
         report.append(f"总记录数: {total_records}")
+        skipped_count = sum(1 for r in results if r.get('status') == 'skipped')
+        resumed_count = sum(1 for r in results if r.get('status') == 'resumed')
+        if any(r.get('status') in ('skipped', 'rebuilt') for r in results):
+            report.append(f"跳过(未变化): {skipped_count}")
+            report.append(f"重新转换: {total_count - skipped_count - resumed_count}")
+        if resumed_count:
+            report.append(f"跳过(上次已完成): {resumed_count}")
         report.append("")
         report.append("-" * 80)
         report.append("")
         
+        if unmatched is None:
+            unmatched = self.table_source.unmatched_files
+        if unmatched:
+            report.append(f"⚠️ 无法匹配到已知表的CSV文件: {len(unmatched)}个")
+            for file_name in unmatched:
+                report.append(f"   {file_name}")
+            report.append("")
+        if duplicates:
+            report.append(f"⚠️ 与其他目录中的文件同名、已忽略的CSV文件: {len(duplicates)}个")
+            for file_name in duplicates:
+                report.append(f"   {file_name}")
+            report.append("")
+        
         for result in results:
             mine_name = result.get('mine_name')
             if result.get('success'):
@@ -252,6 +1202,21 @@ class ToJson:
                 report.append(f"   记录数: {record_count}")
                 report.append(f"   表数: {tables}/10")
                 report.append(f"   文件: {file}")
+                if result.get('status') == 'skipped':
+                    report.append("   状态: 跳过（输入未变化）")
+                elif result.get('status') == 'rebuilt':
+                    report.append("   状态: 重新转换")
+                elif result.get('status') == 'resumed':
+                    report.append("   状态: 跳过（上次运行已完成）")
+                for table_cn, fields in result.get('unknown_units', {}).items():
+                    for field, units in fields.items():
+                        report.append(f"   ⚠️ 未知单位: {table_cn}.{field} = {', '.join(units)}（未换算）")
+                for table_cn, fields in result.get('unconverted_values', {}).items():
+                    for field, count in fields.items():
+                        report.append(f"   ⚠️ 数值无法解析: {table_cn}.{field} {count}行（如脱敏原文，未换算，"
+                                      f"开启normalize可先拆出数值）")
+                if self.metrics is not None and result.get('status') not in ('skipped', 'resumed'):
+                    report.extend(self.metrics.report_lines(mine_name))
                 report.append("")
             else:
                 error = result.get('error', 'Unknown error')
@@ -259,12 +1224,7 @@ class ToJson:
                 report.append(f"   错误: {error}")
                 report.append("")
         
-        report_text = "\n".join(report)
-        print("\n" + report_text)
-        
-        # 保存报告
-        with open(output_path / "转换报告.txt", 'w', encoding='utf-8') as f:
-            f.write(report_text)
+        return "\n".join(report)
 
 
 def main():
@@ -277,7 +1237,7 @@ def main():
     # 如果提供了命令行参数，转换指定煤矿
     if len(sys.argv) > 1:
         mine_name = sys.argv[1]
-        output_file = f"{mine_name}-采空区数据集.json"
+        output_file = converter.output_name(mine_name)
         print(f"📋 转换单个煤矿: {mine_name}")
         converter.convert_mine(mine_name, output_file)
     else:
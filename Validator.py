@@ -6,49 +6,121 @@
 """
 
 import pandas as pd
-import json
+import numpy as np
+import io
+import functools
+import math
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, IO, Iterator, List, Optional, Set, Tuple, Union
 import sys
 
+from MineTableSource import MineTableSource, MineBufferSource, BufferLike
+from MineSchema import MineSchema
+from MineMetrics import MineMetrics
+from MineJson import MineJsonReader, open_decompressed, get_json_backend
+
+
+def _instrumented(method):
+    """
+    开启instrument时统计验证方法的耗时和峰值内存，按第一个参数（煤矿名称，
+    或validate_json的JSON来源）累加到该煤矿的指标中
+    """
+    @functools.wraps(method)
+    def wrapper(self, target, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, target, *args, **kwargs)
+        name = target if isinstance(target, str) else self._json_name(target)
+        with self.metrics.track_mine(name, stage=method.__name__, reset=False):
+            return method(self, target, *args, **kwargs)
+    return wrapper
+
+
 class Validator:
     """数据集验证器"""
     
     # 表名映射
-    TABLE_MAPPING = {
-        "采空区基本信息": "goaf_basic_info",
-        "采空区积水信息": "goaf_water_info",
-        "采空区积气信息": "goaf_gas_info",
-        "自燃发火信息": "fire_info",
-        "采空区悬顶信息": "suspended_roof_info",
-        "采空区塌陷信息": "collapse_info",
-        "地裂缝信息": "crack_info",
-        "废弃井筒信息": "abandoned_shaft_info",
-        "密闭墙信息": "seal_wall_info",
-        "采空区治理信息": "treatment_info"
+    TABLE_MAPPING = MineTableSource.TABLE_MAPPING
+    
+    # 字段检查规则名称
+    RULE_NAMES = {
+        "required": "必填字段为空",
+        "primary_key": "主键重复",
+        "decimal": "数值无法解析",
+        "boolean": "布尔取值无效"
     }
     
-    def __init__(self, schema_path: str = "煤矿采空区普查数据集Schema.json"):
+    # 报告中每条规则最多列出的行号数
+    MAX_ROWS_IN_MESSAGE = 10
+    
+    # 性能指标文件名（开启instrument时save_report写入报告所在目录）
+    METRICS_FILE = "验证指标.json"
+    
+    # 外键单元格中多个ID的分隔符（与MineDataset共用）
+    REFERENCE_SEPARATOR = MineSchema.REFERENCE_SEPARATOR
+    
+    def __init__(self, schema_path: str = "煤矿采空区普查数据集Schema.json",
+                 table_source: Optional[MineTableSource] = None, instrument: bool = False,
+                 json_backend: str = "auto"):
         """
         初始化验证器
         
         Args:
             schema_path: Schema文件路径
+            table_source: CSV表读取器，可与ToJson共用以避免重复解析
+            instrument: 按煤矿记录各验证方法的耗时、峰值内存，以及各表的行数、
+                        读取字节和CSV命中的编码/解析方式（见self.metrics）
+            json_backend: 整体加载JSON时的解析后端，"auto"（默认，安装了orjson时使用orjson）、"json"或"orjson"
         """
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            self.schema = json.load(f)
+        self.mine_schema = MineSchema(schema_path)
+        self.schema = self.mine_schema.schema
         
         # 构建表定义字典
-        self.tables = {table['table_id']: table for table in self.schema['tables']}
-        self.table_name_map = {table['table_name']: table for table in self.schema['tables']}
+        self.tables = self.mine_schema.tables
+        self.table_name_map = self.mine_schema.table_name_map
+        
+        # 把Schema编译为按表的字段检查
+        self.field_checks = self._compile_field_checks()
+        
+        # 外键关系：[(子表, 外键字段, 被引用表)]
+        self.references = self._compile_references()
+        
+        # 按目录缓存读取器，同一次运行中各方法共享解析结果
+        self._sources: Dict[Path, MineTableSource] = {}
+        if table_source is not None:
+            self._sources[table_source.data_dir.resolve()] = table_source
+        
+        # 性能指标，未开启instrument时为None
+        self.metrics: Optional[MineMetrics] = MineMetrics() if instrument else None
+        
+        self.json_backend = get_json_backend(json_backend)
+    
+    def _table_source(self, data_dir: Union[str, MineTableSource]) -> MineTableSource:
+        """返回目录对应的CSV表读取器；传入读取器（如MineBufferSource）时直接使用"""
+        if isinstance(data_dir, MineTableSource):
+            return data_dir
+        key = Path(data_dir).resolve()
+        if key not in self._sources:
+            self._sources[key] = MineTableSource(data_dir)
+        return self._sources[key]
     
-    def validate_csv(self, mine_name: str, data_dir: str = ".") -> Dict:
+    def _load(self, source: MineTableSource, mine_name: str, table_cn: str) -> pd.DataFrame:
+        """读取一个表；开启instrument时记录读取耗时、行数和读取情况"""
+        if self.metrics is None:
+            return source.load(mine_name, table_cn)
+        with self.metrics.stage(mine_name, "read", table_cn):
+            df = source.load(mine_name, table_cn)
+        self.metrics.record_table(mine_name, table_cn, len(df), source.read_info.get((mine_name, table_cn)))
+        return df
+    
+    @_instrumented
+    def validate_csv(self, mine_name: str, data_dir: Union[str, MineTableSource] = ".") -> Dict:
         """
         验证CSV文件
         
         Args:
             mine_name: 煤矿名称
-            data_dir: CSV文件目录
+            data_dir: CSV文件目录，或CSV表读取器（如内存中的MineBufferSource）
             
         Returns:
             验证结果
@@ -56,7 +128,8 @@ class Validator:
         print(f"\n📋 验证CSV文件: {mine_name}")
         print("=" * 80)
         
-        data_path = Path(data_dir)
+        source = self._table_source(data_dir)
+        source.ensure_fresh()
         results = {
             "mine_name": mine_name,
             "total_tables": 10,
@@ -68,21 +141,13 @@ class Validator:
         }
         
         for table_cn, table_en in self.TABLE_MAPPING.items():
-            file_path = data_path / f"{mine_name}-{table_cn}.csv"
-            
-            if file_path.exists():
+            if source.has_table(mine_name, table_cn):
                 try:
-                    # 尝试读取CSV
-                    df = None
-                    for encoding in ['utf-8', 'utf-8-sig', 'gbk', 'gb2312']:
-                        try:
-                            df = pd.read_csv(file_path, encoding=encoding, on_bad_lines='skip')
-                            break
-                        except:
-                            continue
-                    
-                    if df is None:
-                        results["errors"].append(f"{table_cn}: 无法读取文件")
+                    # 读取CSV
+                    try:
+                        df = self._load(source, mine_name, table_cn)
+                    except Exception as e:
+                        results["errors"].append(f"{table_cn}: 无法读取文件 - {e}")
                         continue
                     
                     results["found_tables"] += 1
@@ -124,21 +189,264 @@ class Validator:
         
         return results
     
-    def validate_json(self, json_path: str) -> Dict:
+    @_instrumented
+    def validate_fields(self, mine_name: str, data_dir: Union[str, MineTableSource] = ".") -> Dict:
+        """
+        字段级Schema验证：必填非空、主键唯一、decimal可解析、boolean取值
+        
+        所有检查按列向量化执行，每条违规记录给出数据行号（从1开始）。
+        
+        Args:
+            mine_name: 煤矿名称
+            data_dir: CSV文件目录，或CSV表读取器（如内存中的MineBufferSource）
+            
+        Returns:
+            验证结果
+        """
+        print(f"\n📋 字段级验证: {mine_name}")
+        print("=" * 80)
+        
+        source = self._table_source(data_dir)
+        source.ensure_fresh()
+        results = {
+            "mine_name": mine_name,
+            "valid": True,
+            "checked_rows": 0,
+            "total_errors": 0,
+            "errors": [],
+            "table_details": {}
+        }
+        
+        for table_cn in self.TABLE_MAPPING:
+            if not source.has_table(mine_name, table_cn):
+                continue
+            try:
+                df = self._load(source, mine_name, table_cn)
+            except Exception as e:
+                results["errors"].append(f"{table_cn}: 无法读取文件 - {e}")
+                results["valid"] = False
+                continue
+            
+            violations = self._run_field_checks(table_cn, df)
+            error_count = sum(v["count"] for v in violations)
+            results["checked_rows"] += len(df)
+            results["total_errors"] += error_count
+            results["table_details"][table_cn] = {
+                "records": len(df),
+                "violations": violations
+            }
+            
+            for v in violations:
+                preview = ", ".join(str(row) for row in v["rows"][:self.MAX_ROWS_IN_MESSAGE])
+                more = " ..." if v["count"] > self.MAX_ROWS_IN_MESSAGE else ""
+                results["errors"].append(
+                    f"{table_cn}.{v['field']}: {self.RULE_NAMES[v['rule']]} {v['count']}行 (行号: {preview}{more})"
+                )
+            
+            if error_count:
+                results["valid"] = False
+                print(f"  ❌ {table_cn}: {error_count}处违规")
+            else:
+                print(f"  ✅ {table_cn}: {len(df)}条记录通过")
+        
+        return results
+    
+    def _compile_field_checks(self) -> Dict[str, List[Tuple[str, str, Callable[[pd.Series], np.ndarray]]]]:
+        """
+        把Schema编译为按表的字段检查列表
+        
+        Returns:
+            {中文表名: [(规则, 字段名, 检查函数)]}，检查函数返回违规行的布尔数组
+        """
+        compiled = {}
+        for table_cn in self.TABLE_MAPPING:
+            table = self.mine_schema.table(table_cn)
+            if not table:
+                continue
+            checks = []
+            for field in table['fields']:
+                name = field['name']
+                if field.get('required'):
+                    checks.append(("required", name, self._check_required))
+                if field.get('primary_key') or table.get('primary_key') == name:
+                    checks.append(("primary_key", name, self._check_unique))
+                if field['type'] == "decimal":
+                    checks.append(("decimal", name, self._check_decimal))
+                elif field['type'] == "boolean":
+                    checks.append(("boolean", name, self._check_boolean))
+            compiled[table_cn] = checks
+        return compiled
+    
+    def _run_field_checks(self, table_cn: str, df: pd.DataFrame) -> List[Dict]:
+        """对一个表执行编译好的检查，返回违规列表"""
+        violations = []
+        for rule, name, check in self.field_checks.get(table_cn, []):
+            if name not in df.columns:
+                # 缺少的字段由validate_csv报告
+                continue
+            mask = check(df[name])
+            if mask.any():
+                rows = (np.flatnonzero(mask) + 1).tolist()
+                violations.append({"rule": rule, "field": name, "count": len(rows), "rows": rows})
+        return violations
+    
+    @staticmethod
+    def _check_required(column: pd.Series) -> np.ndarray:
+        """必填字段：空值或空白字符串"""
+        missing = column.isna()
+        if column.dtype == object or pd.api.types.is_string_dtype(column.dtype):
+            missing = missing | (column.astype(str).str.strip() == "")
+        return missing.to_numpy(dtype=bool)
+    
+    @staticmethod
+    def _check_unique(column: pd.Series) -> np.ndarray:
+        """主键：非空值重复"""
+        return (column.duplicated(keep=False) & column.notna()).to_numpy(dtype=bool)
+    
+    @staticmethod
+    def _check_decimal(column: pd.Series) -> np.ndarray:
+        """decimal字段：非空值去掉脱敏符号￥后仍无法解析为数字"""
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            return np.zeros(len(column), dtype=bool)
+        present = column.notna()
+        text = column.astype(str).str.replace("￥", "", regex=False).str.strip()
+        numbers = pd.to_numeric(text.where(present), errors='coerce')
+        return (present & numbers.isna()).to_numpy(dtype=bool)
+    
+    @staticmethod
+    def _check_boolean(column: pd.Series) -> np.ndarray:
+        """boolean字段：非空值不在布尔取值范围内"""
+        present = column.notna()
+        if pd.api.types.is_bool_dtype(column.dtype):
+            return np.zeros(len(column), dtype=bool)
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            return (present & ~column.isin([0, 1])).to_numpy(dtype=bool)
+        domain = MineSchema.TRUE_VALUES | MineSchema.FALSE_VALUES
+        text = column.astype(str).str.strip().str.lower()
+        return (present & ~text.isin(domain)).to_numpy(dtype=bool)
+    
+    @_instrumented
+    def validate_references(self, mine_name: str, data_dir: Union[str, MineTableSource] = ".") -> Dict:
+        """
+        跨表引用完整性验证：子表的外键goaf_id必须存在于采空区基本信息表
+        
+        每个煤矿只建立一次被引用ID的集合，子表外键列拆分多值后整列做集合查找；
+        空值按Schema的flexible_goaf_association允许通过。
+        
+        Args:
+            mine_name: 煤矿名称
+            data_dir: CSV文件目录，或CSV表读取器（如内存中的MineBufferSource）
+            
+        Returns:
+            验证结果
+        """
+        print(f"\n🔗 引用完整性验证: {mine_name}")
+        print("=" * 80)
+        
+        source = self._table_source(data_dir)
+        source.ensure_fresh()
+        results = {
+            "mine_name": mine_name,
+            "valid": True,
+            "total_errors": 0,
+            "errors": [],
+            "table_details": {}
+        }
+        
+        key_index: Dict[Tuple[str, str], pd.Index] = {}
+        for child_cn, field, parent_cn in self.references:
+            if not source.has_table(mine_name, child_cn):
+                continue
+            try:
+                child = self._load(source, mine_name, child_cn)
+            except Exception as e:
+                results["errors"].append(f"{child_cn}: 无法读取文件 - {e}")
+                results["valid"] = False
+                continue
+            if field not in child.columns:
+                continue
+            
+            if (parent_cn, field) not in key_index:
+                key_index[(parent_cn, field)] = self._reference_keys(source, mine_name, parent_cn, field)
+            keys = key_index[(parent_cn, field)]
+            
+            values = self._split_references(child[field])
+            missing = values[~values.isin(keys)]
+            rows = (np.unique(missing.index.to_numpy()) + 1).tolist()
+            results["table_details"][child_cn] = {
+                "field": field,
+                "references": int(len(values)),
+                "rows": rows,
+                "missing_values": sorted(missing.unique().tolist())
+            }
+            
+            if rows:
+                results["valid"] = False
+                results["total_errors"] += len(rows)
+                preview = ", ".join(str(row) for row in rows[:self.MAX_ROWS_IN_MESSAGE])
+                more = " ..." if len(rows) > self.MAX_ROWS_IN_MESSAGE else ""
+                results["errors"].append(
+                    f"{child_cn}.{field}: {len(rows)}行引用了{parent_cn}中不存在的ID (行号: {preview}{more})"
+                )
+                print(f"  ❌ {child_cn}: {len(rows)}行引用无效")
+            else:
+                print(f"  ✅ {child_cn}: {len(values)}个引用有效")
+        
+        return results
+    
+    def _compile_references(self) -> List[Tuple[str, str, str]]:
+        """
+        从Schema提取外键关系（见MineSchema.references），只保留已知的表
+        
+        Returns:
+            [(子表, 外键字段, 被引用表)]
+        """
+        return [(child_cn, field, parent_cn) for child_cn, field, parent_cn in self.mine_schema.references()
+                if child_cn in self.TABLE_MAPPING and parent_cn in self.TABLE_MAPPING]
+    
+    def _reference_keys(self, source: MineTableSource, mine_name: str, parent_cn: str, field: str) -> pd.Index:
+        """被引用表的ID集合（哈希索引）；表不存在时为空"""
+        if not source.has_table(mine_name, parent_cn):
+            return pd.Index([], dtype=object)
+        try:
+            parent = self._load(source, mine_name, parent_cn)
+        except Exception:
+            return pd.Index([], dtype=object)
+        if field not in parent.columns:
+            return pd.Index([], dtype=object)
+        return pd.Index(parent[field].dropna().astype(str).str.strip().unique())
+    
+    @classmethod
+    def _split_references(cls, column: pd.Series) -> pd.Series:
+        """
+        拆分外键列中的多值单元格，去掉空值
+        
+        Returns:
+            每个引用一行的Series，索引为原数据行位置（从0开始）
+        """
+        values = column.reset_index(drop=True).dropna().astype(str)
+        values = values.str.split(cls.REFERENCE_SEPARATOR, regex=True).explode().str.strip()
+        return values[values != ""]
+    
+    @_instrumented
+    def validate_json(self, json_path: Union[str, BufferLike], stream: bool = False) -> Dict:
         """
         验证JSON文件
         
         Args:
-            json_path: JSON文件路径
+            json_path: JSON文件路径，或内存中的JSON内容（bytes或文件对象）；
+                       紧凑格式、列式布局和gzip/zstd压缩的输出均可直接读取
+            stream: 流式验证：逐条增量解析记录，内存占用与文件大小无关；
+                    非有限数值按NaN/Infinity原文检查
             
         Returns:
             验证结果
         """
-        print(f"\n📋 验证JSON文件: {json_path}")
+        print(f"\n📋 验证JSON文件: {self._json_name(json_path)}")
         print("=" * 80)
         
         results = {
-            "file": json_path,
+            "file": self._json_name(json_path),
             "valid": True,
             "total_records": 0,
             "errors": [],
@@ -147,13 +455,12 @@ class Validator:
         }
         
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            summary = self._scan_json(json_path) if stream else self._summarize_json(self._load_json(json_path))
             
             # 检查顶层结构
             required_keys = ['mine_info', 'statistics', 'data']
             for key in required_keys:
-                if key not in data:
+                if key not in summary["keys"]:
                     results["errors"].append(f"缺少顶层字段: {key}")
                     results["valid"] = False
             
@@ -162,19 +469,17 @@ class Validator:
             
             # 检查每个表
             for table_cn, table_en in self.TABLE_MAPPING.items():
-                if table_en in data['data']:
-                    records = data['data'][table_en]
-                    record_count = len(records)
+                if table_en in summary["counts"]:
+                    record_count = summary["counts"][table_en]
                     results["total_records"] += record_count
                     
-                    # 检查是否包含NaN
-                    json_str = json.dumps(records)
-                    if 'NaN' in json_str:
-                        results["errors"].append(f"{table_cn}: 包含NaN值（应为null）")
+                    # 检查是否包含NaN、Infinity
+                    for token in sorted({t.lstrip('-') for t in summary["nonfinite"].get(table_en, ())}):
+                        results["errors"].append(f"{table_cn}: 包含{token}值（应为null）")
                     
                     # 检查统计数是否一致
-                    if table_en in data['statistics']:
-                        stat_count = data['statistics'][table_en]
+                    if table_en in summary["statistics"]:
+                        stat_count = summary["statistics"][table_en]
                         if stat_count != record_count:
                             results["warnings"].append(
                                 f"{table_cn}: 统计数({stat_count})与实际记录数({record_count})不一致"
@@ -201,14 +506,88 @@ class Validator:
         
         return results
     
-    def compare_csv_json(self, mine_name: str, json_path: str, csv_dir: str = ".") -> Dict:
+    @classmethod
+    def _summarize_json(cls, data: Dict) -> Dict:
+        """
+        汇总已加载的JSON：顶层键、statistics、各表记录数、含NaN/Infinity的表
+        
+        Returns:
+            {"keys", "statistics", "counts", "nonfinite"}，与_scan_json相同
+        """
+        tables = data.get('data', {})
+        return {
+            "keys": list(data),
+            "statistics": data.get('statistics', {}),
+            "counts": {table_en: cls._table_length(records) for table_en, records in tables.items()},
+            "nonfinite": {table_en: tokens for table_en, tokens in
+                          ((table_en, cls._nonfinite_tokens(records)) for table_en, records in tables.items())
+                          if tokens}
+        }
+    
+    @staticmethod
+    def _nonfinite_tokens(value) -> Set[str]:
+        """值中非有限浮点数的写法（"NaN"、"Infinity"），与流式验证记录的一致"""
+        tokens = set()
+        
+        def visit(items):
+            for item in items:
+                item_type = type(item)
+                if item_type is float:
+                    if not math.isfinite(item):
+                        tokens.add("NaN" if math.isnan(item) else "Infinity")
+                elif item_type is dict:
+                    visit(item.values())
+                elif item_type is list:
+                    visit(item)
+        
+        visit([value])
+        return tokens
+    
+    @classmethod
+    def _scan_json(cls, json_path) -> Dict:
+        """
+        流式汇总JSON：逐条解析记录，只保留各表的计数和遇到的非有限数值
+        
+        Returns:
+            {"keys", "statistics", "counts", "nonfinite"}
+        """
+        summary = {"keys": [], "statistics": {}, "counts": {}, "nonfinite": {}}
+        current = None
+        
+        def on_constant(token: str) -> float:
+            if current is not None:
+                summary["nonfinite"].setdefault(current, set()).add(token)
+            return float(token)
+        
+        with cls._open_json(json_path) as f:
+            reader = MineJsonReader(f, parse_constant=on_constant)
+            for kind, name, value in reader.events():
+                if kind == "record":
+                    summary["counts"][name] += 1
+                elif kind == "table":
+                    current = name
+                    summary["counts"][name] = 0
+                elif kind == "columns":
+                    continue
+                elif kind == "end":
+                    # data之后的顶层字段（如statistics）中的NaN/Infinity不计入最后一个表
+                    current = None
+                elif name == "statistics":
+                    summary["statistics"] = value
+        summary["keys"] = reader.keys
+        return summary
+    
+    @_instrumented
+    def compare_csv_json(self, mine_name: str, json_path: Union[str, BufferLike],
+                         csv_dir: Union[str, MineTableSource] = ".", stream: bool = False) -> Dict:
         """
         比对CSV和JSON，检查转换是否正确
         
         Args:
             mine_name: 煤矿名称
-            json_path: JSON文件路径
-            csv_dir: CSV文件目录
+            json_path: JSON文件路径，或内存中的JSON内容
+            csv_dir: CSV文件目录，或CSV表读取器
+            stream: 流式读取JSON，只统计各表记录数，不在内存中保留记录
             
         Returns:
             比对结果
@@ -224,41 +603,35 @@ class Validator:
             "table_comparison": {}
         }
         
-        # 读取JSON
+        # 读取JSON各表记录数
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
+            if stream:
+                json_counts = self._scan_json(json_path)["counts"]
+            else:
+                json_counts = {table_en: self._table_length(records)
+                               for table_en, records in self._load_json(json_path).get('data', {}).items()}
         except Exception as e:
             results["errors"].append(f"无法读取JSON: {str(e)}")
             results["match"] = False
             return results
         
         # 比对每个表
-        csv_path = Path(csv_dir)
+        source = self._table_source(csv_dir)
+        source.ensure_fresh()
         for table_cn, table_en in self.TABLE_MAPPING.items():
-            csv_file = csv_path / f"{mine_name}-{table_cn}.csv"
-            
             csv_count = 0
             json_count = 0
             
             # CSV记录数
-            if csv_file.exists():
+            if source.has_table(mine_name, table_cn):
                 try:
-                    df = None
-                    for encoding in ['utf-8', 'utf-8-sig', 'gbk', 'gb2312']:
-                        try:
-                            df = pd.read_csv(csv_file, encoding=encoding, on_bad_lines='skip')
-                            break
-                        except:
-                            continue
-                    if df is not None:
-                        csv_count = len(df)
-                except:
+                    csv_count = len(self._load(source, mine_name, table_cn))
+                except Exception:
                     pass
             
             # JSON记录数
-            if table_en in json_data.get('data', {}):
-                json_count = len(json_data['data'][table_en])
+            if table_en in json_counts:
+                json_count = json_counts[table_en]
             
             # 比对
             match = (csv_count == json_count)
@@ -282,8 +655,75 @@ class Validator:
         
         return results
     
-    def generate_report(self, csv_result: Dict, json_result: Dict, compare_result: Dict) -> str:
-        """生成验证报告"""
+    def validate_buffers(self, mine_name: str, tables: Dict[str, BufferLike],
+                         json_data: BufferLike) -> Tuple[Dict, Dict, Dict]:
+        """
+        验证内存中的CSV和JSON（如Web上传的文件），不写临时文件
+        
+        Args:
+            mine_name: 煤矿名称
+            tables: {中文表名: 表数据}，同ToJson.convert_mine_from_buffers
+            json_data: JSON内容（bytes或文件对象）
+            
+        Returns:
+            (CSV验证结果, JSON验证结果, 比对结果)
+        """
+        source = MineBufferSource({mine_name: tables})
+        csv_result = self.validate_csv(mine_name, source)
+        json_result = self.validate_json(json_data)
+        compare_result = self.compare_csv_json(mine_name, json_data, source)
+        return csv_result, json_result, compare_result
+    
+    @staticmethod
+    def _json_name(json_path) -> str:
+        """JSON来源的显示名称"""
+        if isinstance(json_path, (str, Path)):
+            return str(json_path)
+        return getattr(json_path, 'name', '<内存>')
+    
+    @staticmethod
+    def _table_length(table) -> int:
+        """表的记录数：记录数组的长度，或列式布局中rows的长度"""
+        if isinstance(table, dict):
+            return len(table.get('rows', []))
+        return len(table)
+    
+    @staticmethod
+    @contextmanager
+    def _open_json(json_path) -> Iterator[IO[str]]:
+        """
+        以UTF-8文本流打开JSON：路径直接打开，内存内容按视图读取，文件对象不复制；
+        按文件头自动识别gzip/zstd压缩
+        """
+        if isinstance(json_path, io.TextIOBase):
+            yield json_path
+            return
+        with ExitStack() as stack:
+            if isinstance(json_path, (str, Path)):
+                binary = stack.enter_context(open(json_path, 'rb'))
+            elif hasattr(json_path, 'getbuffer') or not hasattr(json_path, 'read'):
+                binary = MineBufferSource.open_view(json_path)
+            else:
+                binary = json_path
+            decompressed = open_decompressed(binary)
+            if decompressed is not binary:
+                stack.enter_context(decompressed)
+            f = io.TextIOWrapper(decompressed, encoding='utf-8')
+            try:
+                yield f
+            finally:
+                # 不关闭调用方传入的文件对象
+                f.detach()
+    
+    def _load_json(self, json_path) -> Dict:
+        """读取整个JSON（自动识别压缩）"""
+        with self._open_json(json_path) as f:
+            return self.json_backend.loads(f.read())
+    
+    def generate_report(self, csv_result: Dict, json_result: Dict, compare_result: Dict,
+                        field_result: Optional[Dict] = None,
+                        reference_result: Optional[Dict] = None) -> str:
+        """生成验证报告（field_result、reference_result为字段级和引用完整性验证结果，可选）"""
         report = []
         report.append("=" * 80)
         report.append("数据集验证报告")
@@ -306,6 +746,29 @@ class Validator:
                 report.append(f"  ⚠️ {warning}")
         report.append("")
         
+        # 字段级验证结果
+        if field_result is not None:
+            report.append("📋 字段级验证")
+            report.append("-" * 80)
+            report.append(f"检查记录数: {field_result['checked_rows']}")
+            report.append(f"通过: {'✅ 是' if field_result['valid'] else '❌ 否'}")
+            if field_result['errors']:
+                report.append(f"违规: {field_result['total_errors']}处")
+                for error in field_result['errors']:
+                    report.append(f"  ❌ {error}")
+            report.append("")
+        
+        # 引用完整性验证结果
+        if reference_result is not None:
+            report.append("🔗 引用完整性验证")
+            report.append("-" * 80)
+            report.append(f"通过: {'✅ 是' if reference_result['valid'] else '❌ 否'}")
+            if reference_result['errors']:
+                report.append(f"无效引用: {reference_result['total_errors']}行")
+                for error in reference_result['errors']:
+                    report.append(f"  ❌ {error}")
+            report.append("")
+        
         # JSON验证结果
         report.append("📋 JSON文件验证")
         report.append("-" * 80)
@@ -332,12 +795,24 @@ class Validator:
                 report.append(f"  ❌ {error}")
         report.append("")
         
+        # 性能指标
+        if self.metrics is not None:
+            report.append("⏱️ 性能指标")
+            report.append("-" * 80)
+            for name in (csv_result['mine_name'], json_result['file']):
+                if name in self.metrics.mines:
+                    report.append(name)
+                    report.extend(self.metrics.report_lines(name))
+            report.append("")
+        
         # 总结
         report.append("=" * 80)
         all_ok = (
             not csv_result['errors'] and 
             json_result['valid'] and 
-            compare_result['match']
+            compare_result['match'] and
+            (field_result is None or field_result['valid']) and
+            (reference_result is None or reference_result['valid'])
         )
         if all_ok:
             report.append("✅ 验证通过！CSV和JSON数据一致，转换正确。")
@@ -346,6 +821,23 @@ class Validator:
         report.append("=" * 80)
         
         return "\n".join(report)
+    
+    def save_report(self, report: str, report_path: Union[str, Path]):
+        """
+        保存验证报告；开启instrument时在同一目录写出结构化的性能指标（METRICS_FILE）
+        
+        Args:
+            report: generate_report生成的报告文本
+            report_path: 报告文件路径
+        """
+        report_path = Path(report_path)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"\n📄 报告已保存: {report_path}")
+        if self.metrics is not None:
+            metrics_file = report_path.parent / self.METRICS_FILE
+            self.metrics.save(metrics_file)
+            print(f"⏱️ 性能指标已保存: {metrics_file}")
 
 
 def main():
@@ -354,17 +846,24 @@ def main():
         print("用法:")
         print("  python Validator.py <煤矿名称>")
         print("  python Validator.py 河西联办煤矿")
+        print("  python Validator.py 河西联办煤矿 --instrument   # 同时写出验证指标.json")
         sys.exit(1)
     
     mine_name = sys.argv[1]
     json_file = f"{mine_name}-采空区数据集.json"
     
     # 创建验证器
-    validator = Validator()
+    validator = Validator(instrument="--instrument" in sys.argv[2:])
     
     # 验证CSV
     csv_result = validator.validate_csv(mine_name)
     
+    # 字段级验证
+    field_result = validator.validate_fields(mine_name)
+    
+    # 引用完整性验证
+    reference_result = validator.validate_references(mine_name)
+    
     # 验证JSON
     json_result = validator.validate_json(json_file)
     
@@ -372,13 +871,11 @@ def main():
     compare_result = validator.compare_csv_json(mine_name, json_file)
     
     # 生成报告
-    report = validator.generate_report(csv_result, json_result, compare_result)
+    report = validator.generate_report(csv_result, json_result, compare_result, field_result, reference_result)
     print("\n" + report)
     
-    # 保存报告
-    with open(f"{mine_name}-验证报告.txt", 'w', encoding='utf-8') as f:
-        f.write(report)
-    print(f"\n📄 报告已保存: {mine_name}-验证报告.txt")
+    # 保存报告（开启instrument时同时写出性能指标）
+    validator.save_report(report, f"{mine_name}-验证报告.txt")
 
 
 if __name__ == "__main__":
@@ -7,8 +7,8 @@
 
 import streamlit as st
 import pandas as pd
-import json
 import zipfile
+import os
 from io import BytesIO
 from pathlib import Path
 import sys
@@ -18,6 +18,40 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from ToJson import ToJson
 from Validator import Validator
+from MineTableSource import MineTableSource, MineBufferSource
+from ResultCache import ResultCache
+
+
+@st.cache_resource
+def get_converter():
+    """进程内共享的转换器（Schema只加载一次；内存转换每次使用独立的读取器和临时转换器，会话间互不影响）"""
+    return ToJson()
+
+
+@st.cache_resource
+def get_validator():
+    """进程内共享的验证器（Schema只加载和编译一次）"""
+    return Validator()
+
+
+@st.cache_resource
+def get_result_cache():
+    """进程内共享的转换结果缓存，按输出字节数限制大小"""
+    return ResultCache()
+
+
+def collect_tables(files, mine_name):
+    """按"{煤矿名称}-{表名}.csv"文件名取出该煤矿的上传文件：返回({中文表名: 文件}, 未使用的文件名)"""
+    tables = {}
+    skipped = []
+    for file in files:
+        parsed = MineTableSource.parse_file_name(file.name)
+        if parsed is None or parsed[0] != mine_name:
+            skipped.append(file.name)
+        else:
+            tables[parsed[1]] = file
+    return tables, skipped
+
 
 # 页面配置
 st.set_page_config(
@@ -41,6 +75,8 @@ with st.sidebar:
     3. 点击"转换为JSON"
     4. 下载转换结果
     
+    多个煤矿可打包为ZIP，在"批量转换"中一次上传。
+    
     ### 支持的表：
     - 采空区基本信息
     - 采空区积水信息
@@ -93,18 +129,22 @@ with tab1:
     if st.button("🚀 转换为JSON", type="primary", disabled=not (mine_name and uploaded_files)):
         with st.spinner("正在转换..."):
             try:
-                # 保存上传的文件到临时目录
-                temp_dir = Path("temp_upload")
-                temp_dir.mkdir(exist_ok=True)
+                # 直接从上传文件的内存缓冲解析，不写临时文件，多个会话互不影响
+                tables, skipped = collect_tables(uploaded_files, mine_name)
+                if skipped:
+                    st.warning(f"以下文件与煤矿名称或表名不匹配，已忽略: {', '.join(skipped)}")
+                
+                # 转换（流式写出到内存缓冲）；相同煤矿名称和上传内容直接使用缓存的结果
+                converter = get_converter()
+                views = {table_cn: MineBufferSource.as_view(file) for table_cn, file in tables.items()}
                 
-                for file in uploaded_files:
-                    file_path = temp_dir / file.name
-                    with open(file_path, 'wb') as f:
-                        f.write(file.getbuffer())
+                def convert():
+                    json_buffer = BytesIO()
+                    result = converter.convert_mine_from_buffers(mine_name, views, json_buffer, stream=True)
+                    return result, json_buffer.getvalue()
                 
-                # 转换
-                converter = ToJson(data_dir=str(temp_dir))
-                result = converter.convert_mine(mine_name)
+                cache_key = ResultCache.make_key(mine_name, views, converter.options)
+                result, json_bytes = get_result_cache().get_or_create(cache_key, convert)
                 
                 # 显示统计
                 st.success("✅ 转换成功！")
@@ -126,18 +166,59 @@ with tab1:
                     st.dataframe(stats_df, use_container_width=True)
                 
                 # 下载按钮
-                json_str = json.dumps(result, ensure_ascii=False, indent=2)
                 st.download_button(
                     label="📥 下载JSON文件",
-                    data=json_str,
+                    data=json_bytes,
                     file_name=f"{mine_name}-采空区数据集.json",
                     mime="application/json"
                 )
                 
-                # 清理临时文件
-                import shutil
-                shutil.rmtree(temp_dir)
+            except Exception as e:
+                st.error(f"❌ 转换失败: {str(e)}")
+    
+    # 批量转换：ZIP压缩包
+    st.divider()
+    st.subheader("批量转换（ZIP压缩包）")
+    zip_file = st.file_uploader(
+        "选择ZIP压缩包",
+        type=['zip'],
+        key="convert_zip",
+        help="压缩包内的CSV按 {煤矿名称}-{表名}.csv 自动分组，可包含多个煤矿和子目录"
+    )
+    
+    if st.button("🚀 批量转换", disabled=not zip_file):
+        with st.spinner("正在批量转换..."):
+            try:
+                # 直接从压缩包读取CSV，不解压到磁盘；多个煤矿并行转换
+                zip_buffer = BytesIO()
+                results, report_text = get_converter().convert_zip(
+                    zip_file, zip_buffer, workers=min(4, os.cpu_count() or 1)
+                )
+                
+                success_count = sum(1 for r in results if r['success'])
+                if success_count == len(results):
+                    st.success(f"✅ 转换成功！共 {len(results)} 个煤矿")
+                else:
+                    st.warning(f"⚠️ {success_count}/{len(results)} 个煤矿转换成功")
                 
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("煤矿数", len(results))
+                with col2:
+                    st.metric("总记录数", sum(r.get('record_count', 0) for r in results))
+                
+                with st.expander("📄 转换报告"):
+                    st.text(report_text)
+                
+                st.download_button(
+                    label="📥 下载转换结果（ZIP）",
+                    data=zip_buffer.getvalue(),
+                    file_name=f"{Path(zip_file.name).stem}-JSON.zip",
+                    mime="application/zip"
+                )
+                
+            except zipfile.BadZipFile:
+                st.error("❌ 转换失败: 不是有效的ZIP文件")
             except Exception as e:
                 st.error(f"❌ 转换失败: {str(e)}")
 
@@ -167,30 +248,16 @@ with tab2:
     if st.button("🔍 验证数据", disabled=not (csv_files and json_file)):
         with st.spinner("正在验证..."):
             try:
-                # 保存文件
-                temp_dir = Path("temp_validate")
-                temp_dir.mkdir(exist_ok=True)
-                
-                # 保存CSV
-                for file in csv_files:
-                    file_path = temp_dir / file.name
-                    with open(file_path, 'wb') as f:
-                        f.write(file.getbuffer())
-                
-                # 保存JSON
-                json_path = temp_dir / json_file.name
-                with open(json_path, 'wb') as f:
-                    f.write(json_file.getbuffer())
-                
-                # 验证
-                validator = Validator()
+                # 验证（直接读取上传文件的内存缓冲）
+                validator = get_validator()
                 
                 # 从文件名提取煤矿名称
                 mine_name_val = json_file.name.split('-')[0]
                 
-                csv_result = validator.validate_csv(mine_name_val, str(temp_dir))
-                json_result = validator.validate_json(str(json_path))
-                compare_result = validator.compare_csv_json(mine_name_val, str(json_path), str(temp_dir))
+                tables, _ = collect_tables(csv_files, mine_name_val)
+                csv_result, json_result, compare_result = validator.validate_buffers(
+                    mine_name_val, tables, json_file
+                )
                 
                 # 显示结果
                 if compare_result['match']:
@@ -219,10 +286,6 @@ with tab2:
                         for error in csv_result['errors'] + json_result['errors'] + compare_result['errors']:
                             st.error(error)
                 
-                # 清理
-                import shutil
-                shutil.rmtree(temp_dir)
-                
             except Exception as e:
                 st.error(f"❌ 验证失败: {str(e)}")
 
@@ -241,6 +304,9 @@ with tab3:
     3. 点击"转换为JSON"按钮
     4. 下载生成的JSON文件
     
+    #### 批量转换：
+    把多个煤矿的CSV打包为一个ZIP（可包含子目录）上传，下载的ZIP中包含每个煤矿的JSON和 `转换报告.txt`。
+    
     #### 文件命名规范：
     CSV文件必须遵循以下命名格式：
     ```
@@ -0,0 +1,124 @@
+"""
+JSON后端对比基准 - bench_json
+用synthetic生成的合成煤矿对比标准库json与orjson：缩进/紧凑格式的写出、
+convert_mine端到端，以及validate_json整体加载；并检查缩进格式的输出逐字节一致
+
+用法:
+    python benchmarks/bench_json.py [--mines 煤矿数] [--rows 每矿行数] [--repeat 次数]
+
+版本: 1.0.0
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# 添加仓库根目录到路径
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+
+from ToJson import ToJson
+from Validator import Validator
+from MineTableSource import MineTableSource
+from MineJson import JSON_BACKENDS, MineJsonWriter, get_json_backend
+from MineSchema import MineSchema
+from synthetic import SyntheticMineGenerator
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    """多次运行取最短耗时，运行中的打印输出被屏蔽"""
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def write_records(records: Dict, backend_name: str, indent) -> str:
+    """用MineJsonWriter把已构建的记录写为完整文档"""
+    out = io.StringIO()
+    writer = MineJsonWriter(out, indent=indent, backend=get_json_backend(backend_name))
+    for table_cn, table_records in records.items():
+        writer.begin_table(MineTableSource.TABLE_MAPPING[table_cn])
+        writer.write_records(table_records)
+        writer.end_table()
+    writer.finish({"mine_name": "基准"}, {t: len(r) for t, r in records.items()})
+    return out.getvalue()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="JSON后端对比基准")
+    parser.add_argument("--mines", type=int, default=1, help="煤矿数")
+    parser.add_argument("--rows", type=int, default=100_000, help="每个煤矿的总行数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最短）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    backends = [name for name in JSON_BACKENDS if _available(name)]
+    work_dir = Path(tempfile.mkdtemp(prefix="mine-bench-json-"))
+    try:
+        data_dir = work_dir / "csv"
+        generator = SyntheticMineGenerator(seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.generate(data_dir, args.mines, args.rows)
+        mine_names = [generator.mine_name(i) for i in range(args.mines)]
+        rows = args.mines * sum(generator.table_rows(args.rows).values())
+
+        source = MineTableSource(str(data_dir))
+        records = [{t: ToJson._frame_to_records(source.load(m, t)) for t in MineTableSource.TABLE_MAPPING}
+                   for m in mine_names]
+
+        # 缩进格式的输出必须与标准库逐字节一致
+        expected = [write_records(r, "json", MineJsonWriter.INDENT) for r in records]
+        for name in backends:
+            same = all(write_records(r, name, MineJsonWriter.INDENT) == e for r, e in zip(records, expected))
+            print(f"{name:<8} 缩进格式与标准库一致: {'是' if same else '否'}")
+
+        json_files = []
+        for mine_name in mine_names:
+            json_file = work_dir / f"{mine_name}.json"
+            with contextlib.redirect_stdout(io.StringIO()):
+                ToJson(str(data_dir), json_backend="json").convert_mine(mine_name, str(json_file))
+            json_files.append(json_file)
+        size = sum(p.stat().st_size for p in json_files)
+
+        stages = {
+            "write(indent=2)": lambda name: [write_records(r, name, MineJsonWriter.INDENT) for r in records],
+            "write(compact)": lambda name: [write_records(r, name, None) for r in records],
+            "convert_mine": lambda name: [ToJson(str(data_dir), json_backend=name).convert_mine(m, str(f))
+                                          for m, f in zip(mine_names, json_files)],
+            "validate_json": lambda name: [Validator(str(MineSchema.DEFAULT_PATH), json_backend=name)
+                                           .validate_json(str(f)) for f in json_files],
+        }
+        print(f"\n{args.mines}个煤矿 × {args.rows}行，JSON {size / 1e6:.1f}MB")
+        print(f"  {'阶段':<18}" + "".join(f"{name:>12}" for name in backends) + f"{'加速比':>10}")
+        for stage, func in stages.items():
+            seconds = [best_of(lambda: func(name), args.repeat) for name in backends]
+            ratio = f"{seconds[0] / seconds[-1]:9.1f}x" if len(seconds) > 1 else ""
+            print(f"  {stage:<18}" + "".join(f"{s:11.3f}s" for s in seconds) + f"{ratio:>10}")
+        print(f"  ({rows:,}行)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _available(name: str) -> bool:
+    """后端是否可用（orjson未安装时跳过）"""
+    try:
+        get_json_backend(name)
+    except ImportError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    main()
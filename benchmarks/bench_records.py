@@ -0,0 +1,78 @@
+"""
+空值转换微基准 - bench_records
+对比逐单元格pd.isna的旧实现与按列向量化的ToJson._frame_to_records
+
+用法:
+    python benchmarks/bench_records.py [行数]
+
+版本: 1.0.0
+"""
+
+import sys
+import time
+import os
+import numpy as np
+import pandas as pd
+
+# 添加仓库根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ToJson import ToJson
+
+
+def make_gas_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """生成与采空区积气信息表结构相近的DataFrame（约三成空值）"""
+    rng = np.random.default_rng(seed)
+    gas_types = np.array(["O₂", "N₂", "CO", "CO₂", "CH₄", "C₂H₄"], dtype=object)
+    concentration = rng.random(rows) * 100
+    concentration[rng.random(rows) < 0.3] = np.nan
+    goaf_id = np.array([f"HX001-G{i % 500:03d}" for i in range(rows)], dtype=object)
+    goaf_id[rng.random(rows) < 0.3] = None
+    return pd.DataFrame({
+        "gas_id": [f"HX001-GAS{i:06d}" for i in range(rows)],
+        "goaf_id": goaf_id,
+        "coal_seam": rng.choice(np.array(["3-1", "4-2", "5-2"], dtype=object), rows),
+        "gas_type": rng.choice(gas_types, rows),
+        "gas_concentration": concentration,
+        "concentration_unit": "%",
+        "monitoring_equipment": None,
+        "monitoring_date": rng.integers(2015, 2025, rows),
+        "remarks": None,
+    })
+
+
+def legacy_records(df: pd.DataFrame):
+    """旧实现：to_dict后逐单元格调用pd.isna"""
+    records = df.replace({pd.NA: None, pd.NaT: None}).to_dict('records')
+    return [{k: (None if pd.isna(v) else v) for k, v in record.items()}
+            for record in records]
+
+
+def best_of(func, df, repeat: int = 3) -> float:
+    """多次运行取最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """主函数"""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_gas_frame(rows)
+
+    assert legacy_records(df) == ToJson._frame_to_records(df), "两种实现结果不一致"
+
+    legacy = best_of(legacy_records, df)
+    columnar = best_of(ToJson._frame_to_records, df)
+
+    print(f"行数: {rows}")
+    print(f"逐单元格pd.isna: {legacy:.3f}s")
+    print(f"按列向量化:      {columnar:.3f}s")
+    print(f"加速比:          {legacy / columnar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
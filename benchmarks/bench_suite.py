@@ -0,0 +1,261 @@
+"""
+转换与验证基准测试 - bench_suite
+用synthetic生成的合成数据测量convert_mine、batch_convert和Validator各方法的
+耗时、吞吐量和峰值内存，结果写为JSON，可与上一版本的结果对比
+
+用法:
+    python benchmarks/bench_suite.py [--mines 煤矿数] [--rows 每矿行数] [--encoding utf-8|gbk|both]
+                                     [--workers 进程数] [--output 结果.json] [--compare 基线.json]
+
+版本: 1.0.0
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 添加仓库根目录到路径
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+
+from ToJson import ToJson
+from Validator import Validator
+from MineTableSource import MineTableSource
+from MineJson import MineJsonWriter, get_json_backend
+from MineSchema import MineSchema
+from synthetic import SyntheticMineGenerator
+
+# 结果文件格式版本（2: peak_rss_mb改为阶段自身的峰值，进程累计峰值为process_peak_rss_mb）
+RESULT_VERSION = 2
+
+
+def peak_rss_mb(who: str = "self") -> Optional[float]:
+    """
+    进程（或已结束子进程中最大的）的峰值常驻内存，单位MB；不支持时返回None
+
+    本进程的值在reset_stage_peak之后从当前值重新计；不能重置的平台上是启动以来的累计峰值，
+    较大的阶段之后的各阶段都会报告同一个值，不能作为单个阶段的峰值。
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # Linux单位为KB，macOS为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / 1024 / 1024, 1)
+
+
+def reset_stage_peak() -> bool:
+    """
+    把本进程的峰值常驻内存（VmHWM）重置为当前值，之后读取的峰值只反映新阶段
+
+    只在Linux上可用（写入/proc/self/clear_refs）；不支持时返回False。
+    """
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def stage_peak_rss_mb() -> Optional[float]:
+    """上次reset_stage_peak以来本进程的峰值常驻内存（VmHWM），单位MB"""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_commit() -> Optional[str]:
+    """当前代码的git提交（不在仓库中时返回None）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(results: List[Dict], encoding: str, stage: str, func: Callable,
+            rows: int = 0, size: int = 0) -> object:
+    """
+    运行一个阶段并记录耗时、吞吐量和峰值内存；阶段内的打印输出被屏蔽
+
+    peak_rss_mb是该阶段运行期间的峰值（含阶段开始时已占用的内存），不支持重置峰值的平台为None；
+    process_peak_rss_mb和children_peak_rss_mb是到该阶段结束为止的累计峰值。
+    """
+    resettable = reset_stage_peak()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - start
+    stage_peak = stage_peak_rss_mb() if resettable else None
+    # 重置VmHWM后ru_maxrss也从当前值重新计，累计峰值取此前各阶段记录的最大值
+    process_peak = max([r["process_peak_rss_mb"] for r in results if r.get("process_peak_rss_mb") is not None]
+                       + [peak for peak in (peak_rss_mb("self"),) if peak is not None], default=None)
+    results.append({
+        "encoding": encoding,
+        "stage": stage,
+        "seconds": round(seconds, 4),
+        "rows": rows,
+        "bytes": size,
+        "rows_per_s": round(rows / seconds, 1) if rows and seconds else None,
+        "mb_per_s": round(size / 1e6 / seconds, 2) if size and seconds else None,
+        "peak_rss_mb": stage_peak,
+        "process_peak_rss_mb": process_peak,
+        "children_peak_rss_mb": peak_rss_mb("children")
+    })
+    print(f"  {stage:<28} {seconds:8.3f}s" + (f"  {rows / seconds:12,.0f} 行/s" if rows and seconds else "")
+          + (f"  峰值{stage_peak:8.1f}MB" if stage_peak is not None else ""))
+    return value
+
+
+def run_encoding(args, encoding: str, work_dir: Path, results: List[Dict]):
+    """生成一种编码的数据并运行全部阶段"""
+    data_dir = work_dir / encoding / "csv"
+    output_dir = work_dir / encoding / "json"
+    print(f"\n[{encoding}] {args.mines}个煤矿 × {args.rows}行")
+
+    generator = SyntheticMineGenerator(encoding=encoding, mask_ratio=args.mask_ratio, seed=args.seed)
+    totals = measure(results, encoding, "generate", lambda: generator.generate(data_dir, args.mines, args.rows),
+                     rows=args.mines * sum(generator.table_rows(args.rows).values()))
+
+    mine_name = generator.mine_name(0)
+    mine_rows = sum(generator.table_rows(args.rows).values())
+    mine_bytes = sum(p.stat().st_size for p in data_dir.glob(f"{mine_name}-*.csv"))
+
+    # convert_mine分阶段：解析CSV → 空值处理和记录构建 → JSON写出
+    source = MineTableSource(str(data_dir))
+    frames = measure(results, encoding, "convert.parse",
+                     lambda: {t: source.load(mine_name, t) for t in MineTableSource.TABLE_MAPPING},
+                     rows=mine_rows, size=mine_bytes)
+    records = measure(results, encoding, "convert.records",
+                      lambda: {t: ToJson._frame_to_records(df) for t, df in frames.items()}, rows=mine_rows)
+
+    def write_json():
+        with open(work_dir / encoding / "stage.json", 'w', encoding='utf-8') as f:
+            writer = MineJsonWriter(f)
+            for table_cn, table_records in records.items():
+                writer.begin_table(MineTableSource.TABLE_MAPPING[table_cn])
+                writer.write_records(table_records)
+                writer.end_table()
+            writer.finish({"mine_name": mine_name}, {t: len(r) for t, r in records.items()})
+        return (work_dir / encoding / "stage.json").stat().st_size
+
+    measure(results, encoding, "convert.write", write_json, rows=mine_rows)
+    del frames, records
+
+    # 端到端
+    json_file = str(work_dir / encoding / f"{mine_name}.json")
+    measure(results, encoding, "convert_mine", lambda: ToJson(str(data_dir)).convert_mine(mine_name, json_file),
+            rows=mine_rows, size=mine_bytes)
+    measure(results, encoding, "convert_mine(stream)",
+            lambda: ToJson(str(data_dir)).convert_mine(mine_name, json_file, stream=True),
+            rows=mine_rows, size=mine_bytes)
+    measure(results, encoding, f"batch_convert(workers={args.workers})",
+            lambda: ToJson(str(data_dir)).batch_convert(output_dir=str(output_dir), workers=args.workers),
+            rows=totals["rows"], size=totals["bytes"])
+
+    # Validator各方法（共用一个验证器，后续方法复用validate_csv的解析结果）
+    validator = Validator(str(MineSchema.DEFAULT_PATH))
+    measure(results, encoding, "validate_csv", lambda: validator.validate_csv(mine_name, str(data_dir)),
+            rows=mine_rows, size=mine_bytes)
+    measure(results, encoding, "validate_fields", lambda: validator.validate_fields(mine_name, str(data_dir)),
+            rows=mine_rows)
+    measure(results, encoding, "validate_references",
+            lambda: validator.validate_references(mine_name, str(data_dir)), rows=mine_rows)
+    json_size = Path(json_file).stat().st_size
+    measure(results, encoding, "validate_json", lambda: validator.validate_json(json_file),
+            rows=mine_rows, size=json_size)
+    measure(results, encoding, "validate_json(stream)", lambda: validator.validate_json(json_file, stream=True),
+            rows=mine_rows, size=json_size)
+    measure(results, encoding, "compare_csv_json",
+            lambda: validator.compare_csv_json(mine_name, json_file, str(data_dir)), rows=mine_rows)
+
+
+def compare(current: Dict, baseline_file: str):
+    """与基线结果逐阶段对比耗时"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r["encoding"], r["stage"]): r for r in baseline["results"]}
+    print(f"\n对比基线: {baseline_file} (提交 {baseline.get('git_commit')})")
+    print(f"  {'阶段':<36} {'基线':>9} {'本次':>9} {'比值':>7}")
+    for r in current["results"]:
+        old = previous.get((r["encoding"], r["stage"]))
+        if not old or not old["seconds"]:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        flag = "  ⚠️" if ratio > 1.2 else ""
+        print(f"  {r['encoding'] + ' ' + r['stage']:<36} {old['seconds']:8.3f}s {r['seconds']:8.3f}s {ratio:6.2f}x{flag}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="转换与验证基准测试")
+    parser.add_argument("--mines", type=int, default=1, help="煤矿数（1-1000）")
+    parser.add_argument("--rows", type=int, default=10_000, help="每个煤矿的总行数（1k-10M）")
+    parser.add_argument("--encoding", default="both", choices=["utf-8", "gbk", "both"], help="CSV编码")
+    parser.add_argument("--workers", type=int, default=1, help="batch_convert的并行进程数")
+    parser.add_argument("--mask-ratio", type=float, default=0.3, help="decimal字段脱敏比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--work-dir", help="数据目录（默认使用临时目录，结束后删除）")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON文件")
+    parser.add_argument("--compare", help="用于对比的基线结果JSON文件")
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="mine-bench-"))
+    encodings = ["utf-8", "gbk"] if args.encoding == "both" else [args.encoding]
+    results: List[Dict] = []
+    try:
+        for encoding in encodings:
+            run_encoding(args, encoding, work_dir, results)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "version": RESULT_VERSION,
+        "converter_version": ToJson.VERSION,
+        "git_commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "json_backend": get_json_backend().name,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {"mines": args.mines, "rows": args.rows, "encodings": encodings, "workers": args.workers,
+                   "mask_ratio": args.mask_ratio, "seed": args.seed},
+        "results": results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
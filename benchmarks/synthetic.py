@@ -0,0 +1,233 @@
+"""
+合成数据生成器 - synthetic
+按 煤矿采空区普查数据集Schema.json 生成十个表的CSV，用于基准测试：
+字段按Schema类型生成，ID按naming_conventions编号，子表goaf_id引用基本信息表，
+decimal字段按比例使用￥脱敏，支持UTF-8和GBK编码；相同参数和种子生成的文件逐字节一致
+
+用法:
+    python benchmarks/synthetic.py <输出目录> [--mines 煤矿数] [--rows 每矿行数] [--encoding utf-8|gbk]
+
+版本: 1.0.0
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 添加仓库根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MineSchema import MineSchema
+from MineTableSource import MineTableSource
+
+
+# 各表占每个煤矿总行数的比例（积气、密闭墙记录最多）
+TABLE_WEIGHTS = {
+    "采空区基本信息": 0.10,
+    "采空区积水信息": 0.05,
+    "采空区积气信息": 0.40,
+    "自燃发火信息": 0.05,
+    "采空区悬顶信息": 0.05,
+    "采空区塌陷信息": 0.02,
+    "地裂缝信息": 0.05,
+    "废弃井筒信息": 0.02,
+    "密闭墙信息": 0.20,
+    "采空区治理信息": 0.06
+}
+
+# 每批生成并写出的行数，控制大规模生成时的内存
+CHUNK_ROWS = 200_000
+
+# 低基数字段的取值
+VOCABULARY = {
+    "coal_seam": ["3-1", "4-2", "5-2", "3-1+5-2", "4-2+4-3"],
+    "gas_type": ["O2", "N2", "CO", "CO2", "CH4", "C2H4"],
+}
+
+
+class SyntheticMineGenerator:
+    """按Schema生成确定性的合成煤矿CSV"""
+
+    def __init__(self, schema: Optional[MineSchema] = None, encoding: str = "utf-8",
+                 mask_ratio: float = 0.3, null_ratio: float = 0.05, seed: int = 0):
+        """
+        初始化生成器
+
+        Args:
+            schema: Schema，默认读取仓库中的Schema
+            encoding: CSV编码（utf-8或gbk）
+            mask_ratio: decimal字段使用￥脱敏的比例
+            null_ratio: 非必填字段为空的比例
+            seed: 随机种子
+        """
+        self.schema = schema or MineSchema()
+        self.encoding = encoding
+        self.mask_ratio = mask_ratio
+        self.null_ratio = null_ratio
+        self.seed = seed
+        self.id_naming = self.schema.schema.get("naming_conventions", {}).get("id_naming", {})
+
+    @staticmethod
+    def mine_name(index: int) -> str:
+        """第index个合成煤矿的名称"""
+        return f"基准煤矿{index:04d}"
+
+    @staticmethod
+    def mine_code(index: int) -> str:
+        """第index个合成煤矿的代码"""
+        return f"BM{index:04d}"
+
+    @staticmethod
+    def table_rows(rows: int) -> Dict[str, int]:
+        """把每个煤矿的总行数按比例分到各表（每表至少1行）"""
+        return {table_cn: max(1, int(rows * weight)) for table_cn, weight in TABLE_WEIGHTS.items()}
+
+    def generate(self, output_dir: str, mines: int = 1, rows: int = 1000) -> Dict[str, int]:
+        """
+        生成多个煤矿的CSV
+
+        Args:
+            output_dir: 输出目录
+            mines: 煤矿数
+            rows: 每个煤矿的总行数
+
+        Returns:
+            {"files": 文件数, "rows": 总行数, "bytes": 总字节数}
+        """
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        totals = {"files": 0, "rows": 0, "bytes": 0}
+        for index in range(mines):
+            for table_cn, count in self.table_rows(rows).items():
+                file_path = output / f"{self.mine_name(index)}-{table_cn}.csv"
+                self.write_table(file_path, index, table_cn, count, goaf_count=self.table_rows(rows)["采空区基本信息"])
+                totals["files"] += 1
+                totals["rows"] += count
+                totals["bytes"] += file_path.stat().st_size
+        return totals
+
+    def write_table(self, file_path: Path, mine_index: int, table_cn: str, rows: int, goaf_count: int):
+        """分批生成并写出一个表"""
+        # 每个(煤矿, 表)使用独立的随机流，单独重新生成某个表时结果不变
+        table_no = list(MineTableSource.TABLE_MAPPING).index(table_cn)
+        rng = np.random.default_rng([self.seed, mine_index, table_no])
+        with open(file_path, 'w', encoding=self.encoding, newline='') as f:
+            for start in range(0, rows, CHUNK_ROWS):
+                size = min(CHUNK_ROWS, rows - start)
+                frame = self.make_frame(rng, mine_index, table_cn, start, size, goaf_count)
+                frame.to_csv(f, index=False, header=(start == 0), lineterminator="\n")
+
+    def make_frame(self, rng: np.random.Generator, mine_index: int, table_cn: str,
+                   start: int, size: int, goaf_count: int) -> pd.DataFrame:
+        """生成一个表的一批记录（按列向量化生成）"""
+        table = self.schema.table(table_cn)
+        seq = np.arange(start + 1, start + size + 1)
+        code = self.mine_code(mine_index)
+        unit_fields = {unit: canonical for _, unit, canonical in self.schema.unit_pairs.get(table_cn, [])}
+
+        columns = {}
+        for field in table["fields"]:
+            name = field["name"]
+            if name == table.get("primary_key") or name == "treatment_project_id":
+                column = self._ids(name, code, seq)
+            elif name == "mine_id":
+                column = np.full(size, code, dtype=object)
+            elif name == "mine_name":
+                column = np.full(size, self.mine_name(mine_index), dtype=object)
+            elif name == "goaf_id":
+                column = self._goaf_refs(rng, code, size, goaf_count)
+            elif name in unit_fields:
+                column = self._choice(rng, self._encodable(self.schema.UNIT_FACTORS[unit_fields[name]]), size)
+            elif field["type"] == "decimal":
+                column = self._decimals(rng, size)
+            elif field["type"] == "boolean":
+                column = self._choice(rng, ["是", "否"], size)
+            elif name in VOCABULARY:
+                column = self._choice(rng, VOCABULARY[name], size)
+            elif name in MineSchema.CATEGORICAL_FIELDS:
+                column = self._choice(rng, [f"{field['description']}{k}" for k in range(1, 6)], size)
+            elif "date" in name or "time" in name:
+                years = rng.integers(1990, 2025, size).astype(str)
+                months = np.char.zfill(rng.integers(1, 13, size).astype(str), 2)
+                column = np.char.add(np.char.add(years, "-"), months).astype(object)
+            else:
+                column = self._texts(rng, field["description"], seq)
+
+            if not field.get("required") and name != table.get("primary_key"):
+                column = np.asarray(column, dtype=object)
+                column[rng.random(size) < self.null_ratio] = None
+            columns[name] = column
+        return pd.DataFrame(columns)
+
+    def _ids(self, name: str, code: str, seq: np.ndarray) -> np.ndarray:
+        """按id_naming的模式编号，如"{mine_code}-GAS{序号}" → "BM0000-GAS001\""""
+        pattern = self.id_naming.get(name, "{mine_code}-" + name.upper() + "{序号}")
+        prefix, _, suffix = pattern.replace("{mine_code}", code).partition("{序号}")
+        numbers = np.char.zfill(seq.astype(str), 3)
+        return np.char.add(np.char.add(prefix, numbers), suffix).astype(object)
+
+    def _goaf_refs(self, rng: np.random.Generator, code: str, size: int, goaf_count: int) -> np.ndarray:
+        """子表外键：引用基本信息表的goaf_id，部分为空（flexible_goaf_association），部分为+号多值"""
+        first = self._ids("goaf_id", code, rng.integers(1, goaf_count + 1, size))
+        second = self._ids("goaf_id", code, rng.integers(1, goaf_count + 1, size))
+        column = first.copy()
+        multi = rng.random(size) < 0.05
+        column[multi] = first[multi] + "+" + second[multi]
+        column[rng.random(size) < 0.1] = None
+        return column
+
+    def _decimals(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """decimal字段：两位小数，按mask_ratio使用"￥整数￥"脱敏"""
+        values = np.round(rng.random(size) * 1000, 2).astype(str).astype(object)
+        masked = rng.random(size) < self.mask_ratio
+        integers = rng.integers(1, 1000, int(masked.sum())).astype(str)
+        values[masked] = np.char.add(np.char.add("￥", integers), "￥")
+        return values
+
+    def _texts(self, rng: np.random.Generator, description: str, seq: np.ndarray) -> np.ndarray:
+        """文本字段：字段说明加编号，部分含逗号（覆盖带引号的CSV字段）"""
+        texts = np.char.add(f"{description}", seq.astype(str)).astype(object)
+        with_comma = rng.random(len(seq)) < 0.1
+        texts[with_comma] = texts[with_comma] + "，含逗号,说明"
+        return texts
+
+    def _encodable(self, values) -> List[str]:
+        """只保留当前编码能表示的取值（如GBK不能表示m²）"""
+        result = []
+        for value in values:
+            try:
+                value.encode(self.encoding)
+            except UnicodeEncodeError:
+                continue
+            result.append(value)
+        return result
+
+    @staticmethod
+    def _choice(rng: np.random.Generator, values: List[str], size: int) -> np.ndarray:
+        """从取值列表中随机选择"""
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="生成合成煤矿CSV")
+    parser.add_argument("output_dir", help="输出目录")
+    parser.add_argument("--mines", type=int, default=1, help="煤矿数")
+    parser.add_argument("--rows", type=int, default=1000, help="每个煤矿的总行数")
+    parser.add_argument("--encoding", default="utf-8", choices=["utf-8", "gbk"], help="CSV编码")
+    parser.add_argument("--mask-ratio", type=float, default=0.3, help="decimal字段脱敏比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    generator = SyntheticMineGenerator(encoding=args.encoding, mask_ratio=args.mask_ratio, seed=args.seed)
+    totals = generator.generate(args.output_dir, mines=args.mines, rows=args.rows)
+    print(f"已生成 {totals['files']} 个文件, {totals['rows']} 行, {totals['bytes'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,46 @@ ToDataJson 单元测试
 """
 
 import unittest
+import importlib.util
+import io
 import json
 import os
 import sys
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from contextlib import closing
 from pathlib import Path
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import numpy as np
+import pandas as pd
+from unittest import mock
+
 from ToJson import ToJson
 from Validator import Validator
+from MineTableSource import MineTableSource
+from MineSchema import MineSchema
+from MineDataset import MineDataset
+from MineJson import JsonlShardReader, MineJsonWriter
+from ResultCache import ResultCache
+
+# 仓库自带的样例煤矿数据
+SAMPLE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_MINE = "TEST煤矿"
+
+
+def make_mine_dir(target_dir, mine_names):
+    """把样例煤矿的CSV复制为多个煤矿，供批量测试使用"""
+    target = Path(target_dir)
+    for csv_file in SAMPLE_DIR.glob(f"{SAMPLE_MINE}-*.csv"):
+        table_cn = csv_file.stem.split('-', 1)[1]
+        for mine_name in mine_names:
+            shutil.copy(csv_file, target / f"{mine_name}-{table_cn}.csv")
+    return target
 
 
 class TestToJson(unittest.TestCase):
@@ -155,6 +185,1353 @@ class TestValidator(unittest.TestCase):
         print(f"✅ 报告生成成功")
 
 
+class TestBatchConvert(unittest.TestCase):
+    """测试批量转换"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.mines = ["甲煤矿", "乙煤矿", "丙煤矿"]
+        make_mine_dir(self.tmp, self.mines)
+        self.converter = ToJson(data_dir=self.tmp)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_parallel_matches_serial(self):
+        """测试并行模式与串行模式结果一致"""
+        serial_dir = Path(self.tmp) / "serial"
+        parallel_dir = Path(self.tmp) / "parallel"
+        serial = self.converter.batch_convert(self.mines, str(serial_dir))
+        parallel = self.converter.batch_convert(self.mines, str(parallel_dir), workers=2)
+        
+        self.assertEqual([r["mine_name"] for r in parallel], self.mines)
+        for s, p in zip(serial, parallel):
+            self.assertTrue(p["success"])
+            self.assertEqual(s["record_count"], p["record_count"])
+            self.assertEqual(s["tables"], p["tables"])
+            self.assertEqual(Path(s["file"]).read_bytes(), Path(p["file"]).read_bytes())
+        
+        serial_report = (serial_dir / "转换报告.txt").read_text(encoding='utf-8')
+        parallel_report = (parallel_dir / "转换报告.txt").read_text(encoding='utf-8')
+        self.assertEqual(serial_report.replace("serial", "parallel"), parallel_report)
+        print(f"✅ 并行转换与串行一致")
+    
+    def test_incremental_skips_unchanged(self):
+        """测试增量模式只重新转换输入变化的煤矿"""
+        output_dir = str(Path(self.tmp) / "output")
+        first = self.converter.batch_convert(self.mines, output_dir, incremental=True)
+        self.assertEqual({r["status"] for r in first}, {"rebuilt"})
+        
+        # 修改一个煤矿的CSV，touch另一个煤矿的CSV（内容不变）
+        changed = Path(self.tmp) / "乙煤矿-密闭墙信息.csv"
+        with open(changed, 'a', encoding='utf-8') as f:
+            f.write("HX001-SEAL999,,3-1,99,新增密闭,,,,,,,,,\n")
+        touched = Path(self.tmp) / "丙煤矿-采空区基本信息.csv"
+        os.utime(touched, ns=(0, 0))
+        
+        second = self.converter.batch_convert(self.mines, output_dir, incremental=True)
+        self.assertEqual([r["status"] for r in second], ["skipped", "rebuilt", "skipped"])
+        self.assertEqual(second[1]["record_count"], first[1]["record_count"] + 1)
+        self.assertEqual(second[0]["record_count"], first[0]["record_count"])
+        
+        report = (Path(output_dir) / "转换报告.txt").read_text(encoding='utf-8')
+        self.assertIn("跳过(未变化): 2", report)
+        
+        # 转换器版本变化时全部重新转换
+        with mock.patch.object(ToJson, 'VERSION', '9.9.9'):
+            third = self.converter.batch_convert(self.mines, output_dir, incremental=True)
+        self.assertEqual({r["status"] for r in third}, {"rebuilt"})
+        print(f"✅ 增量转换正确")
+    
+    def test_resume_after_interrupt(self):
+        """测试转换中断后断点续转：只转换未完成的煤矿，中断的煤矿不留下不完整的输出"""
+        output_dir = Path(self.tmp) / "output"
+        collect_mine = ToJson._collect_mine
+        
+        def interrupted(converter, mine_name, writer=None):
+            if mine_name == "乙煤矿":
+                raise KeyboardInterrupt
+            return collect_mine(converter, mine_name, writer)
+        
+        with mock.patch.object(ToJson, '_collect_mine', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.converter.batch_convert(self.mines, str(output_dir))
+        self.assertEqual(sorted(p.name for p in output_dir.iterdir()),
+                         sorted(["甲煤矿-采空区数据集.json", ToJson.CHECKPOINT_FILE]))
+        
+        # 模拟进度文件最后一行只写了一半
+        checkpoint = output_dir / ToJson.CHECKPOINT_FILE
+        with open(checkpoint, 'a', encoding='utf-8') as f:
+            f.write('{"mine_name": "乙煤')
+        
+        resumed = self.converter.batch_convert(self.mines, str(output_dir), resume=True)
+        self.assertEqual([r.get("status") for r in resumed], ["resumed", None, None])
+        self.assertTrue(all(r["success"] for r in resumed))
+        self.assertEqual(resumed[0]["record_count"], resumed[1]["record_count"])
+        lines = checkpoint.read_text(encoding='utf-8').splitlines()
+        self.assertEqual([json.loads(line)["mine_name"] for line in lines[1:]], self.mines)
+        self.assertIn("跳过(上次已完成): 1", (output_dir / "转换报告.txt").read_text(encoding='utf-8'))
+        
+        # 全部完成后再次续转不转换任何煤矿；不续转时重新开始
+        again = self.converter.batch_convert(self.mines, str(output_dir), resume=True)
+        self.assertEqual({r["status"] for r in again}, {"resumed"})
+        fresh = self.converter.batch_convert(self.mines, str(output_dir))
+        self.assertTrue(all("status" not in r for r in fresh))
+        
+        # 转换选项变化时全部重新转换
+        compact = ToJson(data_dir=self.tmp, compact=True).batch_convert(self.mines, str(output_dir), resume=True)
+        self.assertTrue(all("status" not in r for r in compact))
+        print(f"✅ 断点续转正确")
+    
+    def test_resume_after_input_changed(self):
+        """测试全部完成后修改输入，续转时重新转换该煤矿（同时开启增量模式时也一样）"""
+        output_dir = str(Path(self.tmp) / "output")
+        first = self.converter.batch_convert(self.mines, output_dir, incremental=True)
+        
+        changed = Path(self.tmp) / "乙煤矿-密闭墙信息.csv"
+        with open(changed, 'a', encoding='utf-8') as f:
+            f.write("HX001-SEAL999,,3-1,99,新增密闭,,,,,,,,,\n")
+        touched = Path(self.tmp) / "丙煤矿-采空区基本信息.csv"
+        os.utime(touched, ns=(0, 0))
+        
+        expected = first[1]["record_count"] + 1
+        for incremental in (True, False):
+            with self.subTest(incremental=incremental):
+                resumed = self.converter.batch_convert(self.mines, output_dir, incremental=incremental,
+                                                       resume=True)
+                self.assertEqual(resumed[0]["status"], "resumed")
+                self.assertNotEqual(resumed[1].get("status"), "resumed")
+                self.assertEqual(resumed[2]["status"], "resumed")
+                self.assertEqual(resumed[1]["record_count"], expected)
+                with open(resumed[1]["file"], 'r', encoding='utf-8') as f:
+                    self.assertEqual(sum(json.load(f)["statistics"].values()), resumed[1]["record_count"])
+                with open(changed, 'a', encoding='utf-8') as f:
+                    f.write("HX001-SEAL998,,3-1,98,新增密闭,,,,,,,,,\n")
+                expected += 1
+    
+    def test_resume_updates_manifest(self):
+        """测试增量模式下中断后续转，上次已完成的煤矿也记入转换清单，之后的增量转换全部跳过"""
+        output_dir = Path(self.tmp) / "output"
+        collect_mine = ToJson._collect_mine
+        
+        def interrupted(converter, mine_name, writer=None):
+            if mine_name == "乙煤矿":
+                raise KeyboardInterrupt
+            return collect_mine(converter, mine_name, writer)
+        
+        with mock.patch.object(ToJson, '_collect_mine', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.converter.batch_convert(self.mines, str(output_dir), incremental=True)
+        self.assertFalse((output_dir / ToJson.MANIFEST_FILE).exists())
+        
+        resumed = self.converter.batch_convert(self.mines, str(output_dir), incremental=True, resume=True)
+        self.assertEqual([r["status"] for r in resumed], ["resumed", "rebuilt", "rebuilt"])
+        with open(output_dir / ToJson.MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.assertEqual(sorted(json.load(f)["mines"]), sorted(self.mines))
+        
+        again = self.converter.batch_convert(self.mines, str(output_dir), incremental=True)
+        self.assertEqual({r["status"] for r in again}, {"skipped"})
+    
+    def test_failed_write_keeps_previous_output(self):
+        """测试转换失败时保留原有输出文件，不留下临时文件"""
+        output_file = Path(self.tmp) / "甲煤矿.json"
+        self.converter.convert_mine("甲煤矿", str(output_file), stream=True)
+        expected = output_file.read_bytes()
+        
+        # 各表已写出、结尾写出前失败
+        with mock.patch.object(MineJsonWriter, 'finish', side_effect=RuntimeError("中断")):
+            with self.assertRaises(RuntimeError):
+                self.converter.convert_mine("甲煤矿", str(output_file), stream=True)
+        self.assertEqual(output_file.read_bytes(), expected)
+        self.assertFalse(Path(f"{output_file}.tmp").exists())
+    
+    def test_output_synced_before_replace(self):
+        """测试输出先落盘再替换为正式文件，替换后同步所在目录"""
+        output_file = Path(self.tmp) / "甲煤矿.json.gz"
+        events = []
+        fsync, replace = os.fsync, os.replace
+        with mock.patch('os.fsync', side_effect=lambda fd: events.append("fsync") or fsync(fd)), \
+                mock.patch('os.replace', side_effect=lambda src, dst: events.append(Path(dst).name) or replace(src, dst)):
+            ToJson(data_dir=self.tmp, compression="gzip").convert_mine("甲煤矿", str(output_file), stream=True)
+        self.assertEqual(events, ["fsync", output_file.name, "fsync"])
+
+
+class TestMineTableSource(unittest.TestCase):
+    """测试CSV表读取层"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.source = MineTableSource(self.tmp)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_gbk_parsed_once(self):
+        """测试GBK文件只解析一次且探测结果被缓存"""
+        source = SAMPLE_DIR / f"{SAMPLE_MINE}-采空区基本信息.csv"
+        target = Path(self.tmp) / "GBK煤矿-采空区基本信息.csv"
+        target.write_bytes(source.read_text(encoding='utf-8').encode('gbk'))
+        
+        with mock.patch.object(pd, 'read_csv', wraps=pd.read_csv) as read_csv:
+            df = self.source.load("GBK煤矿", "采空区基本信息")
+            self.assertEqual(read_csv.call_count, 1)
+            self.assertEqual(read_csv.call_args.kwargs['encoding'], 'gbk')
+        self.assertEqual(df["mine_name"].iloc[0], "河西联办煤矿")
+        
+        with mock.patch.object(MineTableSource, '_sniff_format') as sniff:
+            MineTableSource(self.tmp).load("GBK煤矿", "采空区基本信息")
+            sniff.assert_not_called()
+        print(f"✅ GBK编码探测正确")
+    
+    def test_lenient_quoting_keeps_skipinitialspace(self):
+        """测试不严格的引号字段（"ab"c）仍按QUOTE_ALL解析，", "分隔时字段开头不保留空格"""
+        target = Path(self.tmp) / "空格煤矿-采空区基本信息.csv"
+        target.write_text('goaf_id, goaf_name, coal_seam\n"G1", "采空1", "3-1"\n"G2", "ab"c, "5-2"\n',
+                          encoding='utf-8')
+        df = self.source.load("空格煤矿", "采空区基本信息")
+        self.assertEqual(list(df.columns), ["goaf_id", "goaf_name", "coal_seam"])
+        self.assertEqual(df["goaf_id"].tolist(), ["G1", "G2"])
+        self.assertEqual(df["coal_seam"].tolist(), ["3-1", "5-2"])
+        self.assertEqual(self.source.read_info[("空格煤矿", "采空区基本信息")]["quoting"], "QUOTE_ALL")
+    
+    def test_shared_between_tools(self):
+        """测试ToJson和Validator共用读取器时每个文件只解析一次"""
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        json_file = str(Path(self.tmp) / "甲煤矿-采空区数据集.json")
+        
+        with mock.patch.object(pd, 'read_csv', wraps=pd.read_csv) as read_csv:
+            ToJson(data_dir=self.tmp, table_source=self.source).convert_mine("甲煤矿", json_file)
+            validator = Validator(table_source=self.source)
+            validator.validate_csv("甲煤矿", self.tmp)
+            result = validator.compare_csv_json("甲煤矿", json_file, self.tmp)
+            self.assertEqual(read_csv.call_count, 10)
+        self.assertTrue(result["match"])
+        print(f"✅ 每个文件只解析一次")
+    
+    def test_directory_index(self):
+        """测试一次扫描目录即可检测煤矿，并报告无法匹配的文件"""
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        shutil.copy(SAMPLE_DIR / f"{SAMPLE_MINE}-地裂缝信息.csv", Path(self.tmp) / "乙-二号煤矿-地裂缝信息.csv")
+        (Path(self.tmp) / "甲煤矿-未知表.csv").write_text("a,b\n1,2\n", encoding='utf-8')
+        
+        converter = ToJson(data_dir=self.tmp)
+        self.assertEqual(converter.auto_detect_mines(), ["乙-二号煤矿", "甲煤矿"])
+        self.assertEqual(converter.table_source.unmatched_files, ["甲煤矿-未知表.csv"])
+        
+        with mock.patch.object(Path, 'exists', side_effect=AssertionError("不应逐个stat")):
+            result = converter.convert_mine("乙-二号煤矿")
+        self.assertEqual(result["statistics"]["crack_info"], 11)
+        self.assertEqual(sum(result["statistics"].values()), 11)
+        
+        # 目录有新增文件时自动重新扫描
+        shutil.copy(SAMPLE_DIR / f"{SAMPLE_MINE}-密闭墙信息.csv", Path(self.tmp) / "乙-二号煤矿-密闭墙信息.csv")
+        os.utime(self.tmp, ns=(0, 0))
+        result = converter.convert_mine("乙-二号煤矿")
+        self.assertEqual(result["statistics"]["seal_wall_info"], 25)
+        print(f"✅ 目录索引正确")
+
+
+class TestFrameToRecords(unittest.TestCase):
+    """测试空值转换"""
+    
+    def test_matches_legacy_conversion(self):
+        """测试按列转换与逐单元格pd.isna结果一致"""
+        df = pd.DataFrame({
+            "id": ["A", "B", None],
+            "count": [1, 2, 3],
+            "value": [1.5, float("nan"), 2.0],
+            "flag": [True, False, True],
+            "when": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+            "nullable": pd.array([1, None, 3], dtype="Int64"),
+        })
+        legacy = df.replace({pd.NA: None, pd.NaT: None}).to_dict('records')
+        legacy = [{k: (None if pd.isna(v) else v) for k, v in r.items()} for r in legacy]
+        
+        records = ToJson._frame_to_records(df)
+        self.assertEqual(records, legacy)
+        self.assertIs(records[1]["value"], None)
+        self.assertIs(records[1]["when"], None)
+        self.assertIs(records[1]["nullable"], None)
+        self.assertIs(type(records[0]["count"]), int)
+        self.assertTrue(df["value"].isna().iloc[1])
+        print(f"✅ 空值按列转换正确")
+
+
+class TestStreamingOutput(unittest.TestCase):
+    """测试流式JSON输出"""
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.converter = ToJson(data_dir=str(SAMPLE_DIR))
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_stream_matches_json_dump(self):
+        """测试流式输出与json.dump逐字节一致"""
+        dumped = self.tmp / "dump.json"
+        streamed = self.tmp / "stream.json"
+        result = self.converter.convert_mine(SAMPLE_MINE, str(dumped))
+        
+        with mock.patch.object(ToJson, 'CHUNK_ROWS', 7):
+            summary = self.converter.convert_mine(SAMPLE_MINE, str(streamed), stream=True)
+        
+        self.assertEqual(dumped.read_bytes(), streamed.read_bytes())
+        self.assertEqual(summary["statistics"], result["statistics"])
+        self.assertNotIn("data", summary)
+        print(f"✅ 流式输出与json.dump一致")
+    
+    def test_stream_to_buffer_missing_mine(self):
+        """测试无数据的煤矿流式写入内存缓冲"""
+        from io import BytesIO
+        buffer = BytesIO()
+        self.converter.convert_mine("不存在煤矿", buffer, stream=True)
+        expected = json.dumps(self.converter.convert_mine("不存在煤矿"), ensure_ascii=False, indent=2)
+        self.assertEqual(buffer.getvalue().decode('utf-8'), expected)
+    
+    def test_stream_releases_tables(self):
+        """测试流式输出每个表写完即释放，转换结束后读取器不保留任何DataFrame"""
+        loaded = []
+        load = MineTableSource.load
+        
+        def tracked(source, mine_name, table_cn, dtype=None):
+            loaded.append(len(source._frames))
+            return load(source, mine_name, table_cn, dtype)
+        
+        with mock.patch.object(MineTableSource, 'load', tracked):
+            self.converter.convert_mine(SAMPLE_MINE, str(self.tmp / "stream.json"), stream=True)
+        self.assertEqual(loaded, [0] * 10)
+        self.assertEqual(self.converter.table_source._frames, {})
+        
+        self.converter.convert_mine(SAMPLE_MINE)
+        self.assertEqual(len(self.converter.table_source._frames), 10)
+
+
+class TestJsonlExport(unittest.TestCase):
+    """测试JSONL分片导出"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.mines = ["甲煤矿", "乙煤矿", "丙煤矿"]
+        make_mine_dir(self.tmp, self.mines)
+        self.converter = ToJson(data_dir=self.tmp)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_shards_and_random_access(self):
+        """测试分片切换和按偏移随机读取"""
+        output_dir = Path(self.tmp) / "jsonl"
+        results = self.converter.export_jsonl(self.mines, str(output_dir), shard_size=300)
+        self.assertTrue(all(r["success"] for r in results))
+        
+        reader = JsonlShardReader(output_dir)
+        self.assertEqual(len(reader.index["shards"]), 3)
+        
+        expected = self.converter.convert_mine("乙煤矿")
+        header = reader.mine("乙煤矿")
+        self.assertEqual(header["mine_info"], expected["mine_info"])
+        self.assertEqual(header["statistics"], expected["statistics"])
+        self.assertEqual(reader.record("乙煤矿", "goaf_gas_info", 17),
+                         expected["data"]["goaf_gas_info"][17])
+        self.assertEqual(list(reader.records("乙煤矿", "seal_wall_info")),
+                         expected["data"]["seal_wall_info"])
+        print(f"✅ JSONL分片导出正确")
+
+
+class TestTypedParsing(unittest.TestCase):
+    """测试按Schema类型读取"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        (Path(self.tmp) / "甲煤矿-采空区基本信息.csv").write_text(
+            "mine_id,goaf_id,coal_seam,goaf_area,is_adjacent_mine\n"
+            "HX001,HX001-G001,3,120.5,是\n"
+            "HX001,HX001-G002,3-1+5-2,￥298￥,否\n"
+            "HX001,HX001-G003,5,,\n", encoding='utf-8')
+        self.converter = ToJson(data_dir=self.tmp, typed=True)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_typed_values(self):
+        """测试string/decimal/boolean字段按Schema类型输出"""
+        result = self.converter.convert_mine("甲煤矿")
+        basic = result["data"]["goaf_basic_info"]
+        self.assertEqual([r["coal_seam"] for r in basic], ["3", "3-1+5-2", "5"])
+        self.assertEqual([r["goaf_area"] for r in basic], [120.5, "￥298￥", None])
+        self.assertEqual([r["is_adjacent_mine"] for r in basic], [True, False, None])
+        
+        seals = result["data"]["seal_wall_info"]
+        self.assertEqual(seals[0]["seal_number"], "1")
+        roofs = result["data"]["suspended_roof_info"]
+        self.assertIs(roofs[0]["has_suspended_roof"], True)
+        
+        gas = self.converter._load_table("甲煤矿", "采空区积气信息")
+        self.assertEqual(str(gas["gas_type"].dtype), "category")
+        self.assertEqual(str(gas["concentration_unit"].dtype), "category")
+        print(f"✅ 按Schema类型读取正确")
+
+
+class TestFieldValidation(unittest.TestCase):
+    """测试字段级Schema验证"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        (Path(self.tmp) / "甲煤矿-采空区基本信息.csv").write_text(
+            "mine_id,mine_name,goaf_id,goaf_area,is_adjacent_mine\n"
+            "HX001,甲煤矿,HX001-G001,120.5,是\n"
+            "HX001,甲煤矿,HX001-G001,￥298￥,否\n"
+            "HX001,,HX001-G003,约100,也许\n", encoding='utf-8')
+        self.validator = Validator()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_violations(self):
+        """测试必填、主键、decimal、boolean违规及行号"""
+        result = self.validator.validate_fields("甲煤矿", self.tmp)
+        self.assertFalse(result["valid"])
+        
+        found = {(v["rule"], v["field"]): v["rows"]
+                 for v in result["table_details"]["采空区基本信息"]["violations"]}
+        self.assertEqual(found, {
+            ("required", "mine_name"): [3],
+            ("primary_key", "goaf_id"): [1, 2],
+            ("decimal", "goaf_area"): [3],
+            ("boolean", "is_adjacent_mine"): [3],
+        })
+        self.assertEqual(result["total_errors"], 5)
+        
+        report = self.validator.generate_report(
+            {"mine_name": "甲煤矿", "found_tables": 10, "total_tables": 10,
+             "total_records": 0, "errors": [], "warnings": []},
+            {"file": "-", "valid": True, "total_records": 0, "errors": [], "warnings": []},
+            {"match": True, "errors": []}, result)
+        self.assertIn("字段级验证", report)
+        self.assertIn("验证失败", report)
+        print(f"✅ 字段级验证: {result['total_errors']}处违规")
+
+
+class TestReferenceIntegrity(unittest.TestCase):
+    """测试跨表引用完整性验证"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        goafs = [f"HX001-G{i:04d}" for i in range(3000)]
+        pd.DataFrame({"mine_id": "HX001", "mine_name": "甲煤矿", "goaf_id": goafs}).to_csv(
+            Path(self.tmp) / "甲煤矿-采空区基本信息.csv", index=False)
+        
+        # 三万行积气记录：空值、+号和逗号多值、两行无效引用
+        gas_goaf = [goafs[i % 3000] for i in range(30000)]
+        gas_goaf[10] = ""
+        gas_goaf[20] = f"{goafs[1]}+{goafs[2]}"
+        gas_goaf[30] = f"{goafs[3]},HX001-G9999"
+        gas_goaf[29999] = "NTT001-G001"
+        pd.DataFrame({"gas_id": [f"HX001-GAS{i:05d}" for i in range(30000)], "goaf_id": gas_goaf}).to_csv(
+            Path(self.tmp) / "甲煤矿-采空区积气信息.csv", index=False)
+        self.validator = Validator()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_invalid_references(self):
+        """测试无效引用定位到行，空值和多值按规则处理"""
+        result = self.validator.validate_references("甲煤矿", self.tmp)
+        self.assertFalse(result["valid"])
+        
+        gas = result["table_details"]["采空区积气信息"]
+        self.assertEqual(gas["rows"], [31, 30000])
+        self.assertEqual(gas["missing_values"], ["HX001-G9999", "NTT001-G001"])
+        self.assertEqual(gas["references"], 30001)
+        gas_errors = [e for e in result["errors"] if e.startswith("采空区积气信息")]
+        self.assertEqual(len(gas_errors), 1)
+        self.assertIn("行号: 31, 30000", gas_errors[0])
+        print(f"✅ 引用完整性: {gas['references']}个引用, {len(gas['rows'])}行无效")
+
+
+class TestNormalize(unittest.TestCase):
+    """测试脱敏值和多值字段规范化"""
+    
+    def test_large_table(self):
+        """测试大表按列规范化结果"""
+        rows = 60000
+        area = pd.Series([f"￥{i}￥" if i % 3 == 0 else str(i) for i in range(rows)], dtype="str")
+        area[5] = None
+        area[7] = "面宽￥124￥m"
+        seam = pd.Series(["3-1+5-2", "4-2,4-3", "5", None] * (rows // 4), dtype="str")
+        df = pd.DataFrame({"goaf_id": [f"G{i}" for i in range(rows)], "coal_seam": seam, "goaf_area": area})
+        
+        result = MineSchema().normalize("采空区基本信息", df)
+        self.assertEqual(list(result.columns), ["goaf_id", "coal_seam", "goaf_area", "goaf_area_masked"])
+        records = ToJson._frame_to_records(result.iloc[:8])
+        self.assertEqual([r["coal_seam"] for r in records[:4]], [["3-1", "5-2"], ["4-2", "4-3"], ["5"], None])
+        self.assertEqual([r["goaf_area"] for r in records],
+                         [0.0, 1.0, 2.0, 3.0, 4.0, None, 6.0, "面宽￥124￥m"])
+        self.assertEqual([r["goaf_area_masked"] for r in records],
+                         [True, False, False, True, False, None, True, True])
+        self.assertEqual(int(result["goaf_area_masked"].sum()), rows // 3 + 1)
+        print(f"✅ 规范化{rows}行")
+    
+    def test_convert_mine(self):
+        """测试convert_mine输出规范化后的记录"""
+        tmp = tempfile.mkdtemp()
+        try:
+            make_mine_dir(tmp, ["甲煤矿"])
+            result = ToJson(data_dir=tmp, normalize=True).convert_mine("甲煤矿")
+        finally:
+            shutil.rmtree(tmp)
+        seals = result["data"]["seal_wall_info"]
+        self.assertEqual(seals[0]["coal_seam"], ["4-2", "4-3"])
+        basic = result["data"]["goaf_basic_info"]
+        self.assertIn("goaf_area_masked", basic[0])
+        json.dumps(result, allow_nan=False)
+    
+    def test_numbers_always_float(self):
+        """测试拆出的数值和typed转换的decimal始终为float，不随列中有无空值变化"""
+        schema = MineSchema()
+        cases = [("normalize", ["￥594￥", "12"]), ("normalize", ["￥594￥", None]), ("normalize", ["594", "12"]),
+                 ("apply_types", ["594", "12"]), ("apply_types", ["594", None])]
+        for method, values in cases:
+            df = pd.DataFrame({"goaf_area": pd.Series(values, dtype="str")})
+            with self.subTest(method=method, values=values):
+                record = ToJson._frame_to_records(getattr(schema, method)("采空区基本信息", df))[0]
+                self.assertIs(type(record["goaf_area"]), float)
+                self.assertEqual(record["goaf_area"], 594.0)
+
+
+class TestUnitConversion(unittest.TestCase):
+    """测试单位换算"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        (Path(self.tmp) / "甲煤矿-采空区基本信息.csv").write_text(
+            "mine_id,goaf_id,goaf_area,area_unit\n"
+            "HX001,HX001-G001,1.5,km2\n"
+            "HX001,HX001-G002,2,公顷\n"
+            "HX001,HX001-G003,300,\n"
+            "HX001,HX001-G004,4,亩\n"
+            "HX001,HX001-G005,￥298￥,km²\n", encoding='utf-8')
+        (Path(self.tmp) / "甲煤矿-采空区积气信息.csv").write_text(
+            "gas_id,goaf_id,gas_concentration,concentration_unit\n"
+            "HX001-GAS001,,594,ppm\n"
+            "HX001-GAS002,,20.9,%\n", encoding='utf-8')
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_convert_units(self):
+        """测试按列换算到默认单位，未知单位保留原值并写入报告"""
+        converter = ToJson(data_dir=self.tmp, convert_units=True)
+        result = converter.convert_mine("甲煤矿")
+        basic = result["data"]["goaf_basic_info"]
+        self.assertEqual([r["goaf_area"] for r in basic], [1500000.0, 20000.0, 300.0, "4", "￥298￥"])
+        self.assertEqual([r["area_unit"] for r in basic], ["m²", "m²", "m²", "亩", "km²"])
+        gas = result["data"]["goaf_gas_info"]
+        self.assertEqual([r["gas_concentration"] for r in gas], [0.0594, 20.9])
+        self.assertEqual(converter.unknown_units["甲煤矿"], {"采空区基本信息": {"goaf_area": ["亩"]}})
+        
+        output_dir = Path(self.tmp) / "out"
+        converter.batch_convert(["甲煤矿"], output_dir=str(output_dir))
+        report = (output_dir / "转换报告.txt").read_text(encoding='utf-8')
+        self.assertIn("未知单位: 采空区基本信息.goaf_area = 亩", report)
+        print(f"✅ 单位换算正确")
+    
+    def test_masked_values_reported(self):
+        """测试未规范化的脱敏原文无法换算时保持原单位并写入报告；开启normalize时拆出数值后换算"""
+        converter = ToJson(data_dir=self.tmp, convert_units=True)
+        converter.convert_mine("甲煤矿")
+        self.assertEqual(converter.unconverted_values["甲煤矿"], {"采空区基本信息": {"goaf_area": 1}})
+        output_dir = Path(self.tmp) / "out"
+        converter.batch_convert(["甲煤矿"], output_dir=str(output_dir))
+        report = (output_dir / "转换报告.txt").read_text(encoding='utf-8')
+        self.assertIn("数值无法解析: 采空区基本信息.goaf_area 1行", report)
+        
+        normalized = ToJson(data_dir=self.tmp, convert_units=True, normalize=True)
+        basic = normalized.convert_mine("甲煤矿")["data"]["goaf_basic_info"]
+        self.assertEqual((basic[4]["goaf_area"], basic[4]["area_unit"], basic[4]["goaf_area_masked"]),
+                         (298000000.0, "m²", True))
+        self.assertNotIn("甲煤矿", normalized.unconverted_values)
+    
+    def test_buffers_leave_converter_unchanged(self):
+        """测试内存转换不改动共用的转换器，未知单位仍写入ZIP转换报告"""
+        tables = {path.stem.split('-', 1)[1]: path.read_bytes() for path in Path(self.tmp).glob("甲煤矿-*.csv")}
+        converter = ToJson(convert_units=True)
+        converter.convert_mine_from_buffers("甲煤矿", tables)
+        
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            for table_cn, data in tables.items():
+                zf.writestr(f"甲煤矿-{table_cn}.csv", data)
+        results, report = converter.convert_zip(archive.getvalue(), io.BytesIO())
+        self.assertEqual(results[0]["unknown_units"], {"采空区基本信息": {"goaf_area": ["亩"]}})
+        self.assertIn("未知单位: 采空区基本信息.goaf_area = 亩", report)
+        self.assertEqual((converter.unknown_units, converter.unconverted_values), ({}, {}))
+
+
+class TestBufferInput(unittest.TestCase):
+    """测试从内存缓冲转换和验证"""
+    
+    def setUp(self):
+        self.tables = {}
+        for table_cn in MineTableSource.TABLE_MAPPING:
+            file_path = SAMPLE_DIR / f"{SAMPLE_MINE}-{table_cn}.csv"
+            self.tables[table_cn] = io.BytesIO(file_path.read_bytes())
+    
+    def test_convert_from_buffers(self):
+        """测试内存转换结果与磁盘转换一致，且不写任何文件"""
+        expected = ToJson(data_dir=str(SAMPLE_DIR)).convert_mine(SAMPLE_MINE)
+        
+        tmp = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            os.chdir(tmp)
+            result = ToJson().convert_mine_from_buffers(SAMPLE_MINE, self.tables)
+            self.assertEqual(os.listdir(tmp), [])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmp)
+        self.assertEqual(result, expected)
+    
+    def test_sessions_isolated(self):
+        """测试同名煤矿的两份上传数据互不影响"""
+        text = (SAMPLE_DIR / f"{SAMPLE_MINE}-采空区基本信息.csv").read_text(encoding='utf-8')
+        first = {"采空区基本信息": text.encode('gbk')}
+        second = {"采空区基本信息": memoryview(text.replace("HX001", "SB001").encode('utf-8'))}
+        converter = ToJson()
+        result_1 = converter.convert_mine_from_buffers("甲煤矿", first)
+        result_2 = converter.convert_mine_from_buffers("甲煤矿", second)
+        self.assertEqual(result_1["mine_info"]["mine_id"], "HX001")
+        self.assertEqual(result_2["mine_info"]["mine_id"], "SB001")
+        self.assertEqual(result_1["statistics"], result_2["statistics"])
+    
+    def test_validate_buffers(self):
+        """测试内存中的CSV和JSON验证"""
+        json_data = io.BytesIO()
+        ToJson().convert_mine_from_buffers(SAMPLE_MINE, self.tables, json_data, stream=True)
+        csv_result, json_result, compare_result = Validator().validate_buffers(
+            SAMPLE_MINE, self.tables, json_data.getvalue())
+        self.assertEqual(csv_result["found_tables"], 10)
+        self.assertTrue(json_result["valid"])
+        self.assertTrue(compare_result["match"])
+        print(f"✅ 内存缓冲转换和验证正确")
+
+
+class TestResultCache(unittest.TestCase):
+    """测试转换结果缓存"""
+    
+    def test_key(self):
+        """测试缓存键由煤矿名称、选项和上传内容决定"""
+        tables = {"采空区基本信息": b"a,b\n1,2\n"}
+        key = ResultCache.make_key("甲煤矿", tables, {"typed": False})
+        self.assertEqual(key, ResultCache.make_key("甲煤矿", {"采空区基本信息": io.BytesIO(b"a,b\n1,2\n")},
+                                                   {"typed": False}))
+        self.assertNotEqual(key, ResultCache.make_key("乙煤矿", tables, {"typed": False}))
+        self.assertNotEqual(key, ResultCache.make_key("甲煤矿", tables, {"typed": True}))
+        self.assertNotEqual(key, ResultCache.make_key("甲煤矿", {"采空区基本信息": b"a,b\n1,3\n"},
+                                                      {"typed": False}))
+    
+    def test_lru_eviction(self):
+        """测试按字节数淘汰最久未使用的结果"""
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", {}, b"1234")
+        cache.put("b", {}, b"1234")
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", {}, b"1234")
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.size, 8)
+        cache.put("big", {}, b"x" * 11)
+        self.assertIsNone(cache.get("big"))
+        
+        calls = []
+        create = lambda: (calls.append(1) or {"n": 1}, b"12")
+        self.assertEqual(cache.get_or_create("d", create), ({"n": 1}, b"12"))
+        self.assertEqual(cache.get_or_create("d", create), ({"n": 1}, b"12"))
+        self.assertEqual(len(calls), 1)
+        print(f"✅ 结果缓存: {len(cache)}项, {cache.size}字节")
+
+
+class TestZipConvert(unittest.TestCase):
+    """测试ZIP压缩包转换"""
+    
+    def setUp(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            for mine_name in ["甲煤矿", "乙煤矿"]:
+                for table_cn in MineTableSource.TABLE_MAPPING:
+                    data = (SAMPLE_DIR / f"{SAMPLE_MINE}-{table_cn}.csv").read_bytes()
+                    zf.writestr(f"普查数据/{mine_name}/{mine_name}-{table_cn}.csv", data)
+            zf.writestr("普查数据/说明.csv", "a,b\n")
+        self.archive = archive.getvalue()
+    
+    def convert(self, workers):
+        output = io.BytesIO()
+        results, report = ToJson().convert_zip(self.archive, output, workers=workers)
+        with zipfile.ZipFile(output) as zf:
+            files = {name: zf.read(name) for name in zf.namelist()}
+        return results, report, files
+    
+    def test_convert_zip(self):
+        """测试按煤矿分组转换，输出每个煤矿的JSON和报告"""
+        results, report, files = self.convert(workers=1)
+        self.assertEqual([r["mine_name"] for r in results], ["乙煤矿", "甲煤矿"])
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual(sorted(files), ["乙煤矿-采空区数据集.json", "甲煤矿-采空区数据集.json", "转换报告.txt"])
+        
+        expected = ToJson(data_dir=str(SAMPLE_DIR)).convert_mine(SAMPLE_MINE)
+        data = json.loads(files["甲煤矿-采空区数据集.json"])
+        self.assertEqual(data["data"], expected["data"])
+        self.assertEqual(files["转换报告.txt"].decode('utf-8'), report)
+        self.assertIn("说明.csv", report)
+        
+        parallel_results, _, parallel_files = self.convert(workers=2)
+        self.assertEqual(parallel_results, results)
+        self.assertEqual(parallel_files, files)
+        print(f"✅ ZIP转换: {len(results)}个煤矿")
+    
+    def test_duplicate_names_reported(self):
+        """测试不同子目录中的同名CSV只转换第一个，其余写入报告"""
+        archive = io.BytesIO(self.archive)
+        with zipfile.ZipFile(archive, 'a') as zf:
+            zf.writestr("备份/甲煤矿-采空区基本信息.csv", "mine_id,goaf_id\nXX001,XX001-G001\n")
+        results, report = ToJson().convert_zip(archive.getvalue(), io.BytesIO())
+        self.assertEqual(results[1]["mine_name"], "甲煤矿")
+        self.assertEqual(results[1]["record_count"], results[0]["record_count"])
+        self.assertIn("已忽略的CSV文件: 1个", report)
+        self.assertIn("备份/甲煤矿-采空区基本信息.csv", report)
+    
+    def test_size_limits(self):
+        """测试CSV文件数或解压后大小超过上限时不读取任何文件"""
+        for limit, value in [("ZIP_MAX_FILES", 19), ("ZIP_MAX_FILE_BYTES", 100), ("ZIP_MAX_TOTAL_BYTES", 1000)]:
+            with self.subTest(limit=limit), mock.patch.object(ToJson, limit, value), \
+                    mock.patch.object(zipfile.ZipFile, 'read') as read:
+                with self.assertRaises(ValueError):
+                    ToJson().convert_zip(self.archive, io.BytesIO())
+                read.assert_not_called()
+
+
+class TestSyntheticData(unittest.TestCase):
+    """测试基准测试的合成数据生成器"""
+    
+    @classmethod
+    def setUpClass(cls):
+        sys.path.insert(0, str(SAMPLE_DIR / "benchmarks"))
+        from synthetic import SyntheticMineGenerator
+        cls.generator_class = SyntheticMineGenerator
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_deterministic_and_valid(self):
+        """测试相同种子生成的文件一致，且通过字段级和引用完整性验证"""
+        for encoding in ["utf-8", "gbk"]:
+            self.generator_class(encoding=encoding).generate(self.tmp / f"{encoding}-a", mines=2, rows=500)
+            self.generator_class(encoding=encoding).generate(self.tmp / f"{encoding}-b", mines=2, rows=500)
+            files = sorted(p.name for p in (self.tmp / f"{encoding}-a").iterdir())
+            self.assertEqual(len(files), 20)
+            for name in files:
+                self.assertEqual((self.tmp / f"{encoding}-a" / name).read_bytes(),
+                                 (self.tmp / f"{encoding}-b" / name).read_bytes())
+        
+        validator = Validator()
+        mine_name = self.generator_class.mine_name(1)
+        data_dir = str(self.tmp / "gbk-a")
+        self.assertTrue(validator.validate_fields(mine_name, data_dir)["valid"])
+        self.assertTrue(validator.validate_references(mine_name, data_dir)["valid"])
+        csv_result = validator.validate_csv(mine_name, data_dir)
+        self.assertEqual(csv_result["found_tables"], 10)
+        self.assertEqual(csv_result["warnings"], [])
+        
+        basic = MineTableSource(data_dir).load(mine_name, "采空区基本信息")
+        self.assertTrue(basic["goaf_area"].astype(str).str.startswith("￥").any())
+        print(f"✅ 合成数据: 确定性生成并通过验证")
+
+
+class TestInstrumentation(unittest.TestCase):
+    """测试转换和验证的性能指标"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.mines = ["甲煤矿", "乙煤矿"]
+        make_mine_dir(self.tmp, self.mines)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_convert_metrics(self):
+        """测试按煤矿和表记录指标，输出不变，批量转换写出报告和指标文件"""
+        output = Path(self.tmp)
+        plain = ToJson(data_dir=self.tmp).batch_convert(self.mines, str(output / "plain"))
+        converter = ToJson(data_dir=self.tmp, instrument=True)
+        results = converter.batch_convert(self.mines, str(output / "metrics"), workers=2)
+        for p, r in zip(plain, results):
+            self.assertEqual(Path(p["file"]).read_bytes(), Path(r["file"]).read_bytes())
+        
+        mine = converter.metrics.mines["甲煤矿"]
+        self.assertEqual(mine["rows"], results[0]["record_count"])
+        self.assertGreater(mine["bytes"], 0)
+        self.assertGreater(mine["peak_memory_mb"], 0)
+        self.assertEqual(set(mine["stages"]), {"read", "write"})
+        table = mine["tables"]["采空区基本信息"]
+        self.assertEqual(table["read"]["encoding"], "utf-8")
+        self.assertEqual(table["read"]["failed_attempts"], 0)
+        self.assertIsNotNone(table["rows_per_s"])
+        
+        metrics_file = json.loads((output / "metrics" / ToJson.METRICS_FILE).read_text(encoding='utf-8'))
+        self.assertEqual(metrics_file["mines"]["乙煤矿"]["rows"], results[1]["record_count"])
+        report = (output / "metrics" / "转换报告.txt").read_text(encoding='utf-8')
+        self.assertIn("⏱️ 耗时", report)
+        self.assertNotIn("⏱️", (output / "plain" / "转换报告.txt").read_text(encoding='utf-8'))
+        self.assertFalse((output / "plain" / ToJson.METRICS_FILE).exists())
+        print(f"✅ 转换指标: {mine['rows_per_s']} 行/s")
+    
+    def test_validator_metrics(self):
+        """测试验证方法的耗时累加到煤矿指标，GBK文件记录命中的编码"""
+        gbk_file = Path(self.tmp) / "甲煤矿-密闭墙信息.csv"
+        gbk_file.write_bytes(gbk_file.read_text(encoding='utf-8').encode('gbk'))
+        validator = Validator(str(MineSchema.DEFAULT_PATH), instrument=True)
+        csv_result = validator.validate_csv("甲煤矿", self.tmp)
+        field_result = validator.validate_fields("甲煤矿", self.tmp)
+        
+        mine = validator.metrics.mines["甲煤矿"]
+        self.assertEqual(set(mine["stages"]), {"read", "validate_csv", "validate_fields"})
+        self.assertEqual(mine["rows"], csv_result["total_records"])
+        read = mine["tables"]["密闭墙信息"]["read"]
+        self.assertEqual(read["encoding"], "gbk")
+        self.assertFalse(read["cached"])
+        
+        json_file = Path(self.tmp) / "甲煤矿.json"
+        ToJson(data_dir=self.tmp).convert_mine("甲煤矿", str(json_file))
+        json_result = validator.validate_json(str(json_file))
+        compare_result = validator.compare_csv_json("甲煤矿", str(json_file), self.tmp)
+        self.assertIn(str(json_file), validator.metrics.mines)
+        report = validator.generate_report(csv_result, json_result, compare_result, field_result)
+        self.assertIn("⏱️ 性能指标", report)
+        self.assertIn("(gbk/", report)
+        print(f"✅ 验证指标: {mine['stages']}")
+    
+    def test_validator_metrics_file(self):
+        """测试引用完整性验证读取的被引用表计入指标，保存报告时写出结构化指标文件"""
+        validator = Validator(str(MineSchema.DEFAULT_PATH), instrument=True)
+        reference_result = validator.validate_references("甲煤矿", self.tmp)
+        tables = validator.metrics.mines["甲煤矿"]["tables"]
+        self.assertEqual(tables["采空区基本信息"]["read"]["encoding"], "utf-8")
+        self.assertGreater(tables["采空区基本信息"]["rows"], 0)
+        
+        json_file = Path(self.tmp) / "甲煤矿.json"
+        ToJson(data_dir=self.tmp).convert_mine("甲煤矿", str(json_file))
+        report = validator.generate_report(validator.validate_csv("甲煤矿", self.tmp),
+                                           validator.validate_json(str(json_file)),
+                                           validator.compare_csv_json("甲煤矿", str(json_file), self.tmp),
+                                           reference_result=reference_result)
+        report_file = Path(self.tmp) / "甲煤矿-验证报告.txt"
+        validator.save_report(report, report_file)
+        self.assertEqual(report_file.read_text(encoding='utf-8'), report)
+        metrics_file = json.loads((Path(self.tmp) / Validator.METRICS_FILE).read_text(encoding='utf-8'))
+        self.assertEqual(set(metrics_file["mines"]["甲煤矿"]["stages"]),
+                         {"read", "validate_references", "validate_csv", "compare_csv_json"})
+        
+        plain_dir = Path(self.tmp) / "plain"
+        plain_dir.mkdir()
+        Validator(str(MineSchema.DEFAULT_PATH)).save_report(report, plain_dir / "甲煤矿-验证报告.txt")
+        self.assertFalse((plain_dir / Validator.METRICS_FILE).exists())
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "未安装pyarrow")
+class TestParquetExport(unittest.TestCase):
+    """测试列式Parquet导出（需要pyarrow）"""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        make_mine_dir(self.tmp, ["甲煤矿"])
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_export_and_read_back(self):
+        """测试按mine_id分区导出、按Schema类型存储，并读回嵌套结构"""
+        from MineParquet import ParquetDatasetReader
+        output_dir = Path(self.tmp) / "parquet"
+        results = ToJson(data_dir=self.tmp).export_parquet(["甲煤矿"], str(output_dir))
+        self.assertTrue(results[0]["success"])
+        
+        reader = ParquetDatasetReader(output_dir)
+        self.assertEqual(reader.mines(), {"HX001": "甲煤矿"})
+        self.assertTrue((output_dir / "goaf_gas_info" / "mine_id=HX001" / "part-0.parquet").exists())
+        gas = reader.scan("goaf_gas_info", columns=["mine_id", "gas_type", "gas_concentration"])
+        self.assertEqual(str(gas.schema.field("gas_concentration").type), "double")
+        self.assertEqual(set(gas.column("mine_id").to_pylist()), {"HX001"})
+        
+        data = ToJson.read_parquet(str(output_dir), "HX001")
+        expected = ToJson(data_dir=self.tmp, typed=True, normalize=True).convert_mine("甲煤矿")
+        self.assertEqual(data["mine_info"], expected["mine_info"])
+        self.assertEqual(data["statistics"], expected["statistics"])
+        schema = MineSchema()
+        for table_cn, table_en in MineTableSource.TABLE_MAPPING.items():
+            known = set(schema.field_types(table_cn))
+            known |= {name + MineSchema.MASKED_SUFFIX for name in known}
+            for got, want in zip(data["data"][table_en], expected["data"][table_en]):
+                self.assertEqual(list(got), list(want))
+                self.assertEqual({k: v for k, v in got.items() if k in known},
+                                 {k: v for k, v in want.items() if k in known})
+        
+        # 再次导出时覆盖该煤矿的分区
+        ToJson(data_dir=self.tmp).export_parquet(["甲煤矿"], str(output_dir))
+        self.assertEqual(reader.scan("goaf_gas_info").num_rows, expected["statistics"]["goaf_gas_info"])
+        print(f"✅ Parquet导出: {len(results)}个煤矿")
+    
+    def test_numeric_mine_id_and_collisions(self):
+        """测试全数字mine_id按字符串分区；没有mine_id或mine_id已属于其他煤矿时不覆盖"""
+        from MineParquet import ParquetDatasetReader
+        for csv_file in Path(self.tmp).glob("甲煤矿-*.csv"):
+            text = csv_file.read_text(encoding='utf-8').replace("HX001", "140100")
+            (Path(self.tmp) / csv_file.name.replace("甲煤矿", "乙煤矿")).write_text(text, encoding='utf-8')
+        output_dir = Path(self.tmp) / "parquet"
+        reader = ParquetDatasetReader(output_dir)
+        # 只有全数字的分区时pyarrow会推断为整数
+        self.assertTrue(ToJson(data_dir=self.tmp).export_parquet(["乙煤矿"], str(output_dir))[0]["success"])
+        self.assertEqual(reader.mines(), {"140100": "乙煤矿"})
+        self.assertTrue(ToJson(data_dir=self.tmp).export_parquet(["甲煤矿"], str(output_dir))[0]["success"])
+        self.assertEqual(reader.mines(), {"HX001": "甲煤矿", "140100": "乙煤矿"})
+        gas = reader.scan("goaf_gas_info", columns=["mine_id"])
+        self.assertEqual(set(gas.column("mine_id").to_pylist()), {"HX001", "140100"})
+        
+        # 同一mine_id的另一个煤矿不覆盖已导出的分区
+        make_mine_dir(self.tmp, ["丙煤矿"])
+        results = ToJson(data_dir=self.tmp).export_parquet(["丙煤矿"], str(output_dir))
+        self.assertFalse(results[0]["success"])
+        self.assertEqual(reader.mines()["HX001"], "甲煤矿")
+        
+        # 没有mine_id时不用名称生成ID（名称前缀相同的煤矿会冲突）
+        for name in ["采空区数据测试煤矿一", "采空区数据测试煤矿二"]:
+            df = MineTableSource(self.tmp).load("甲煤矿", "采空区基本信息").drop(columns=["mine_id"])
+            df.to_csv(Path(self.tmp) / f"{name}-采空区基本信息.csv", index=False)
+        results = ToJson(data_dir=self.tmp).export_parquet(["采空区数据测试煤矿一", "采空区数据测试煤矿二"],
+                                                          str(output_dir))
+        self.assertEqual([result["success"] for result in results], [False, False])
+        self.assertIn("mine_id", results[0]["error"])
+
+
+class TestSqliteExport(unittest.TestCase):
+    """测试SQLite数据库导出"""
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        make_mine_dir(self.tmp, ["甲煤矿"])
+        self.db_path = self.tmp / "sqlite" / ToJson.SQLITE_FILE
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def _query(self, sql, params=()):
+        with closing(sqlite3.connect(str(self.db_path))) as conn:
+            return conn.execute(sql, params).fetchall()
+    
+    def test_export_types_and_indexes(self):
+        """测试按Schema类型建表、建索引，行数与转换结果一致，再次导出时覆盖该煤矿"""
+        results = ToJson(data_dir=str(self.tmp)).export_sqlite(["甲煤矿"], str(self.tmp / "sqlite"))
+        self.assertTrue(results[0]["success"])
+        expected = ToJson(data_dir=str(self.tmp), typed=True, normalize=True).convert_mine("甲煤矿")
+        for table_en, count in expected["statistics"].items():
+            self.assertEqual(self._query(f"SELECT COUNT(*) FROM {table_en}")[0][0], count)
+        self.assertEqual(self._query("SELECT mine_id, mine_name FROM mine_info"), [("HX001", "甲煤矿")])
+        
+        columns = {row[1]: row[2] for row in self._query("PRAGMA table_info(goaf_basic_info)")}
+        self.assertEqual(columns["goaf_area"], "REAL")
+        self.assertEqual(columns["goaf_area_masked"], "INTEGER")
+        self.assertEqual(columns["is_adjacent_mine"], "INTEGER")
+        indexes = {row[0] for row in self._query("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"idx_goaf_basic_info_goaf_id", "idx_goaf_gas_info_goaf_id",
+                         "idx_goaf_gas_info_gas_id", "idx_goaf_gas_info_mine_id"} <= indexes)
+        
+        # 数值按REAL存储，脱敏标记单独一列，无法转为数值的原文写入_text列
+        first = expected["data"]["goaf_basic_info"][0]
+        area, masked = self._query("SELECT goaf_area, goaf_area_masked FROM goaf_basic_info WHERE goaf_id = ?",
+                                   (first["goaf_id"],))[0]
+        self.assertEqual((area, bool(masked)), (first["goaf_area"], first["goaf_area_masked"]))
+        plan = " ".join(row[-1] for row in self._query(
+            "EXPLAIN QUERY PLAN SELECT * FROM goaf_gas_info WHERE goaf_id = ?", ("HX001-G025",)))
+        self.assertIn("idx_goaf_gas_info_goaf_id", plan)
+        
+        ToJson(data_dir=str(self.tmp)).export_sqlite(["甲煤矿"], str(self.tmp / "sqlite"))
+        self.assertEqual(self._query("SELECT COUNT(*) FROM goaf_gas_info")[0][0],
+                         expected["statistics"]["goaf_gas_info"])
+        print(f"✅ SQLite导出: {sum(expected['statistics'].values())}条记录")
+    
+    def test_mine_id_only_table(self):
+        """测试只有mine_id列的表按行数写入"""
+        (self.tmp / "甲煤矿-采空区治理信息.csv").write_text("mine_id\nHX001\nHX001\n", encoding='utf-8')
+        results = ToJson(data_dir=str(self.tmp)).export_sqlite(["甲煤矿"], str(self.db_path.parent))
+        self.assertTrue(results[0]["success"])
+        table_en = ToJson.TABLE_MAPPING["采空区治理信息"]
+        self.assertEqual(self._query(f"SELECT mine_id FROM {table_en}"), [("HX001",), ("HX001",)])
+    
+    def test_refuses_mine_id_collisions(self):
+        """测试没有mine_id的煤矿不导出，mine_id已属于其他煤矿时不覆盖其数据"""
+        output_dir = str(self.tmp / "sqlite")
+        ToJson(data_dir=str(self.tmp)).export_sqlite(["甲煤矿"], output_dir)
+        count = self._query("SELECT COUNT(*) FROM goaf_gas_info")[0][0]
+        
+        make_mine_dir(self.tmp, ["乙煤矿"])
+        results = ToJson(data_dir=str(self.tmp)).export_sqlite(["乙煤矿"], output_dir)
+        self.assertFalse(results[0]["success"])
+        self.assertEqual(self._query("SELECT mine_id, mine_name FROM mine_info"), [("HX001", "甲煤矿")])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM goaf_gas_info")[0][0], count)
+        
+        # 名称前缀相同的煤矿由名称生成的ID相同，没有mine_id时不导出
+        for name in ["采空区数据测试煤矿一", "采空区数据测试煤矿二"]:
+            df = MineTableSource(str(self.tmp)).load("甲煤矿", "采空区基本信息").drop(columns=["mine_id"])
+            df.to_csv(self.tmp / f"{name}-采空区基本信息.csv", index=False)
+        results = ToJson(data_dir=str(self.tmp)).export_sqlite(["采空区数据测试煤矿一", "采空区数据测试煤矿二"],
+                                                               output_dir)
+        self.assertEqual([result["success"] for result in results], [False, False])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM mine_info")[0][0], 1)
+    
+    def test_cross_mine_query(self):
+        """测试多个煤矿写入同一数据库后按mine_id关联查询"""
+        sys.path.insert(0, str(SAMPLE_DIR / "benchmarks"))
+        from synthetic import SyntheticMineGenerator
+        data_dir = self.tmp / "synthetic"
+        SyntheticMineGenerator().generate(data_dir, mines=2, rows=500)
+        results = ToJson(data_dir=str(data_dir)).export_sqlite(None, str(self.tmp / "sqlite"))
+        self.assertTrue(all(result["success"] for result in results))
+        
+        mines = self._query("SELECT mine_id FROM mine_info ORDER BY mine_id")
+        self.assertEqual(len(mines), 2)
+        joined = self._query(
+            "SELECT g.mine_id, COUNT(*) FROM goaf_gas_info g JOIN goaf_basic_info b "
+            "ON g.mine_id = b.mine_id AND g.goaf_id = b.goaf_id GROUP BY g.mine_id ORDER BY g.mine_id")
+        # 合成数据中goaf_id可能为空或为多值（"+"连接），这些行不参与单值关联
+        counts = self._query("SELECT mine_id, COUNT(*) FROM goaf_gas_info WHERE instr(goaf_id, '+') = 0 "
+                             "GROUP BY mine_id ORDER BY mine_id")
+        self.assertEqual(joined, counts)
+        print(f"✅ SQLite跨煤矿查询: {len(mines)}个煤矿")
+
+
+class TestStreamingValidation(unittest.TestCase):
+    """测试流式JSON验证"""
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.validator = Validator(str(MineSchema.DEFAULT_PATH))
+        self.json_file = self.tmp / "TEST煤矿.json"
+        ToJson(data_dir=str(SAMPLE_DIR)).convert_mine(SAMPLE_MINE, str(self.json_file))
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_stream_matches_full_load(self):
+        """测试流式验证与整体加载结果一致（路径、bytes、文件对象，任意块边界）"""
+        expected = self.validator.validate_json(str(self.json_file))
+        data = self.json_file.read_bytes()
+        with mock.patch('MineJson.MineJsonReader.CHUNK_SIZE', 7):
+            for source in [str(self.json_file), data, io.BytesIO(data)]:
+                result = self.validator.validate_json(source, stream=True)
+                self.assertEqual(result["table_details"], expected["table_details"])
+                self.assertEqual(result["total_records"], expected["total_records"])
+                self.assertEqual(result["errors"], expected["errors"])
+            compare = self.validator.compare_csv_json(SAMPLE_MINE, data, str(SAMPLE_DIR), stream=True)
+        self.assertTrue(compare["match"])
+        print(f"✅ 流式验证: {expected['total_records']}条记录")
+    
+    def test_stream_nonfinite_after_data(self):
+        """测试data之后的顶层字段中的NaN不计入最后一个表"""
+        data = json.loads(self.json_file.read_text(encoding='utf-8'))
+        statistics = data.pop("statistics")
+        statistics["treatment_info"] = float("nan")
+        data["statistics"] = statistics
+        text = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        
+        expected = self.validator.validate_json(text)
+        result = self.validator.validate_json(text, stream=True)
+        self.assertEqual(result["errors"], expected["errors"])
+        self.assertFalse(any("包含NaN" in error for error in result["errors"]))
+    
+    def test_stream_detects_problems(self):
+        """测试流式验证发现NaN/Infinity、统计数不一致、缺少顶层字段和截断的文件"""
+        data = json.loads(self.json_file.read_text(encoding='utf-8'))
+        data["data"]["goaf_gas_info"][0]["gas_concentration"] = float("nan")
+        data["data"]["goaf_water_info"][0]["water_volume"] = float("-inf")
+        data["statistics"]["crack_info"] += 1
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        
+        result = self.validator.validate_json(text.encode('utf-8'), stream=True)
+        self.assertIn("采空区积气信息: 包含NaN值（应为null）", result["errors"])
+        self.assertIn("采空区积水信息: 包含Infinity值（应为null）", result["errors"])
+        self.assertTrue(any("地裂缝信息: 统计数" in w for w in result["warnings"]))
+        
+        del data["statistics"]
+        result = self.validator.validate_json(json.dumps(data).encode('utf-8'), stream=True)
+        self.assertFalse(result["valid"])
+        self.assertIn("缺少顶层字段: statistics", result["errors"])
+        
+        result = self.validator.validate_json(text[:len(text) // 2].encode('utf-8'), stream=True)
+        self.assertFalse(result["valid"])
+        print("✅ 流式验证发现问题")
+    
+    def test_stream_memory_is_bounded(self):
+        """测试流式验证的内存占用远小于文件大小"""
+        import tracemalloc
+        records = [{"gas_id": f"G{i:06d}", "gas_type": "CH4", "gas_concentration": i * 0.5} for i in range(50000)]
+        big_file = self.tmp / "big.json"
+        with open(big_file, 'w', encoding='utf-8') as f:
+            json.dump({"mine_info": {}, "statistics": {"goaf_gas_info": len(records)},
+                       "data": {"goaf_gas_info": records}}, f, indent=2)
+        del records
+        
+        with mock.patch('MineJson.MineJsonReader.CHUNK_SIZE', 64 * 1024):
+            tracemalloc.start()
+            result = self.validator.validate_json(str(big_file), stream=True)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.assertEqual(result["total_records"], 50000)
+        self.assertLess(peak, big_file.stat().st_size / 4)
+        print(f"✅ 流式验证峰值内存: {peak / 1024:.0f}KB, 文件 {big_file.stat().st_size / 1024:.0f}KB")
+
+
+class TestOutputModes(unittest.TestCase):
+    """测试紧凑、列式和压缩输出"""
+    
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.validator = Validator(str(MineSchema.DEFAULT_PATH))
+        self.expected = json.loads(self._convert().read_text(encoding='utf-8'))
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def _convert(self, stream: bool = False, **options) -> Path:
+        converter = ToJson(data_dir=str(SAMPLE_DIR), **options)
+        path = self.tmp / (("stream-" if stream else "") + converter.output_name(SAMPLE_MINE))
+        converter.convert_mine(SAMPLE_MINE, str(path), stream=stream)
+        return path
+    
+    def _check_readable(self, path: Path):
+        """验证和比对在整体加载和流式读取下都通过"""
+        for stream in (False, True):
+            result = self.validator.validate_json(str(path), stream=stream)
+            self.assertTrue(result["valid"], result["errors"])
+            self.assertEqual(result["total_records"], sum(self.expected["statistics"].values()))
+            compare = self.validator.compare_csv_json(SAMPLE_MINE, str(path), str(SAMPLE_DIR), stream=stream)
+            self.assertTrue(compare["match"])
+    
+    @staticmethod
+    def _columnar_to_records(data: dict) -> dict:
+        data["data"] = {table_en: [dict(zip(table["columns"], row)) for row in table["rows"]]
+                        for table_en, table in data["data"].items()}
+        return data
+    
+    def test_compact(self):
+        """测试紧凑输出与默认输出内容一致、体积更小，流式写出结果相同"""
+        path = self._convert(compact=True)
+        text = path.read_text(encoding='utf-8')
+        self.assertNotIn("\n", text)
+        self.assertEqual(json.loads(text), self.expected)
+        self.assertLess(len(text), len(json.dumps(self.expected, ensure_ascii=False, indent=2)))
+        self.assertEqual(self._convert(stream=True, compact=True).read_text(encoding='utf-8'), text)
+        self._check_readable(path)
+        print(f"✅ 紧凑输出: {len(text) / 1024:.0f}KB")
+    
+    def test_columnar(self):
+        """测试列式布局还原后与记录数组一致，流式写出结果相同"""
+        path = self._convert(layout="columnar")
+        data = json.loads(path.read_text(encoding='utf-8'))
+        table = data["data"]["goaf_basic_info"]
+        self.assertEqual(set(table), {"columns", "rows"})
+        self.assertEqual(len(table["rows"]), self.expected["statistics"]["goaf_basic_info"])
+        self.assertEqual(self._columnar_to_records(data), self.expected)
+        self.assertEqual(self._convert(stream=True, layout="columnar").read_bytes(), path.read_bytes())
+        self._check_readable(path)
+        self._check_readable(self._convert(layout="columnar", compact=True))
+        print("✅ 列式布局")
+    
+    def test_gzip(self):
+        """测试gzip压缩输出可直接验证，解压后与未压缩输出一致"""
+        import gzip
+        path = self._convert(compression="gzip")
+        self.assertTrue(path.name.endswith(".json.gz"))
+        self.assertEqual(json.loads(gzip.decompress(path.read_bytes())), self.expected)
+        self.assertEqual(self._convert(stream=True, compression="gzip").read_bytes(), path.read_bytes())
+        self._check_readable(path)
+        self.assertTrue(self.validator.validate_json(path.read_bytes(), stream=True)["valid"])
+        print(f"✅ gzip输出: {path.stat().st_size / 1024:.0f}KB")
+    
+    def test_zstd(self):
+        """测试zstd压缩输出（需要zstandard）"""
+        try:
+            import zstandard
+        except ImportError:
+            with self.assertRaises(ImportError):
+                ToJson(compression="zstd")
+            raise unittest.SkipTest("未安装zstandard")
+        path = self._convert(compression="zstd", layout="columnar")
+        self.assertTrue(path.name.endswith(".json.zst"))
+        data = json.loads(zstandard.ZstdDecompressor().stream_reader(path.read_bytes()).read())
+        self.assertEqual(self._columnar_to_records(data), self.expected)
+        self._check_readable(path)
+        print(f"✅ zstd输出: {path.stat().st_size / 1024:.0f}KB")
+    
+    def test_invalid_options(self):
+        """测试不支持的布局和压缩方式"""
+        with self.assertRaises(ValueError):
+            ToJson(layout="rows")
+        with self.assertRaises(ValueError):
+            ToJson(compression="bz2")
+
+
+@unittest.skipUnless(importlib.util.find_spec("orjson"), "未安装orjson")
+class TestJsonBackend(unittest.TestCase):
+    """测试JSON编解码后端"""
+    
+    # 浮点数写法、非有限值、超过64位的整数、非字符串键、numpy标量、控制字符等边界值
+    TRICKY_VALUES = [
+        {}, [], {"a": [], "b": {}}, 0.1, -0.0, 1e15, 1e16, 1.5e-5, 1e-4, 123456789012345678.0, 5e-324,
+        float("nan"), float("inf"), 2 ** 70, {1: "a"}, np.float64(1.5), "a\x00\x1f\x7f\u2028",
+        "\ud800", "中文\n\t\"\\", [{"gas_id": "G1", "gas_concentration": 1e-7, "nested": [1, {"x": None}]}]
+    ]
+    
+    def setUp(self):
+        from MineJson import JsonBackend, OrjsonBackend
+        self.stdlib = JsonBackend()
+        self.orjson = OrjsonBackend()
+    
+    def test_pretty_identical(self):
+        """测试缩进格式下orjson后端与标准库逐字节一致（不一致的值自动改用标准库）"""
+        for value in self.TRICKY_VALUES:
+            self.assertEqual(self.orjson.dumps(value), self.stdlib.dumps(value), repr(value))
+            self.assertEqual(self.orjson.dumps([value, value]), self.stdlib.dumps([value, value]), repr(value))
+        print("✅ orjson缩进格式与标准库一致")
+    
+    def test_compact_exception(self):
+        """测试紧凑格式只在科学计数法和NaN/Infinity上与标准库不同"""
+        for value in self.TRICKY_VALUES:
+            expected = self.stdlib.dumps(value, indent=None)
+            actual = self.orjson.dumps(value, indent=None)
+            if actual != expected:
+                self.assertTrue(any(token in expected for token in ("e+", "e-", "NaN", "Infinity")), repr(value))
+        self.assertEqual(self.orjson.dumps([1e16, float("nan")], indent=None), "[1e16,null]")
+        self.assertEqual(self.orjson.loads("[1e16]"), self.stdlib.loads("[1e+16]"))
+    
+    def test_converter_output_identical(self):
+        """测试两种后端的转换输出（整体写出和流式写出）一致"""
+        from MineJson import get_json_backend
+        self.assertEqual(get_json_backend().name, "orjson")
+        with self.assertRaises(ValueError):
+            get_json_backend("ujson")
+        for options in [{}, {"layout": "columnar"}, {"compact": True}]:
+            outputs = set()
+            for backend in ("json", "orjson"):
+                for stream in (False, True):
+                    buffer = io.BytesIO()
+                    ToJson(data_dir=str(SAMPLE_DIR), json_backend=backend, **options).convert_mine(
+                        SAMPLE_MINE, buffer, stream=stream)
+                    outputs.add(buffer.getvalue())
+            self.assertEqual(len(outputs), 1, options)
+        print("✅ 两种后端的转换输出一致")
+    
+    def test_validate_json_backends(self):
+        """测试两种后端的验证结果一致，整体加载时同样报告NaN和Infinity"""
+        data = ToJson(data_dir=str(SAMPLE_DIR)).convert_mine(SAMPLE_MINE)
+        data["data"]["goaf_gas_info"][0]["gas_concentration"] = float("nan")
+        data["data"]["goaf_water_info"][0]["water_volume"] = float("-inf")
+        data["data"]["crack_info"][0]["remarks"] = "NaN"
+        content = self.stdlib.dumps(data).encode('utf-8')
+        results = []
+        for backend in ("json", "orjson"):
+            validator = Validator(str(MineSchema.DEFAULT_PATH), json_backend=backend)
+            for stream in (False, True):
+                result = validator.validate_json(content, stream=stream)
+                results.append((result["errors"], result["table_details"]))
+        self.assertEqual(results.count(results[0]), len(results))
+        self.assertEqual(sorted(results[0][0]), ["采空区积气信息: 包含NaN值（应为null）",
+                                                 "采空区积水信息: 包含Infinity值（应为null）"])
+        print("✅ 两种后端的验证结果一致")
+
+
+class TestMineDataset(unittest.TestCase):
+    """测试转换结果的内存索引"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.data = ToJson(data_dir=str(SAMPLE_DIR)).convert_mine(SAMPLE_MINE)
+        cls.dataset = MineDataset(cls.data)
+    
+    def test_primary_key(self):
+        """测试按主键取记录（英文或中文表名）"""
+        goaf = self.data["data"]["goaf_basic_info"][3]
+        self.assertIs(self.dataset.get("goaf_basic_info", goaf["goaf_id"]), goaf)
+        self.assertIs(self.dataset.get("采空区基本信息", goaf["goaf_id"]), goaf)
+        self.assertIsNone(self.dataset.get("goaf_basic_info", "不存在"))
+        self.assertEqual(self.dataset.primary_key("goaf_gas_info"), "gas_id")
+    
+    def test_related_matches_scan(self):
+        """测试按外键取关联记录与逐表扫描结果一致"""
+        schema = MineSchema()
+        self.assertIn(("采空区积水信息", "goaf_id", "采空区基本信息"), schema.references())
+        for goaf in self.data["data"]["goaf_basic_info"]:
+            related = self.dataset.related("goaf_basic_info", goaf["goaf_id"])
+            self.assertEqual(set(related), set(self.data["data"]) - {"goaf_basic_info"})
+            for table_en, records in related.items():
+                expected = [r for r in self.data["data"][table_en]
+                            if goaf["goaf_id"] in MineSchema.split_references(r.get("goaf_id"))]
+                self.assertEqual(records, expected)
+        fire = self.data["data"]["fire_info"][0]
+        self.assertEqual([p["goaf_id"] for p in self.dataset.parents("fire_info", fire)["goaf_basic_info"]],
+                         [fire["goaf_id"]])
+        print("✅ 外键关联查询")
+    
+    def test_multi_value_references(self):
+        """测试外键单元格引用多个采空区（样例顶板悬顶、冒落信息中逗号分隔的goaf_id）"""
+        roofs = [r for r in self.data["data"]["suspended_roof_info"] if "," in (r.get("goaf_id") or "")]
+        self.assertEqual(len(roofs), 5)
+        shared = [r for r in roofs if "HX001-G003" in r["goaf_id"].split(",")]
+        self.assertEqual(len(shared), 3)
+        related = self.dataset.related("goaf_basic_info", "HX001-G003")["suspended_roof_info"]
+        self.assertEqual([r for r in related if r in roofs], shared)
+        
+        parents = self.dataset.parents("suspended_roof_info", shared[0])["goaf_basic_info"]
+        self.assertEqual([p["goaf_id"] for p in parents], shared[0]["goaf_id"].split(","))
+        collapse = next(r for r in self.data["data"]["collapse_info"] if "," in (r.get("goaf_id") or ""))
+        first_id = collapse["goaf_id"].split(",")[0]
+        self.assertIn(collapse, self.dataset.filter("collapse_info", goaf_id=first_id))
+        self.assertIn(collapse, self.dataset.lookup("collapse_info", "goaf_id", first_id))
+    
+    def test_filter(self):
+        """测试按分类字段筛选，多值字段按每个值索引"""
+        gas = self.data["data"]["goaf_gas_info"]
+        expected = [r for r in gas if r["gas_type"] == "CO" and r["coal_seam"] == gas[0]["coal_seam"]]
+        self.assertEqual(self.dataset.filter("goaf_gas_info", gas_type="CO", coal_seam=gas[0]["coal_seam"]), expected)
+        self.assertEqual(self.dataset.filter("goaf_gas_info", gas_type="不存在"), [])
+        self.assertIn(("goaf_gas_info", "gas_type"), self.dataset._indexes)
+        
+        normalized = ToJson(data_dir=str(SAMPLE_DIR), typed=True, normalize=True).convert_mine(SAMPLE_MINE)
+        dataset = MineDataset(normalized)
+        seams = [r for r in normalized["data"]["goaf_basic_info"] if "3-1" in (r["coal_seam"] or [])]
+        self.assertTrue(seams)
+        self.assertEqual(dataset.lookup("goaf_basic_info", "coal_seam", "3-1"), seams)
+    
+    def test_from_columnar_json(self):
+        """测试从列式布局的压缩JSON文件建立索引"""
+        tmp = Path(tempfile.mkdtemp())
+        try:
+            converter = ToJson(data_dir=str(SAMPLE_DIR), layout="columnar", compression="gzip")
+            path = tmp / converter.output_name(SAMPLE_MINE)
+            converter.convert_mine(SAMPLE_MINE, str(path))
+            dataset = MineDataset.from_json(path)
+        finally:
+            shutil.rmtree(tmp)
+        self.assertEqual(dataset.tables, self.data["data"])
+        self.assertEqual(dataset.mine_info, self.data["mine_info"])
+
+
 class TestIntegration(unittest.TestCase):
     """集成测试"""
     
@@ -176,6 +1553,7 @@ class TestIntegration(unittest.TestCase):
         
         # 3. 断言
         self.assertGreater(total_records, 0)
+        self.assertEqual(csv_result["total_records"], total_records)
         self.assertTrue(json_result["valid"])
         self.assertTrue(compare_result["match"])
         
@@ -194,6 +1572,27 @@ def run_tests():
     # 添加测试
     suite.addTests(loader.loadTestsFromTestCase(TestToJson))
     suite.addTests(loader.loadTestsFromTestCase(TestValidator))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchConvert))
+    suite.addTests(loader.loadTestsFromTestCase(TestMineTableSource))
+    suite.addTests(loader.loadTestsFromTestCase(TestFrameToRecords))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingOutput))
+    suite.addTests(loader.loadTestsFromTestCase(TestJsonlExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestTypedParsing))
+    suite.addTests(loader.loadTestsFromTestCase(TestFieldValidation))
+    suite.addTests(loader.loadTestsFromTestCase(TestReferenceIntegrity))
+    suite.addTests(loader.loadTestsFromTestCase(TestNormalize))
+    suite.addTests(loader.loadTestsFromTestCase(TestUnitConversion))
+    suite.addTests(loader.loadTestsFromTestCase(TestBufferInput))
+    suite.addTests(loader.loadTestsFromTestCase(TestResultCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestZipConvert))
+    suite.addTests(loader.loadTestsFromTestCase(TestSyntheticData))
+    suite.addTests(loader.loadTestsFromTestCase(TestInstrumentation))
+    suite.addTests(loader.loadTestsFromTestCase(TestParquetExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestSqliteExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingValidation))
+    suite.addTests(loader.loadTestsFromTestCase(TestOutputModes))
+    suite.addTests(loader.loadTestsFromTestCase(TestJsonBackend))
+    suite.addTests(loader.loadTestsFromTestCase(TestMineDataset))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     
     # 运行测试